@@ -0,0 +1,113 @@
+"""Content-addressed store for uploaded files, keyed by SHA-256.
+
+Identical uploads share one copy at ``blobs/<sha[:2]>/<sha>/<name>`` under
+the uploads dir. A request payload item claims a blob with a ``blob`` key
+holding its digest; storage counts those claims per blob as request rows are
+written, and blobs nobody has claimed for a while are swept.
+"""
+
+import asyncio
+import hashlib
+import logging
+import shutil
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from storage import drop_orphan_blobs_async, register_upload_blob_async
+
+logger = logging.getLogger(__name__)
+
+BLOBS_SUBDIR = "blobs"
+# An upload is kept this long before a request has to claim it; flows that
+# hold a parsed file in FSM state only write the request later.
+ORPHAN_GRACE = timedelta(days=1)
+
+_store_lock = asyncio.Lock()
+
+
+def blobs_dir() -> Path:
+    from bot.helpers import get_uploads_subdir
+
+    return get_uploads_subdir(BLOBS_SUBDIR)
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _blob_dir(digest: str) -> Path:
+    return blobs_dir() / digest[:2] / digest
+
+
+def is_blob_path(path: Any) -> bool:
+    try:
+        Path(path).resolve().relative_to(blobs_dir().resolve())
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+async def store_upload(src: Path, name: str) -> tuple[str, Path]:
+    """Move ``src`` into the store as ``name``; return its digest and path.
+
+    When the same bytes are already stored ``src`` is dropped and the stored
+    copy is reused.
+    """
+    digest = await asyncio.to_thread(file_digest, src)
+    dest = _blob_dir(digest) / name
+    async with _store_lock:
+        if dest.exists():
+            src.unlink(missing_ok=True)
+        else:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            src.replace(dest)
+        await register_upload_blob_async(digest, name, dest.stat().st_size)
+    return digest, dest
+
+
+def release_upload(item: Dict[str, Any]) -> bool:
+    """Drop ``item``'s claim on its uploaded file; return True if it had one.
+
+    A blob only loses the claim, the bytes go once no request holds one.
+    Files stored before the blob store are deleted directly.
+    """
+    if item.pop("blob", None):
+        return True
+    raw = item.get("file_path")
+    if not raw or is_blob_path(raw) or not Path(raw).exists():
+        return False
+    Path(raw).unlink(missing_ok=True)
+    return True
+
+
+def _orphan_cutoff() -> str:
+    return (datetime.now(timezone.utc) - ORPHAN_GRACE).isoformat()
+
+
+def _remove_blobs(digests: List[str]) -> int:
+    for digest in digests:
+        shutil.rmtree(_blob_dir(digest), ignore_errors=True)
+    if digests:
+        logger.info("Removed %s unreferenced upload blob(s)", len(digests))
+    return len(digests)
+
+
+async def sweep_orphan_blobs_async() -> int:
+    # Held across the delete so a concurrent upload of the same bytes cannot
+    # land between dropping the row and removing the file.
+    async with _store_lock:
+        digests = await drop_orphan_blobs_async(_orphan_cutoff())
+        return await asyncio.to_thread(_remove_blobs, digests)
+
+
+def blob_digest_of(path: Path, uploads_dir: Path) -> Optional[str]:
+    """Digest of the blob ``path`` belongs to, for a file under ``uploads_dir``."""
+    parts = path.relative_to(uploads_dir).parts
+    if len(parts) == 4 and parts[0] == BLOBS_SUBDIR:
+        return parts[2]
+    return None
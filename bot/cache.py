@@ -2,7 +2,7 @@ import asyncio
 import time
 from typing import Any, Callable, Dict, List, Optional
 
-from storage import load_config, load_icons, load_plugins
+from storage import StorageEvent, load_config, load_icons, load_plugins, subscribe_storage_events
 from bot.icons import CATEGORY_ICONS
 from bot.texts import t
 
@@ -48,13 +48,22 @@ def invalidate(key: Optional[str] = None) -> None:
         _cache_time.clear()
 
 
+def _on_storage_event(event: StorageEvent) -> None:
+    if event.doc_key == "config":
+        invalidate("config")
+
+
+subscribe_storage_events(_on_storage_event)
+
+
 def get_config() -> Dict[str, Any]:
     return _get_cached_sync("config", load_config, ttl=300)
 
 
 def get_icons() -> List[Dict[str, Any]]:
-    data = _get_cached_sync("icons", load_icons)
-    return data.get("iconpacks", [])
+    # Storage serves plugins and icons from memory and keeps them current, so
+    # they are not copied here.
+    return load_icons().get("iconpacks", [])
 
 
 def get_categories() -> List[Dict[str, Any]]:
@@ -139,12 +148,12 @@ async def get_config_async() -> Dict[str, Any]:
 
 
 async def get_plugins_async() -> List[Dict[str, Any]]:
-    data = await _get_cached_async("plugins", load_plugins)
+    data = await asyncio.to_thread(load_plugins)
     return data.get("plugins", [])
 
 
 async def get_icons_async() -> List[Dict[str, Any]]:
-    data = await _get_cached_async("icons", load_icons)
+    data = await asyncio.to_thread(load_icons)
     return data.get("iconpacks", [])
 
 
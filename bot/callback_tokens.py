@@ -1,19 +1,14 @@
-import hashlib
 import re
 from typing import Dict
 
-from storage import load_icons, load_plugins
+from catalog import resolve_slug_token
+from storage import slug_token
 
 _MAX_CALLBACK_SLUG = 40
 _slug_tokens: Dict[str, str] = {}
 _TOKEN_RE = re.compile(r"^t(?:[0-9a-f]{10}|[0-9a-f]{16})$")
 
 
-def _token_for(slug: str, digest_size: int = 16) -> str:
-    digest = hashlib.sha1(slug.encode("utf-8")).hexdigest()[:digest_size]
-    return f"t{digest}"
-
-
 def encode_slug(slug: str) -> str:
     if not slug:
         return slug
@@ -24,29 +19,11 @@ def encode_slug(slug: str) -> str:
 
     if slug_bytes_len <= _MAX_CALLBACK_SLUG:
         return slug
-    key = _token_for(slug)
+    key = slug_token(slug)
     _slug_tokens[key] = slug
     return key
 
 
-def _stored_slugs() -> list[str]:
-    slugs: list[str] = []
-    for loader, collection_key in (
-        (load_plugins, "plugins"),
-        (load_icons, "iconpacks"),
-    ):
-        try:
-            data = loader()
-        except Exception:
-            continue
-        items = data.get(collection_key, []) if isinstance(data, dict) else []
-        for item in items if isinstance(items, list) else []:
-            slug = item.get("slug") if isinstance(item, dict) else None
-            if isinstance(slug, str) and slug:
-                slugs.append(slug)
-    return slugs
-
-
 def decode_slug(value: str) -> str:
     if not value:
         return value
@@ -57,13 +34,10 @@ def decode_slug(value: str) -> str:
     if not _TOKEN_RE.fullmatch(value):
         return value
 
-    slugs = _stored_slugs()
-    # A real slug which happens to look like a token must not be shadowed.
-    if value in slugs:
-        return value
-
-    for slug in slugs:
-        if value in (_token_for(slug), _token_for(slug, digest_size=10)):
-            _slug_tokens[value] = slug
-            return slug
+    # Real slugs resolve to themselves, so one that merely looks like a
+    # token is not shadowed.
+    slug = resolve_slug_token(value)
+    if slug:
+        _slug_tokens[value] = slug
+        return slug
     return value
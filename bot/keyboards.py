@@ -881,6 +881,12 @@ def admin_broadcast_confirm_kb(lang: str = "ru") -> InlineKeyboardMarkup:
     ])
 
 
+def admin_broadcast_progress_kb(lang: str = "ru") -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [_btn(t("btn_broadcast_stop", lang), callback_data="adm:broadcast:stop", icon="cancel")],
+    ])
+
+
 def admin_post_confirm_kb(lang: str = "ru") -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=[
         [_btn(t("btn_send", lang), callback_data="adm:post:send", style="success", icon="send")],
@@ -1220,13 +1226,34 @@ def admin_plugins_list_kb(
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
-def admin_audit_log_kb(page: int, total_pages: int, lang: str = "ru") -> InlineKeyboardMarkup:
+_AUDIT_LOG_FILTER_BUTTONS = (
+    ("all", "admin_audit_filter_all"),
+    ("votes", "admin_audit_log_filter_votes"),
+    ("decisions", "admin_audit_log_filter_decisions"),
+    ("appeals", "admin_audit_log_filter_appeals"),
+    ("bans", "admin_audit_log_filter_bans"),
+)
+
+
+def admin_audit_log_kb(page: int, total_pages: int, kind: str = "all", lang: str = "ru") -> InlineKeyboardMarkup:
+    rows: List[List[InlineKeyboardButton]] = []
+    filters: List[InlineKeyboardButton] = []
+    for key, text_key in _AUDIT_LOG_FILTER_BUTTONS:
+        label = t(text_key, lang)
+        if key == kind:
+            filters.append(_btn(f"· {label} ·", callback_data=f"adm:auditlog:{key}:0", style="success"))
+        else:
+            filters.append(_btn(label, callback_data=f"adm:auditlog:{key}:0"))
+    for i in range(0, len(filters), 3):
+        rows.append(filters[i:i + 3])
+
     nav = []
     if page > 0:
-        nav.append(_btn("<", callback_data=f"adm:auditlog:{page-1}", icon="back"))
+        nav.append(_btn("<", callback_data=f"adm:auditlog:{kind}:{page-1}", icon="back"))
     if page < total_pages - 1:
-        nav.append(_btn(">", callback_data=f"adm:auditlog:{page+1}", icon="forward"))
-    rows = [nav] if nav else []
+        nav.append(_btn(">", callback_data=f"adm:auditlog:{kind}:{page+1}", icon="forward"))
+    if nav:
+        rows.append(nav)
     rows.append([_btn(t("btn_back", lang), callback_data="adm:config", style="danger", icon="back")])
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
@@ -22,6 +22,7 @@ MARKUP_BYTES = 10 * 1024
 ENTITIES = 100
 CUSTOM_EMOJI = 100
 
+MESSAGES_PER_SECOND = 30
 SCHEDULED_MESSAGES = 100
 SCHEDULE_DAYS = 365
 INLINE_RESULTS = 50
@@ -22,7 +22,6 @@ from bot.cache import (
             get_admins_super,
     get_categories,
     get_config,
-    invalidate,
 )
 from bot.constants import PAGE_SIZE
 from bot.context import get_lang
@@ -30,7 +29,7 @@ from bot.callback_tokens import decode_slug, encode_slug
 from bot.formatting import plain_html, strip_blockquote_tags, telegram_html, user_mention
 from bot.helpers import ack, answer
 from bot.menu_owner import MenuOwnerMiddleware, remember_menu_owner
-from bot.services.audit import add_audit_event, audit_events_page, recent_audit_events
+from bot.services.audit import AUDIT_KINDS, add_audit_event, audit_events_count, audit_events_page, recent_audit_events
 from bot.keyboards import (
     admin_quiz_item_kb,
     admin_quiz_list_kb,
@@ -38,6 +37,7 @@ from bot.keyboards import (
     admin_actions_kb,
     admin_banned_kb,
     admin_broadcast_confirm_kb,
+    admin_broadcast_progress_kb,
     admin_post_confirm_kb,
     admin_config_kb,
     admin_config_admins_kb,
@@ -102,6 +102,7 @@ from bot.services.admin_notifications import (
     finalize_admin_notify_messages,
     set_admin_notification_preference,
 )
+from bot.services.broadcast import start_broadcast, stop_broadcast
 from bot.services.dialogs import register_dialog_message
 from bot.services.forum import answer_in_moderation_topic
 from bot.services.moderation import (
@@ -119,9 +120,11 @@ from bot.services.submission import process_plugin_file
 from bot.states import AdminFlow
 from bot.icons import emoji_html
 from bot.texts import TEXTS, t
-from catalog import find_icon_by_slug, find_plugin_by_slug, list_published_icons, list_published_plugins
+from bot.routers.catalog_flow import preview_cache_stats
+from catalog import find_icon_by_slug, find_plugin_by_slug, list_published_plugins, save_plugin, search_icons, search_plugins
 from request_store import (
     cleanup_hidden_requests,
+    count_requests,
     delete_request_and_file,
     delete_requests_by_plugin_id,
     get_request_by_id,
@@ -130,10 +133,9 @@ from request_store import (
     update_request_payload,
     update_request_status,
 )
-from storage import DATA_DIR, QUIZ_OPTIONS_PER_QUESTION, QUIZ_QUESTIONS_PER_RUN, SQLITE_PATH, add_quiz_question, delete_quiz_question, load_config, load_plugins, load_quiz_questions, restore_quiz_defaults, save_config, save_plugins, update_quiz_question
-from user_store import ban_user, get_banned_users, is_broadcast_enabled, list_users, unban_user
+from storage import DATA_DIR, QUIZ_OPTIONS_PER_QUESTION, QUIZ_QUESTIONS_PER_RUN, SQLITE_PATH, add_quiz_question, count_archived_requests, delete_quiz_question, load_config, load_plugins, load_quiz_questions, restore_quiz_defaults, save_config, storage_writer_stats, update_quiz_question
+from user_store import ban_user, count_users_by_language, find_user_by_username, get_banned_users, unban_user
 from subscription_store import list_subscribers
-from catalog import invalidate_catalog_cache
 
 logger = logging.getLogger(__name__)
 
@@ -238,7 +240,6 @@ def _cleanup_schedule_presets() -> list[str]:
         cfg = get_config()
         cfg["schedule_presets"] = alive
         save_config(cfg)
-        invalidate("config")
     return alive
 
 
@@ -340,7 +341,6 @@ def _save_scheduled_posts(items: list[dict]) -> None:
     cfg = get_config()
     cfg[_scheduled_posts_cfg_key()] = items
     save_config(cfg)
-    invalidate("config")
 
 
 def _parse_dt_utc(value: str | None) -> datetime | None:
@@ -655,7 +655,7 @@ def _is_top_level_token(token: str) -> bool:
 
 
 _PAGINATED_TOKEN_RE = re.compile(
-    r"^(adm:(?:queue:[a-z_]+|updates|scheduled|scheduled_posts|banned|auditlog|rejapp|audit(?::[a-z]+)?)):\d+$"
+    r"^(adm:(?:queue:[a-z_]+|updates|scheduled|scheduled_posts|banned|auditlog(?::[a-z]+)?|rejapp|audit(?::[a-z]+)?)):\d+$"
 )
 
 
@@ -1283,8 +1283,9 @@ async def _render_nav_token(cb: CallbackQuery, state: FSMContext, token: str) ->
         await _render_rejected(cb, state, page, status)
     elif token.startswith("adm:auditlog:"):
         parts = token.split(":")
-        page = int(parts[2]) if len(parts) > 2 and parts[2].isdigit() else 0
-        await _render_audit_log(cb, state, page)
+        kind = parts[2] if len(parts) > 3 else "all"
+        page = int(parts[-1]) if parts[-1].isdigit() else 0
+        await _render_audit_log(cb, state, page, kind)
     elif token == "adm:blocklist":
         await _render_blocklist(cb, state)
     elif token.startswith("adm:rejapp:"):
@@ -1717,24 +1718,23 @@ async def cmd_resend_forum_requests(message: Message) -> None:
     await answer_in_moderation_topic(message, "\n".join(report))
 
 
-def _build_health_text() -> str:
+async def _build_health_text() -> str:
     cfg = get_config()
     moderation = cfg.get("moderation", {}) if isinstance(cfg, dict) else {}
     forum_cfg = moderation_config()
     counts = {
-        "pending": len(get_requests(status="pending")),
-        "error": len(get_requests(status="error")),
-        "scheduled": len(get_requests(status="scheduled")),
-        "published": len(get_requests(status="published")),
-        "rejected": len(get_requests(status="rejected")),
+        status: count_requests(status)
+        for status in ("pending", "error", "scheduled", "published", "rejected")
     }
     plugins_count = len(load_plugins().get("plugins", []) or [])
-    audit_count = len(recent_audit_events(1000))
-    latest_audit = recent_audit_events(1)
+    audit_count = await audit_events_count()
+    latest_audit = await recent_audit_events(1)
     latest_audit_line = "—"
     if latest_audit:
         event = latest_audit[0]
         latest_audit_line = f"{plain_html(event.get('event') or '—')} / {plain_html(event.get('created_at') or '—')}"
+    writer = storage_writer_stats()
+    previews = preview_cache_stats()
 
     lines = [
         "<b>Health</b>",
@@ -1743,12 +1743,19 @@ def _build_health_text() -> str:
         f"Plugins in catalog: <code>{plugins_count}</code>",
         f"Requests pending/error/scheduled: <code>{counts['pending']}/{counts['error']}/{counts['scheduled']}</code>",
         f"Requests published/rejected: <code>{counts['published']}/{counts['rejected']}</code>",
+        f"Requests archived: <code>{count_archived_requests()}</code>",
         f"Forum chat: <code>{forum_cfg['chat_id']}</code>",
         f"Forum topic: <code>{forum_cfg['topic_id']}</code>",
         f"Vote threshold: <code>{forum_cfg['threshold']}</code>",
         f"Notification chats: <code>{plain_html(', '.join(str(x) for x in (moderation.get('notification_chat_ids') or [])) or '—')}</code>",
         f"Audit events: <code>{audit_count}</code>",
         f"Latest audit: <code>{latest_audit_line}</code>",
+        f"Storage writer queue: <code>{writer['queue_depth']}</code>",
+        f"Storage commits: <code>{writer['commits']}</code> (last {writer['last_batch']} jobs, "
+        f"<code>{writer['last_commit_ms']:.1f}</code>/<code>{writer['avg_commit_ms']:.1f}</code>/"
+        f"<code>{writer['max_commit_ms']:.1f}</code> ms last/avg/max)",
+        f"Preview cache: <code>{previews['size']}</code> entries, "
+        f"<code>{previews['hits']}</code>/<code>{previews['misses']}</code> hits/misses",
     ]
     return "\n".join(lines)
 
@@ -1761,8 +1768,7 @@ def _do_sync_version(target_id: str, new_version: str) -> str:
             p.setdefault("ru", {})["version"] = new_version
             p.setdefault("en", {})["version"] = new_version
             p["updated_at"] = datetime.utcnow().isoformat()
-            save_plugins(db)
-            invalidate_catalog_cache()
+            save_plugin(p)
             return f"версия «{plain_html(target_id)}» → {plain_html(new_version)}"
     return "плагин не найден"
 
@@ -1805,7 +1811,7 @@ async def on_admin_maint_health(cb: CallbackQuery, state: FSMContext) -> None:
     if not _ensure_admin_role(cb, "super"):
         await cb.answer(_tr(cb, "admin_denied"), show_alert=True)
         return
-    await answer(cb, _build_health_text(), admin_maintenance_kb(_lang_for(cb)), "admin")
+    await answer(cb, await _build_health_text(), admin_maintenance_kb(_lang_for(cb)), "admin")
     await ack(cb)
 
 
@@ -2592,15 +2598,7 @@ async def on_admin_search_icons(message: Message, state: FSMContext) -> None:
         await message.answer(_tr(message, "need_text"), disable_web_page_preview=True)
         return
 
-    icons = list_published_icons()
-    filtered = [
-        i
-        for i in icons
-        if query in (i.get("slug", "").lower())
-        or query in _localized_name(i, lang).lower()
-        or query in ((i.get("ru") or {}).get("name") or "").lower()
-        or query in ((i.get("en") or {}).get("name") or "").lower()
-    ]
+    filtered = await search_icons(query, limit=None)
     await state.update_data(edit_icons_list=[i.get("slug") for i in filtered])
     data = await state.get_data()
     purpose = data.get("search_purpose")
@@ -3625,7 +3623,6 @@ async def on_admin_add_schedule_preset(message: Message, state: FSMContext) -> N
         presets.append(dt_str)
     cfg["schedule_presets"] = presets
     save_config(cfg)
-    invalidate("config")
 
     data = await state.get_data()
     target = data.get("schedule_preset_target")
@@ -3691,7 +3688,6 @@ async def on_admins_remove(cb: CallbackQuery, state: FSMContext) -> None:
     updated = sorted({x for x in current if x != admin_id})
     config[field] = updated
     save_config(config)
-    invalidate("config")
 
     title = _admins_title(field, cb)
     msg = await answer(
@@ -3747,12 +3743,12 @@ async def on_admin_stats(cb: CallbackQuery, state: FSMContext) -> None:
         await cb.answer(_tr(cb, "admin_denied"), show_alert=True)
         return
 
-    users = list_users()
-    total = len(users)
+    total = 0
     counts: Dict[str, int] = {}
-    for user in users:
-        user_lang = (user.get("language") or "unknown").lower()
-        counts[user_lang] = counts.get(user_lang, 0) + 1
+    for user_lang, count in count_users_by_language().items():
+        user_lang = (user_lang or "unknown").lower()
+        counts[user_lang] = counts.get(user_lang, 0) + count
+        total += count
 
     lines = [_tr(cb, "admin_label_users", total=total)]
     if counts:
@@ -3910,7 +3906,6 @@ async def on_admin_config_value(message: Message, state: FSMContext) -> None:
         updated = sorted(set(current + [admin_id]))
         config[field] = updated
         save_config(config)
-        invalidate("config")
         config_message_id = data.get("config_message_id")
         if config_message_id:
             try:
@@ -3936,7 +3931,6 @@ async def on_admin_config_value(message: Message, state: FSMContext) -> None:
     elif field == "checked_on_version":
         config[field] = text
         save_config(config)
-        invalidate("config")
         await state.update_data(config_field=None, config_message_id=None)
         await state.set_state(AdminFlow.menu)
         await answer(message, _config_section_text("other", lang), admin_config_other_kb(lang=lang), "admin")
@@ -3954,7 +3948,6 @@ async def on_admin_config_value(message: Message, state: FSMContext) -> None:
 
         _config_set_path(config, field, value)
         save_config(config)
-        invalidate("config")
 
         if field.startswith("moderation."):
             section = "moderation"
@@ -4000,7 +3993,6 @@ async def on_admin_config_value(message: Message, state: FSMContext) -> None:
         config["channel"]["title"] = title
         config["publish_channel"] = publish_channel
         save_config(config)
-        invalidate("config")
         await message.answer(
             _tr(message, "admin_channel_updated"),
             disable_web_page_preview=True,
@@ -4117,42 +4109,39 @@ async def on_admin_broadcast_confirm(cb: CallbackQuery, state: FSMContext) -> No
         await cb.answer(_tr(cb, "admin_broadcast_no_text"), show_alert=True)
         return
 
-    users = list_users()
-    sent = 0
-    failed = 0
-    for user in users:
-        user_id = user.get("user_id")
-        if not user_id or user.get("banned"):
-            continue
-        if not is_broadcast_enabled(int(user_id)):
-            continue
-        try:
-            await cb.bot.send_message(
-                user_id,
-                text,
-                parse_mode=ParseMode.HTML,
-                disable_web_page_preview=True,
-            )
-            sent += 1
-        except Exception:
-            failed += 1
+    job = await start_broadcast(
+        cb.bot,
+        text,
+        lang=lang,
+        created_by=cb.from_user.id,
+        chat_id=cb.message.chat.id,
+        message_id=cb.message.message_id,
+    )
+    if job is None:
+        await cb.answer(_tr(cb, "admin_broadcast_busy"), show_alert=True)
+        return
 
     await state.clear()
     await state.set_state(AdminFlow.menu)
     try:
         await cb.message.edit_text(
-            _tr(cb, "admin_broadcast_done", sent=sent, failed=failed),
+            _tr(cb, "admin_broadcast_progress", done=0, total=job["total"], sent=0, failed=0, blocked=0),
             parse_mode=ParseMode.HTML,
-            reply_markup=admin_menu_kb(_admin_menu_role(cb), lang=lang),
+            reply_markup=admin_broadcast_progress_kb(lang=lang),
             disable_web_page_preview=True,
         )
     except Exception:
-        await answer(
-            cb,
-            _tr(cb, "admin_broadcast_done", sent=sent, failed=failed),
-            admin_menu_kb(_admin_menu_role(cb), lang=lang),
-            "profile",
-        )
+        pass
+    await ack(cb)
+
+
+@router.callback_query(F.data == "adm:broadcast:stop")
+async def on_admin_broadcast_stop(cb: CallbackQuery) -> None:
+    if not _ensure_admin_role(cb, "super"):
+        await cb.answer(_tr(cb, "admin_denied"), show_alert=True)
+        return
+
+    stop_broadcast()
     await ack(cb)
 
 
@@ -4319,12 +4308,9 @@ async def _resolve_ban_target(bot, raw: str):
     if raw.lstrip("-").isdigit():
         return int(raw)
     uname = raw.lstrip("@").lower()
-    for u in list_users():
-        if str(u.get("username") or "").lower() == uname:
-            try:
-                return int(u.get("user_id"))
-            except (TypeError, ValueError):
-                continue
+    user_id = find_user_by_username(uname)
+    if user_id is not None:
+        return user_id
     try:
         chat = await bot.get_chat("@" + uname)
         return int(chat.id)
@@ -4487,15 +4473,7 @@ async def on_admin_search_plugins(message: Message, state: FSMContext) -> None:
         )
         return
 
-    plugins = list_published_plugins(source_filter="official")
-    filtered = [
-        p
-        for p in plugins
-        if query in (p.get("slug", "").lower())
-        or query in _localized_name(p, lang).lower()
-        or query in ((p.get("ru") or {}).get("name") or "").lower()
-        or query in ((p.get("en") or {}).get("name") or "").lower()
-    ]
+    filtered = await search_plugins(query, limit=None, source_filter="official")
 
     await state.update_data(edit_plugins_list=[p.get("slug") for p in filtered])
 
@@ -4754,7 +4732,6 @@ async def on_admin_catalog_delete_confirm(cb: CallbackQuery, state: FSMContext)
         pass
 
     removed = remove_plugin_entry(slug)
-    invalidate("plugins")
     if not removed:
         await cb.answer(_tr(cb, "admin_delete_failed"), show_alert=True)
         return
@@ -6394,7 +6371,6 @@ def _save_templates(templates: list[str], kind: str = "reject") -> None:
     cfg = get_config()
     cfg[_TEMPLATE_CONFIG_KEYS[kind]] = list(templates)
     save_config(cfg)
-    invalidate("config")
 
 
 def _rejtpl_list_text(templates: list[str]) -> str:
@@ -6971,9 +6947,21 @@ def _audit_line(event: dict) -> str:
     return line
 
 
-async def _render_audit_log(target, state: FSMContext, page: int) -> None:
+async def _render_audit_log(target, state: FSMContext, page: int, kind: str = "all") -> None:
     lang = _lang_for(target)
-    events, total = audit_events_page(page, _AUDIT_LOG_PER_PAGE)
+    if kind not in AUDIT_KINDS:
+        kind = "all"
+    # Remember the last event id of every rendered page so paging forward
+    # and back seeks by id instead of scanning past an offset.
+    data = await state.get_data()
+    cursors = data.get("audit_log_cursors") if isinstance(data.get("audit_log_cursors"), dict) else {}
+    if cursors.get("kind") != kind:
+        cursors = {"kind": kind}
+    before_id = cursors.get(str(page - 1)) if page > 0 else None
+    events, total = await audit_events_page(page, _AUDIT_LOG_PER_PAGE, kind=kind, before_id=before_id)
+    if events:
+        cursors[str(page)] = events[-1].get("id")
+    await state.update_data(audit_log_cursors=cursors)
     total_pages = max(1, math.ceil(total / _AUDIT_LOG_PER_PAGE)) if total else 1
     if not events:
         text = _tr(target, "admin_audit_log_empty")
@@ -6984,15 +6972,17 @@ async def _render_audit_log(target, state: FSMContext, page: int) -> None:
             events="\n\n".join(_audit_line(e) for e in events),
         )
     await state.set_state(AdminFlow.menu)
-    await answer(target, text, admin_audit_log_kb(page, total_pages, lang=lang), "admin")
+    await answer(target, text, admin_audit_log_kb(page, total_pages, kind=kind, lang=lang), "admin")
 
 
-@router.callback_query(F.data.regexp(r"^adm:auditlog:\d+$"))
+@router.callback_query(F.data.regexp(r"^adm:auditlog:(?:[a-z]+:)?\d+$"))
 async def on_admin_audit_log(cb: CallbackQuery, state: FSMContext) -> None:
     if not _is_super_admin(cb):
         await cb.answer(_tr(cb, "admin_denied"), show_alert=True)
         return
-    await _render_audit_log(cb, state, int(cb.data.split(":")[2]))
+    parts = cb.data.split(":")
+    kind = parts[2] if len(parts) > 3 else "all"
+    await _render_audit_log(cb, state, int(parts[-1]), kind)
     await ack(cb)
 
 
@@ -7026,7 +7016,6 @@ async def on_admin_unblock(cb: CallbackQuery, state: FSMContext) -> None:
     if len(remaining) != len(items):
         cfg["plugin_blocklist"] = remaining
         save_config(cfg)
-        invalidate("config")
         add_audit_event(
             "moderation.plugin_unblocked",
             actor_id=cb.from_user.id if cb.from_user else None,
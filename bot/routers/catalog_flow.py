@@ -2,9 +2,10 @@ import html
 import logging
 import time
 import math
+from collections import OrderedDict
 from html.parser import HTMLParser
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List
 
 from aiogram import F, Router
 from aiogram.enums import ParseMode
@@ -50,12 +51,14 @@ from catalog import (
     find_plugin_by_slug,
     find_user_icons,
     find_user_plugins,
+    get_search_session,
     is_external_plugin,
     list_plugin_sources,
     list_plugins_by_category,
+    open_search_session,
     plugin_source_type,
-    search_icons,
-    search_plugins,
+    suggest_icon_hits,
+    suggest_plugin_hits,
 )
 from subscription_store import (
     add_subscription,
@@ -68,7 +71,7 @@ from user_store import (
     has_paid_broadcast_disable,
     is_broadcast_enabled,
 )
-from storage import load_stenka, save_stenka
+from storage import document_version, load_stenka, row_version, save_stenka
 from storage import load_joinly
 from storage import save_joinly
 from request_store import get_request_by_plugin_id, get_user_requests, update_request_payload
@@ -82,6 +85,19 @@ BOT_USERNAME = "exteraPluginsRobot"
 GITHUB_IMG_BASE_URL = "https://github.com/itsv1eds/exteraPluginsRobot/blob/main/img"
 SOURCE_PAGE_SIZE = 8
 
+_INLINE_PAGE_SIZE = 20
+_INLINE_MAX_RESULTS = 100
+_INLINE_CACHE_SIZE = 256
+_PREVIEW_CACHE_SIZE = 2048
+# (doc, slug, lang, kind, row version) -> rendered HTML
+_preview_cache: "OrderedDict[tuple[str, str, str, str, int], str]" = OrderedDict()
+_preview_hits = 0
+_preview_misses = 0
+# (kind, entry, snippet, rank within kind) of one inline catalog result
+_InlineHit = tuple[str, Dict[str, Any], str | None, int]
+# query -> (catalog versions, ranked hits)
+_inline_hits_cache: "OrderedDict[str, tuple[tuple[int, int], List[_InlineHit]]]" = OrderedDict()
+
 
 def _github_img_url(image_key: str) -> str:
     return f"{GITHUB_IMG_BASE_URL}/{image_key}.png?raw=true"
@@ -377,7 +393,53 @@ async def on_stenka_tag(cb: CallbackQuery) -> None:
     await cb.answer(t("stenka_alert_open_bot", lang), show_alert=True)
 
 
+def _catalog_doc_key(entry: Dict[str, Any]) -> str | None:
+    slug = entry.get("slug")
+    if find_plugin_by_slug(slug) is entry:
+        return "plugins"
+    if find_icon_by_slug(slug) is entry:
+        return "icons"
+    return None
+
+
+def _cached_preview(entry: Dict[str, Any], lang: str, kind: str, render: Callable[[], str]) -> str:
+    """Return ``render()`` through the preview LRU.
+
+    Only entries that are the live catalog objects are cached. The key
+    carries the row version, so a saved edit renders afresh.
+    """
+    global _preview_hits, _preview_misses
+    doc_key = _catalog_doc_key(entry)
+    if doc_key is None:
+        return render()
+    slug = str(entry.get("slug"))
+    key = (doc_key, slug, lang, kind, row_version(doc_key, slug))
+    cached = _preview_cache.get(key)
+    if cached is not None:
+        _preview_cache.move_to_end(key)
+        _preview_hits += 1
+        return cached
+    _preview_misses += 1
+    text = render()
+    _preview_cache[key] = text
+    while len(_preview_cache) > _PREVIEW_CACHE_SIZE:
+        _preview_cache.popitem(last=False)
+    return text
+
+
+def preview_cache_stats() -> Dict[str, int]:
+    return {"size": len(_preview_cache), "hits": _preview_hits, "misses": _preview_misses}
+
+
 def build_plugin_preview(entry: Dict[str, Any], lang: str) -> str:
+    return _cached_preview(entry, lang, "card", lambda: _render_plugin_preview(entry, lang))
+
+
+def build_inline_preview(entry: Dict[str, Any], lang: str, kind: str = "plugin") -> str:
+    return _cached_preview(entry, lang, f"inline:{kind}", lambda: _render_inline_preview(entry, lang, kind))
+
+
+def _render_plugin_preview(entry: Dict[str, Any], lang: str) -> str:
     locale = entry.get(lang) or entry.get("ru") or entry.get("en") or {}
     authors = entry.get("authors", {})
     raw_blocks = entry.get("raw_blocks", {}) or {}
@@ -427,7 +489,7 @@ def build_plugin_preview(entry: Dict[str, Any], lang: str) -> str:
     return "\n".join(lines)
 
 
-def build_inline_preview(entry: Dict[str, Any], lang: str, kind: str = "plugin") -> str:
+def _render_inline_preview(entry: Dict[str, Any], lang: str, kind: str = "plugin") -> str:
     locale = entry.get(lang) or entry.get("ru") or entry.get("en") or {}
     authors = entry.get("authors", {})
     raw_blocks = entry.get("raw_blocks", {}) or {}
@@ -881,45 +943,41 @@ async def on_search_query(message: Message, state: FSMContext) -> None:
         return
 
     source_filter = await _catalog_source_filter(state)
-    results = search_plugins(query, limit=25, source_filter=source_filter)
+    session = await open_search_session(query, source_filter)
     await state.set_state(UserFlow.idle)
 
-    if not results:
+    if not session:
         await answer(message, t("search_empty", lang), search_kb(lang, True), "catalog")
         return
 
-    slugs: list[str] = []
-    for plugin in results:
-        slug = plugin.get("slug")
-        if slug:
-            slugs.append(slug)
-
-    await state.update_data(last_search_query=query, last_search_results=slugs)
+    await state.update_data(last_search_query=query, search_session=session.session_id, last_search_results=None)
     await _render_search_results(message, state, page=0)
 
 
 async def _render_search_results(target: Message | CallbackQuery, state: FSMContext, page: int) -> None:
     lang = await get_language(target, state)
     data = await state.get_data()
-    slugs: list[str] = data.get("last_search_results", [])
-    if not slugs:
+    source_filter = await _catalog_source_filter(state)
+    session = get_search_session(data.get("search_session"))
+    if session is None and data.get("last_search_query"):
+        # Evicted or lost on restart: rank the query again.
+        session = await open_search_session(data["last_search_query"], source_filter)
+        await state.update_data(search_session=session.session_id)
+    if not session:
         await answer(target, t("search_empty", lang), search_kb(lang, True), "catalog")
         return
 
-    total = len(slugs)
+    total = len(session)
     total_pages = math.ceil(total / PAGE_SIZE)
     page = max(0, min(page, total_pages - 1))
-    start = page * PAGE_SIZE
-    page_slugs = slugs[start : start + PAGE_SIZE]
 
     items = []
-    for slug in page_slugs:
+    for slug in session.page(page, PAGE_SIZE):
         plugin = find_plugin_by_slug(slug)
         locale = (plugin.get(lang) if plugin else None) or (plugin.get("ru") if plugin else None) or {}
         name = (locale.get("name") if isinstance(locale, dict) else None) or slug
         items.append((name, f"plugin:{encode_slug(slug)}"))
 
-    source_filter = await _catalog_source_filter(state)
     source_label = _source_label_for_filter(source_filter, lang)
     text = f"{t('search_results', lang, count=total)}\n{t('catalog_source_current', lang, source=html.escape(source_label))}"
     await state.update_data(catalog_back=f"search:{page}")
@@ -1501,6 +1559,112 @@ async def on_my_items(cb: CallbackQuery, state: FSMContext) -> None:
     await ack(cb)
 
 
+def _inline_plugin_article(plugin: Dict[str, Any], snippet: str | None, idx: int, lang: str) -> InlineQueryResultArticle | None:
+    slug = plugin.get("slug")
+    if not slug:
+        return None
+
+    locale = plugin.get(lang) or plugin.get("ru") or {}
+    name = locale.get("name") or slug
+    category_key = str(plugin.get("category") or "").strip()
+    category_fallback = CATEGORY_FALLBACKS.get(category_key, "")
+    title = f"{category_fallback} {name}"
+    preview_url = _plugin_category_preview_url(category_key)
+    preview = _with_hidden_preview_link(build_inline_preview(plugin, lang, "plugin"), preview_url)
+    description = strip_html(snippet or locale.get("description") or t("catalog_inline_no_description", lang))
+    link = plugin.get("channel_message", {}).get("link")
+    reply_markup = None
+    deeplink = f"tg://resolve?domain={BOT_USERNAME}&start={slug}"
+    if link:
+        buttons = [
+            InlineKeyboardButton(text=t("catalog_inline_download", lang), url=link, style="success"),
+            InlineKeyboardButton(text=t("catalog_inline_open_in_bot", lang), url=deeplink),
+        ]
+        reply_markup = InlineKeyboardMarkup(inline_keyboard=[buttons])
+    else:
+        reply_markup = InlineKeyboardMarkup(
+            inline_keyboard=[[InlineKeyboardButton(text=t("catalog_inline_open_in_bot", lang), url=deeplink)]]
+        )
+
+    return InlineQueryResultArticle(
+        id=f"plugin:{encode_slug(slug)}:{idx}",
+        title=title,
+        description=description[:100],
+        input_message_content=InputTextMessageContent(
+            message_text=preview,
+            parse_mode=ParseMode.HTML,
+            disable_web_page_preview=False,
+            link_preview_options=link_preview_options(url=preview_url),
+        ),
+        reply_markup=reply_markup,
+    )
+
+
+def _inline_icon_article(icon: Dict[str, Any], snippet: str | None, idx: int, lang: str) -> InlineQueryResultArticle | None:
+    slug = icon.get("slug")
+    if not slug:
+        return None
+
+    locale = icon.get(lang) or icon.get("ru") or {}
+    name = locale.get("name") or slug
+    preview = build_inline_preview(icon, lang, "icon")
+    description = strip_html(snippet or "")
+    link = icon.get("channel_message", {}).get("link")
+    reply_markup = None
+    if link:
+        reply_markup = InlineKeyboardMarkup(
+            inline_keyboard=[[InlineKeyboardButton(text=t("catalog_inline_download", lang), url=link, style="success")]]
+        )
+
+    return InlineQueryResultArticle(
+        id=f"icon:{encode_slug(slug)}:{idx}",
+        title=name,
+        description=description[:100],
+        input_message_content=InputTextMessageContent(
+            message_text=preview,
+            parse_mode=ParseMode.HTML,
+            disable_web_page_preview=True,
+        ),
+        reply_markup=reply_markup,
+    )
+
+
+async def _catalog_inline_hits(text: str) -> List[_InlineHit]:
+    """Ranked plugin and icon hits for ``text``, served from an LRU cache.
+
+    Entries carry the plugins and icons versions they were ranked at and are
+    ranked again once either changes. Only the hits are cached; articles are
+    built per page by :func:`_inline_hit_article`.
+    """
+    key = " ".join(text.lower().split())
+    version = (document_version("plugins"), document_version("icons"))
+    cached = _inline_hits_cache.get(key)
+    if cached is not None and cached[0] == version:
+        _inline_hits_cache.move_to_end(key)
+        return cached[1]
+
+    hits: List[_InlineHit] = []
+    for idx, (plugin, snippet) in enumerate(await suggest_plugin_hits(text, limit=_INLINE_MAX_RESULTS)):
+        if plugin.get("slug"):
+            hits.append(("plugin", plugin, snippet, idx))
+    for idx, (icon, snippet) in enumerate(await suggest_icon_hits(text, limit=_INLINE_MAX_RESULTS)):
+        if icon.get("slug"):
+            hits.append(("icon", icon, snippet, idx))
+
+    _inline_hits_cache[key] = (version, hits)
+    _inline_hits_cache.move_to_end(key)
+    while len(_inline_hits_cache) > _INLINE_CACHE_SIZE:
+        _inline_hits_cache.popitem(last=False)
+    return hits
+
+
+def _inline_hit_article(hit: _InlineHit, lang: str) -> InlineQueryResultArticle | None:
+    kind, entry, snippet, idx = hit
+    if kind == "plugin":
+        return _inline_plugin_article(entry, snippet, idx, lang)
+    return _inline_icon_article(entry, snippet, idx, lang)
+
+
 @router.inline_query()
 async def on_inline(query: InlineQuery) -> None:
     text = (query.query or "").strip()
@@ -1546,8 +1710,13 @@ async def on_inline(query: InlineQuery) -> None:
 
     results = []
     user_id = query.from_user.id if query.from_user else 0
+    is_admin = int(user_id) in get_admins_super()
+    try:
+        offset = max(0, int(query.offset or 0))
+    except ValueError:
+        offset = 0
     request_result_added = False
-    if text and int(user_id) in get_admins_super():
+    if text and is_admin and not offset:
         request_entry = get_request_by_plugin_id(text, statuses=VOTABLE_REQUEST_STATUSES)
         if request_entry and request_entry.get("status") in {"pending", "error", "scheduled"}:
             request_id = str(request_entry.get("id") or text)
@@ -1590,88 +1759,20 @@ async def on_inline(query: InlineQuery) -> None:
                     )
                 )
 
-    plugins = search_plugins(text, limit=10)
-    icons = search_icons(text, limit=10)
+    catalog_hits = await _catalog_inline_hits(text)
+    for hit in catalog_hits[offset:offset + _INLINE_PAGE_SIZE]:
+        article = _inline_hit_article(hit, lang)
+        if article is not None:
+            results.append(article)
+    next_offset = str(offset + _INLINE_PAGE_SIZE) if offset + _INLINE_PAGE_SIZE < len(catalog_hits) else ""
 
-    if not results and not plugins and not icons:
+    if not results:
         await query.answer([], cache_time=60)
         return
 
-    for idx, plugin in enumerate(plugins):
-        slug = plugin.get("slug")
-        if not slug:
-            continue
-
-        locale = plugin.get(lang) or plugin.get("ru") or {}
-        name = locale.get("name") or slug
-        category_key = str(plugin.get("category") or "").strip()
-        category_fallback = CATEGORY_FALLBACKS.get(category_key, "")
-        title = f"{category_fallback} {name}"
-        preview_url = _plugin_category_preview_url(category_key)
-        preview = _with_hidden_preview_link(build_inline_preview(plugin, lang, "plugin"), preview_url)
-        description = strip_html(locale.get("description") or t("catalog_inline_no_description", lang))
-        link = plugin.get("channel_message", {}).get("link")
-        reply_markup = None
-        deeplink = f"tg://resolve?domain={BOT_USERNAME}&start={slug}"
-        if link:
-            buttons = [
-                InlineKeyboardButton(text=t("catalog_inline_download", lang), url=link, style="success"),
-                InlineKeyboardButton(text=t("catalog_inline_open_in_bot", lang), url=deeplink),
-            ]
-            reply_markup = InlineKeyboardMarkup(inline_keyboard=[buttons])
-        else:
-            reply_markup = InlineKeyboardMarkup(
-                inline_keyboard=[[InlineKeyboardButton(text=t("catalog_inline_open_in_bot", lang), url=deeplink)]]
-            )
-
-        results.append(
-            InlineQueryResultArticle(
-                id=f"plugin:{encode_slug(slug)}:{idx}",
-                title=title,
-                description=description[:100],
-                input_message_content=InputTextMessageContent(
-                    message_text=preview,
-                    parse_mode=ParseMode.HTML,
-                    disable_web_page_preview=False,
-                    link_preview_options=link_preview_options(url=preview_url),
-                ),
-                reply_markup=reply_markup,
-            )
-        )
-
-    for idx, icon in enumerate(icons):
-        slug = icon.get("slug")
-        if not slug:
-            continue
-
-        locale = icon.get(lang) or icon.get("ru") or {}
-        name = locale.get("name") or slug
-        preview = build_inline_preview(icon, lang, "icon")
-        description = ""
-        link = icon.get("channel_message", {}).get("link")
-        reply_markup = None
-        if link:
-            reply_markup = InlineKeyboardMarkup(
-                inline_keyboard=[[InlineKeyboardButton(text=t("catalog_inline_download", lang), url=link, style="success")]]
-            )
-
-        results.append(
-            InlineQueryResultArticle(
-                id=f"icon:{encode_slug(slug)}:{idx}",
-                title=name,
-                description=description[:100],
-                input_message_content=InputTextMessageContent(
-                    message_text=preview,
-                    parse_mode=ParseMode.HTML,
-                    disable_web_page_preview=True,
-                ),
-                reply_markup=reply_markup,
-            )
-        )
-
     cache_time = 0 if request_result_added else 60
     try:
-        await query.answer(results, cache_time=cache_time, is_personal=True)
+        await query.answer(results, cache_time=cache_time, is_personal=True, next_offset=next_offset)
     except TelegramBadRequest:
         article_results = [item for item in results if isinstance(item, InlineQueryResultArticle)]
         if len(article_results) == len(results):
@@ -1680,4 +1781,4 @@ async def on_inline(query: InlineQuery) -> None:
             "Inline cached media rejected; retrying with article results only",
             exc_info=True,
         )
-        await query.answer(article_results, cache_time=0, is_personal=True)
+        await query.answer(article_results, cache_time=0, is_personal=True, next_offset=next_offset)
@@ -33,7 +33,7 @@ from bot.services.admin_notifications import (
 )
 from bot.states import UserFlow
 from bot.texts import t
-from request_store import get_request_by_callback_token, get_request_by_id
+from request_store import get_request_by_callback_token_async, get_request_by_id
 
 router = Router(name="moderation-flow")
 logger = logging.getLogger(__name__)
@@ -261,7 +261,7 @@ async def on_moderation_vote(cb: CallbackQuery, state: FSMContext) -> None:
     if not user:
         await cb.answer()
         return
-    entry = get_request_by_callback_token(request_token)
+    entry = await get_request_by_callback_token_async(request_token)
     if not entry:
         await cb.answer(t("not_found", "ru"), show_alert=True)
         return
@@ -332,7 +332,7 @@ async def on_vote_reason_action(cb: CallbackQuery, state: FSMContext) -> None:
     else:
         tpl_idx_raw, request_token = "", ":".join(parts[3:])
 
-    entry = get_request_by_callback_token(request_token)
+    entry = await get_request_by_callback_token_async(request_token)
     request_id = str(entry.get("id") or "") if entry else ""
     if not request_id:
         await _leave_vote_reason_state(state)
@@ -3,7 +3,6 @@ import re
 import html
 import logging
 from datetime import datetime, timedelta, timezone
-from pathlib import Path
 from typing import Any, Dict
 from urllib.parse import unquote
 
@@ -70,19 +69,20 @@ from subscription_store import is_subscribed, ALL_SUBSCRIPTION_KEY
 from bot.keyboards import catalog_main_kb, profile_kb, admin_menu_kb
 from bot.states import AdminFlow
 from catalog import find_user_icons
+from blob_store import release_upload
 from request_store import (
     add_draft_request,
     add_request,
     delete_request_and_file,
     discard_user_drafts,
     get_user_requests,
-    get_request_by_deeplink_token,
+    get_request_by_deeplink_token_async,
     get_request_by_id,
     promote_draft_request,
     update_request_payload,
     update_request_status,
 )
-from user_store import get_user_language, is_user_banned, set_user_language
+from user_store import clear_bot_blocked, get_user_language, is_user_banned, set_user_language
 from user_store import set_broadcast_enabled, set_paid_broadcast_disable
 
 router = Router(name="user-flow")
@@ -331,7 +331,7 @@ async def _route_start_payload_message(message: Message, state: FSMContext, lang
         # unquote keeps already-sent links from the old percent-encoded format
         # working after switching new links to Bot API-safe tokens.
         request_token = unquote(raw_value.split("_", 2)[2])
-        entry = get_request_by_deeplink_token(request_token)
+        entry = await get_request_by_deeplink_token_async(request_token)
         request_payload = entry.get("payload", {}) if isinstance(entry, dict) else {}
         inline_public = bool(request_payload.get("moderation_inline_public")) if isinstance(request_payload, dict) else False
         user = message.from_user
@@ -579,6 +579,8 @@ async def cmd_start(message: Message, state: FSMContext) -> None:
             discard_user_drafts(user_id)
         except Exception:
             logger.exception("event=cmd_start.discard_drafts_failed user_id=%s", user_id)
+        # Writing /start means the user unblocked the bot; broadcasts reach them again.
+        clear_bot_blocked(user_id)
 
     payload = ""
     if message.text:
@@ -1629,7 +1631,7 @@ async def on_pending_update_file(message: Message, state: FSMContext) -> None:
 
     old_path = (existing.get("file_path") or "").strip()
     if old_path and old_path != new_plugin.get("file_path"):
-        Path(old_path).unlink(missing_ok=True)
+        release_upload(existing)
 
     merged = {
         **new_plugin,
@@ -2214,7 +2216,7 @@ async def on_pending_file(message: Message, state: FSMContext) -> None:
 
     old_path = (existing.get("file_path") or "").strip()
     if old_path and old_path != new_plugin.get("file_path"):
-        Path(old_path).unlink(missing_ok=True)
+        release_upload(existing)
 
     merged = {
         **new_plugin,
@@ -2624,7 +2626,7 @@ async def _finalize_submission(
 
                     if new_path and old_path and old_path != new_path:
                         try:
-                            Path(old_path).unlink(missing_ok=True)
+                            release_upload(old_plugin)
                         except Exception:
                             pass
 
@@ -15,7 +15,6 @@ from bot.cache import (
     get_admins_plugins,
     get_admins_super,
     get_config,
-    invalidate,
 )
 from bot.context import get_lang
 from bot.helpers import blank_and_delete, link_preview_options
@@ -109,7 +108,6 @@ def set_admin_notification_preference(user_id: int, event: str, enabled: bool) -
         all_prefs[str(user_id)] = user_prefs
     user_prefs[event] = bool(enabled)
     save_config(cfg)
-    invalidate("config")
     return admin_notification_preferences(user_id)
 
 
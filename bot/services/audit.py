@@ -1,11 +1,75 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 from datetime import datetime, timezone
 from typing import Any
 
-from storage import load_audit, save_audit
+from storage import append_audit_events, append_audit_events_async, count_audit_events, query_audit_events
 
-MAX_AUDIT_EVENTS = 1000
+logger = logging.getLogger(__name__)
+
+_FLUSH_DELAY = 1.0
+_MAX_BATCH = 200
+
+AUDIT_KIND_ALL = "all"
+AUDIT_KINDS: dict[str, list[str]] = {
+    AUDIT_KIND_ALL: [],
+    "votes": ["moderation.vote"],
+    "decisions": [
+        "moderation.publish_success",
+        "moderation.scheduled_publish_success",
+        "moderation.reject",
+        "moderation.rework",
+        "moderation.request_deleted",
+    ],
+    "appeals": ["moderation.appeal_"],
+    "bans": ["moderation.ban", "moderation.author_banned", "moderation.plugin_"],
+}
+
+_pending: list[dict[str, Any]] = []
+_flush_task: asyncio.Task | None = None
+
+
+def _on_flush_done(task: asyncio.Task) -> None:
+    global _flush_task
+    if _flush_task is task:
+        _flush_task = None
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc is not None:
+        logger.error(
+            "Background audit flush failed",
+            exc_info=(type(exc), exc, exc.__traceback__),
+        )
+
+
+def _take_batch() -> list[dict[str, Any]]:
+    batch = _pending[:]
+    _pending.clear()
+    return batch
+
+
+def _flush_pending_sync() -> None:
+    batch = _take_batch()
+    try:
+        append_audit_events(batch)
+    except Exception:
+        _pending[:0] = batch
+        raise
+
+
+async def _flush_later() -> None:
+    if len(_pending) < _MAX_BATCH:
+        await asyncio.sleep(_FLUSH_DELAY)
+    while _pending:
+        batch = _take_batch()
+        try:
+            await append_audit_events_async(batch)
+        except Exception:
+            _pending[:0] = batch
+            raise
 
 
 def add_audit_event(
@@ -16,11 +80,8 @@ def add_audit_event(
     request_id: str | None = None,
     details: dict[str, Any] | None = None,
 ) -> None:
-    db = load_audit()
-    events = db.get("events")
-    if not isinstance(events, list):
-        events = []
-    events.append(
+    global _flush_task
+    _pending.append(
         {
             "event": event,
             "actor_id": actor_id,
@@ -30,24 +91,70 @@ def add_audit_event(
             "created_at": datetime.now(timezone.utc).isoformat(),
         }
     )
-    db["events"] = events[-MAX_AUDIT_EVENTS:]
-    save_audit(db)
-
-
-def recent_audit_events(limit: int = 20) -> list[dict[str, Any]]:
-    db = load_audit()
-    events = db.get("events")
-    if not isinstance(events, list):
-        return []
-    return [event for event in events[-max(1, int(limit)):][::-1] if isinstance(event, dict)]
-
-
-def audit_events_page(page: int = 0, per_page: int = 10) -> tuple[list[dict[str, Any]], int]:
-    db = load_audit()
-    events = db.get("events")
-    if not isinstance(events, list):
-        return [], 0
-    events = [e for e in events if isinstance(e, dict)][::-1]
-    total = len(events)
-    start = max(0, int(page)) * per_page
-    return events[start:start + per_page], total
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        _flush_pending_sync()
+        return
+    if _flush_task is None or _flush_task.done():
+        _flush_task = loop.create_task(_flush_later())
+        _flush_task.add_done_callback(_on_flush_done)
+
+
+async def flush_audit_events() -> None:
+    task = _flush_task
+    if task is not None and not task.done():
+        await asyncio.gather(task, return_exceptions=True)
+    if _pending:
+        batch = _take_batch()
+        await append_audit_events_async(batch)
+
+
+async def _read_query(**filters: Any) -> dict[str, Any]:
+    # Readers must see events that are still waiting for the batch insert.
+    # The writer queue is FIFO, so an in-flight batch lands before this one.
+    if _pending:
+        batch = _take_batch()
+        try:
+            await append_audit_events_async(batch)
+        except Exception:
+            _pending[:0] = batch
+            raise
+    kind = filters.pop("kind", None) or AUDIT_KIND_ALL
+    filters["event_prefixes"] = AUDIT_KINDS.get(kind) or None
+    return filters
+
+
+async def recent_audit_events(limit: int = 20, *, kind: str = AUDIT_KIND_ALL) -> list[dict[str, Any]]:
+    filters = await _read_query(kind=kind)
+    return await asyncio.to_thread(query_audit_events, max(1, int(limit)), **filters)
+
+
+async def audit_events_count(*, kind: str = AUDIT_KIND_ALL) -> int:
+    filters = await _read_query(kind=kind)
+    return await asyncio.to_thread(count_audit_events, **filters)
+
+
+async def audit_events_page(
+    page: int = 0,
+    per_page: int = 10,
+    *,
+    kind: str = AUDIT_KIND_ALL,
+    before_id: int | None = None,
+) -> tuple[list[dict[str, Any]], int]:
+    """Return one page of events and the total for ``kind``.
+
+    Pass the id of the last event on the previous page as ``before_id`` to
+    use a keyset seek; without it the page is located by offset.
+    """
+    filters = await _read_query(kind=kind)
+
+    def read() -> tuple[list[dict[str, Any]], int]:
+        total = count_audit_events(**filters)
+        if before_id is not None:
+            events = query_audit_events(per_page, before_id=before_id, **filters)
+        else:
+            events = query_audit_events(per_page, offset=max(0, int(page)) * per_page, **filters)
+        return events, total
+
+    return await asyncio.to_thread(read)
@@ -9,8 +9,9 @@ from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any, Dict, Optional
 
-from storage import SQLITE_PATH, load_config, save_config
-from bot.cache import get_admins_super, get_config, invalidate
+from blob_store import blob_digest_of
+from storage import SQLITE_PATH, backed_up_blob_digests, load_config, mark_blobs_backed_up_async, save_config
+from bot.cache import get_admins_super, get_config
 
 logger = logging.getLogger(__name__)
 
@@ -44,7 +45,6 @@ def set_backup_config(**fields: Any) -> Dict[str, Any]:
         cfg["backup"] = backup
     backup.update(fields)
     save_config(cfg)
-    invalidate("config")
     return get_backup_config()
 
 
@@ -85,7 +85,13 @@ def _snapshot_sqlite(src: Path, dst: Path) -> bool:
             return False
 
 
-def create_backup_zip() -> Path:
+def create_backup_zip(skip_backed_up_blobs: bool = False) -> tuple[Path, set[str]]:
+    """Build the archive; return it with the digests of the blobs it holds.
+
+    Blobs never change once stored, so with ``skip_backed_up_blobs`` the ones
+    already sent in an earlier backup are left out. The database snapshot
+    still lists every blob, so a restore knows what to collect.
+    """
     ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
     tmp_dir = Path(tempfile.mkdtemp(prefix="dbbackup_"))
     snapshot = tmp_dir / f"storage_{ts}.sqlite3"
@@ -103,6 +109,7 @@ def create_backup_zip() -> Path:
             session_snap = None
 
     zip_path = tmp_dir / f"storage_backup_{ts}.zip"
+    blobs: set[str] = set()
     with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9) as zf:
         zf.write(snapshot, arcname="storage.sqlite3")
         if session_snap and session_snap.exists():
@@ -111,16 +118,30 @@ def create_backup_zip() -> Path:
             from bot.helpers import get_uploads_dir
             uploads_dir = get_uploads_dir()
             if uploads_dir.exists():
+                skip = backed_up_blob_digests() if skip_backed_up_blobs else set()
                 for f in sorted(uploads_dir.rglob("*")):
-                    if f.is_file():
-                        zf.write(f, arcname=str(Path("uploads") / f.relative_to(uploads_dir)))
+                    if not f.is_file():
+                        continue
+                    digest = blob_digest_of(f, uploads_dir)
+                    if digest in skip:
+                        continue
+                    zf.write(f, arcname=str(Path("uploads") / f.relative_to(uploads_dir)))
+                    if digest:
+                        blobs.add(digest)
         except Exception:
             logger.exception("backup: failed to add uploads")
 
     snapshot.unlink(missing_ok=True)
     if session_snap:
         session_snap.unlink(missing_ok=True)
-    return zip_path
+    return zip_path, blobs
+
+
+async def _mark_blobs_sent(blobs: set[str]) -> None:
+    try:
+        await mark_blobs_backed_up_async(blobs)
+    except Exception:
+        logger.exception("event=backup.mark_blobs_failed")
 
 
 def _cleanup(zip_path: Path) -> None:
@@ -135,13 +156,14 @@ async def send_backup(bot, chat_id: int) -> bool:
     from aiogram.types import FSInputFile
 
     try:
-        zip_path = await asyncio.to_thread(create_backup_zip)
+        zip_path, blobs = await asyncio.to_thread(create_backup_zip)
     except Exception:
         logger.exception("event=backup.create_failed")
         return False
     try:
         caption = datetime.now(timezone.utc).strftime("Backup %Y-%m-%d %H:%M UTC")
         await bot.send_document(chat_id, FSInputFile(str(zip_path)), caption=caption)
+        await _mark_blobs_sent(blobs)
         return True
     except Exception:
         logger.exception("event=backup.send_failed chat_id=%s", chat_id)
@@ -150,11 +172,11 @@ async def send_backup(bot, chat_id: int) -> bool:
         _cleanup(zip_path)
 
 
-async def send_backup_to_admins(bot) -> int:
+async def send_backup_to_admins(bot, *, skip_backed_up_blobs: bool = False) -> int:
     sent = 0
     zip_path: Optional[Path] = None
     try:
-        zip_path = await asyncio.to_thread(create_backup_zip)
+        zip_path, blobs = await asyncio.to_thread(create_backup_zip, skip_backed_up_blobs)
     except Exception:
         logger.exception("event=backup.create_failed")
         return 0
@@ -168,6 +190,8 @@ async def send_backup_to_admins(bot) -> int:
         except Exception:
             logger.exception("event=backup.send_failed admin=%s", admin_id)
     _cleanup(zip_path)
+    if sent:
+        await _mark_blobs_sent(blobs)
     return sent
 
 
@@ -195,7 +219,7 @@ async def _worker_loop(bot) -> None:
                 continue
             if not _due(cfg["last_run"], cfg["interval_hours"]):
                 continue
-            sent = await send_backup_to_admins(bot)
+            sent = await send_backup_to_admins(bot, skip_backed_up_blobs=True)
             set_backup_config(last_run=datetime.now(timezone.utc).isoformat())
             logger.info("event=backup.auto_sent sent=%s", sent)
         except Exception:
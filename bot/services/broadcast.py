@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from aiogram.enums import ParseMode
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+
+from bot import limits
+from bot.services.admin_notifications import is_unreachable_chat
+from storage import create_broadcast_job_async, load_running_broadcast_jobs, save_broadcast_progress_async
+from user_store import broadcast_recipient_ids, mark_bot_blocked
+
+logger = logging.getLogger(__name__)
+
+# Stay a little under Telegram's global limit so replies to other users
+# still get through while a broadcast runs.
+_RATE_PER_SECOND = limits.MESSAGES_PER_SECOND - 5
+_BURST = 5
+_RETRY_ATTEMPTS = 3
+_CHECKPOINT_EVERY = 50
+_PROGRESS_INTERVAL_SECONDS = 5.0
+
+_job_task: Optional[asyncio.Task] = None
+_stop_requested = False
+
+
+class _TokenBucket:
+    """Hands out send slots at ``rate`` per second with bursts of ``burst``."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated", "paused_until")
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def pause(self, seconds: float) -> None:
+        # A RetryAfter is a global flood limit: nothing goes out until it ends.
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+    async def take(self) -> None:
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            self.tokens = min(float(self.burst), self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return
+            await asyncio.sleep((1.0 - self.tokens) / self.rate)
+
+
+async def _send_one(bot, bucket: _TokenBucket, user_id: int, text: str) -> str:
+    for _ in range(_RETRY_ATTEMPTS):
+        await bucket.take()
+        try:
+            await bot.send_message(
+                user_id,
+                text,
+                parse_mode=ParseMode.HTML,
+                disable_web_page_preview=True,
+            )
+            return "sent"
+        except TelegramRetryAfter as exc:
+            logger.warning("event=broadcast.retry_after user_id=%s seconds=%s", user_id, exc.retry_after)
+            bucket.pause(float(exc.retry_after or 1))
+        except Exception as exc:
+            if is_unreachable_chat(exc):
+                mark_bot_blocked(user_id)
+                return "blocked"
+            logger.warning("event=broadcast.send_failed user_id=%s error=%s", user_id, str(exc)[:200])
+            return "failed"
+    return "failed"
+
+
+def _progress_text(job: Dict[str, Any], *, finished: bool = False) -> str:
+    from bot.texts import t
+
+    lang = job.get("lang") or "ru"
+    counts = {"sent": job["sent"], "failed": job["failed"], "blocked": job["blocked"]}
+    if finished:
+        key = "admin_broadcast_stopped" if job["status"] == "stopped" else "admin_broadcast_done"
+        return t(key, lang, **counts)
+    done = job["sent"] + job["failed"] + job["blocked"]
+    return t("admin_broadcast_progress", lang, done=done, total=job["total"], **counts)
+
+
+async def _show_progress(bot, job: Dict[str, Any], *, finished: bool = False) -> None:
+    from bot.keyboards import admin_broadcast_progress_kb, admin_menu_kb
+
+    if not job.get("chat_id") or not job.get("message_id"):
+        return
+    lang = job.get("lang") or "ru"
+    markup = admin_menu_kb("super", lang=lang) if finished else admin_broadcast_progress_kb(lang=lang)
+    try:
+        await bot.edit_message_text(
+            _progress_text(job, finished=finished),
+            chat_id=job["chat_id"],
+            message_id=job["message_id"],
+            parse_mode=ParseMode.HTML,
+            reply_markup=markup,
+            disable_web_page_preview=True,
+        )
+    except TelegramRetryAfter:
+        pass
+    except TelegramBadRequest as exc:
+        if "message is not modified" not in str(exc).lower():
+            logger.warning("event=broadcast.progress_edit_failed job_id=%s error=%s", job["job_id"], exc)
+    except Exception:
+        logger.warning("event=broadcast.progress_edit_failed job_id=%s", job["job_id"], exc_info=True)
+
+
+async def _checkpoint(job: Dict[str, Any]) -> None:
+    await save_broadcast_progress_async(
+        job["job_id"],
+        status=job["status"],
+        cursor=job["cursor"],
+        sent=job["sent"],
+        failed=job["failed"],
+        blocked=job["blocked"],
+    )
+
+
+async def _run_job(bot, job: Dict[str, Any], recipients: Optional[List[int]] = None) -> None:
+    global _stop_requested
+
+    bucket = _TokenBucket(_RATE_PER_SECOND, _BURST)
+    # Users are walked in id order, so the cursor alone says where to resume.
+    if recipients is None:
+        recipients = broadcast_recipient_ids(after=int(job["cursor"]))
+    logger.info("event=broadcast.run job_id=%s cursor=%s remaining=%s", job["job_id"], job["cursor"], len(recipients))
+    last_progress = time.monotonic()
+    try:
+        for index, user_id in enumerate(recipients, 1):
+            if _stop_requested:
+                job["status"] = "stopped"
+                break
+            result = await _send_one(bot, bucket, user_id, job["text"])
+            job[result] += 1
+            job["cursor"] = user_id
+            if index % _CHECKPOINT_EVERY == 0:
+                await _checkpoint(job)
+            if time.monotonic() - last_progress >= _PROGRESS_INTERVAL_SECONDS:
+                last_progress = time.monotonic()
+                await _show_progress(bot, job)
+        else:
+            job["status"] = "done"
+    except asyncio.CancelledError:
+        # Shutdown: keep the job running so the next start resumes it.
+        await asyncio.shield(_checkpoint(job))
+        raise
+    finally:
+        _stop_requested = False
+    await _checkpoint(job)
+    await _show_progress(bot, job, finished=True)
+    logger.info(
+        "event=broadcast.%s job_id=%s sent=%s failed=%s blocked=%s",
+        job["status"],
+        job["job_id"],
+        job["sent"],
+        job["failed"],
+        job["blocked"],
+    )
+
+
+def _on_job_done(task: asyncio.Task) -> None:
+    global _job_task
+    if _job_task is task:
+        _job_task = None
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc is not None:
+        logger.error("Broadcast job failed", exc_info=(type(exc), exc, exc.__traceback__))
+
+
+def _launch(bot, job: Dict[str, Any], recipients: Optional[List[int]] = None) -> None:
+    global _job_task
+    _job_task = asyncio.get_running_loop().create_task(_run_job(bot, job, recipients))
+    _job_task.add_done_callback(_on_job_done)
+
+
+def is_broadcast_running() -> bool:
+    return _job_task is not None and not _job_task.done()
+
+
+async def start_broadcast(
+    bot,
+    text: str,
+    *,
+    lang: str,
+    created_by: int,
+    chat_id: int,
+    message_id: Optional[int],
+) -> Optional[Dict[str, Any]]:
+    """Persist a new job and start sending it; ``None`` if one is already running."""
+    if is_broadcast_running():
+        return None
+    recipients = broadcast_recipient_ids()
+    total = len(recipients)
+    job_id = await create_broadcast_job_async(
+        text,
+        lang=lang,
+        created_by=created_by,
+        chat_id=chat_id,
+        message_id=message_id,
+        total=total,
+    )
+    job: Dict[str, Any] = {
+        "job_id": job_id,
+        "status": "running",
+        "text": text,
+        "lang": lang,
+        "chat_id": chat_id,
+        "message_id": message_id,
+        "cursor": 0,
+        "total": total,
+        "sent": 0,
+        "failed": 0,
+        "blocked": 0,
+    }
+    # A new job starts from cursor 0, so the list just counted is its queue.
+    _launch(bot, job, recipients)
+    return job
+
+
+def stop_broadcast() -> bool:
+    global _stop_requested
+    if not is_broadcast_running():
+        return False
+    _stop_requested = True
+    return True
+
+
+async def start_broadcast_worker(bot) -> None:
+    """Resume a job that was still running when the bot stopped."""
+    if is_broadcast_running():
+        return
+    jobs = load_running_broadcast_jobs()
+    if not jobs:
+        return
+    # Only one job sends at a time; older leftovers are superseded.
+    for stale in jobs[:-1]:
+        stale["status"] = "stopped"
+        await _checkpoint(stale)
+    _launch(bot, jobs[-1])
+
+
+async def stop_broadcast_worker() -> None:
+    global _job_task
+    task = _job_task
+    _job_task = None
+    if task and not task.done():
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
@@ -11,11 +11,21 @@ from aiogram.types import FSInputFile
 
 from bot.formatting import join_plain, plain_html, strip_blockquote_tags, telegram_html
 from bot.helpers import blank_and_delete, fit_filename
-from storage import flush_all, load_icons, load_plugins, load_updated, save_icons, save_plugins, save_updated
-from request_store import update_request_status
-from bot.cache import get_categories, invalidate, get_config
+from storage import flush_all, load_icons, load_plugins, load_updated, save_updated
+from request_store import release_request_files, update_request_status
+from bot.cache import get_categories, get_config
 from bot import limits
-from catalog import invalidate_catalog_cache, plugin_deeplink_token
+from catalog import (
+    find_icon_by_slug,
+    find_plugin_by_slug,
+    plugin_deeplink_token,
+    remove_icon,
+    remove_plugin,
+    save_icon,
+    save_plugin,
+    upsert_icon,
+    upsert_plugin,
+)
 
 _CAPTION_LIMIT = limits.CAPTION
 
@@ -79,16 +89,6 @@ async def _send_channel_post(
 logger = logging.getLogger(__name__)
 
 
-def _invalidate_all_plugins() -> None:
-    invalidate("plugins")
-    invalidate_catalog_cache()
-
-
-def _invalidate_all_icons() -> None:
-    invalidate("icons")
-    invalidate_catalog_cache()
-
-
 def build_channel_post(entry: Dict[str, Any], checked_on: Optional[str] = None) -> str:
     payload = entry.get("payload", {})
     plugin = payload.get("plugin", {})
@@ -246,8 +246,7 @@ async def publish_plugin(entry: Dict[str, Any], bot: Bot) -> Dict[str, Any]:
 
     await flush_all()
 
-    if file_path:
-        Path(file_path).unlink(missing_ok=True)
+    release_request_files(entry.get("id"))
 
     link = f"https://t.me/{channel_username}/{message.message_id}" if channel_username else ""
     return {"message_id": message.message_id, "chat_id": channel_id, "link": link}
@@ -290,8 +289,7 @@ async def publish_icon(entry: Dict[str, Any]) -> Dict[str, Any]:
 
     await flush_all()
 
-    if file_path:
-        Path(file_path).unlink(missing_ok=True)
+    release_request_files(entry.get("id"))
 
     return result
 
@@ -362,8 +360,7 @@ async def update_plugin(entry: Dict[str, Any], old_catalog_entry: Dict[str, Any]
     if link:
         add_updated_plugin(name, link)
     
-    if file_path:
-        Path(file_path).unlink(missing_ok=True)
+    release_request_files(entry.get("id"))
     
     return result
 
@@ -424,21 +421,12 @@ def add_to_catalog(
         "published_at": datetime.utcnow().isoformat(),
     }
     
-    db = load_plugins()
-    plugins = db.setdefault("plugins", [])
-    
-    idx = next((i for i, p in enumerate(plugins) if p.get("slug") == slug), None)
-    if idx is not None:
-        old_submitters = plugins[idx].get("submitters", [])
-        for sub in old_submitters:
+    existing = find_plugin_by_slug(slug)
+    if existing is not None:
+        for sub in existing.get("submitters", []):
             if sub not in catalog_entry["submitters"]:
                 catalog_entry["submitters"].append(sub)
-        plugins[idx] = catalog_entry
-    else:
-        plugins.append(catalog_entry)
-    
-    save_plugins(db)
-    _invalidate_all_plugins()
+    upsert_plugin(catalog_entry)
 
 
 def add_updated_plugin(name: str, link: str) -> None:
@@ -585,21 +573,12 @@ def add_icon_to_catalog(
         },
     }
 
-    db = load_icons()
-    icons = db.setdefault("iconpacks", [])
-
-    idx = next((i for i, p in enumerate(icons) if p.get("slug") == slug), None)
-    if idx is not None:
-        old_submitters = icons[idx].get("submitters", [])
-        for sub in old_submitters:
+    existing = find_icon_by_slug(slug)
+    if existing is not None:
+        for sub in existing.get("submitters", []):
             if sub not in catalog_entry["submitters"]:
                 catalog_entry["submitters"].append(sub)
-        icons[idx] = catalog_entry
-    else:
-        icons.append(catalog_entry)
-
-    save_icons(db)
-    _invalidate_all_icons()
+    upsert_icon(catalog_entry)
 
 
 def add_submitter_to_iconpack(slug: str, user_id: int, username: str = "") -> bool:
@@ -626,8 +605,7 @@ def add_submitter_to_iconpack(slug: str, user_id: int, username: str = "") -> bo
         item = {"user_id": int(user_id), "username": username or ""}
         if item not in submitters:
             submitters.append(item)
-            save_icons(db)
-            _invalidate_all_icons()
+            save_icon(pack)
         return True
 
     return False
@@ -637,112 +615,87 @@ def update_catalog_entry(slug: str, entry: Dict[str, Any], message_id: int) -> N
     payload = entry.get("payload", {})
     plugin = payload.get("plugin", {})
     
-    db = load_plugins()
-    plugins = db.get("plugins", [])
-    
-    for p in plugins:
-        if p.get("slug") == slug:
-            ru_locale = p.setdefault("ru", {})
-            en_locale = p.setdefault("en", {})
-            requirements = p.setdefault("requirements", {})
-            settings = p.setdefault("settings", {})
-            authors = p.setdefault("authors", {})
-
-            if payload.get("category_key"):
-                p["category"] = payload.get("category_key")
-
-            ru_locale["name"] = plugin.get("name") or ru_locale.get("name")
-            en_locale["name"] = plugin.get("name") or en_locale.get("name")
-
-            author_text = plugin.get("author")
-            if author_text:
-                authors["ru"] = author_text
-                authors["en"] = author_text
-                authors["handles"] = list(set(re.findall(r"@[\w]+", author_text)))
-
-            ru_locale["description"] = (
-                payload.get("description_ru")
-                or plugin.get("description")
-                or ru_locale.get("description")
-            )
-            en_locale["description"] = (
-                payload.get("description_en")
-                or plugin.get("description")
-                or en_locale.get("description")
-            )
+    p = find_plugin_by_slug(slug)
+    if p is None:
+        return
 
-            ru_locale["usage"] = payload.get("usage_ru") or ru_locale.get("usage")
-            en_locale["usage"] = payload.get("usage_en") or en_locale.get("usage")
-
-            ru_locale["version"] = plugin.get("version") or ru_locale.get("version")
-            en_locale["version"] = plugin.get("version") or en_locale.get("version")
-
-            ru_locale["min_version"] = plugin.get("min_version") or ru_locale.get("min_version")
-            en_locale["min_version"] = plugin.get("min_version") or en_locale.get("min_version")
-
-            settings["has_ui"] = plugin.get("has_ui_settings", settings.get("has_ui"))
-            ru_locale["settings_label"] = "✅" if settings["has_ui"] else "❌"
-            en_locale["settings_label"] = "✅" if settings["has_ui"] else "❌"
-
-            requirements["min_version"] = plugin.get("min_version") or requirements.get("min_version")
-            p["updated_at"] = datetime.utcnow().isoformat()
-            
-            changelog = payload.get("changelog", "")
-            if changelog:
-                updates = p.setdefault("updates", [])
-                updates.append({
-                    "version": plugin.get("version"),
-                    "changelog": changelog,
-                    "date": datetime.utcnow().isoformat(),
-                })
-            break
-    
-    save_plugins(db)
-    _invalidate_all_plugins()
+    ru_locale = p.setdefault("ru", {})
+    en_locale = p.setdefault("en", {})
+    requirements = p.setdefault("requirements", {})
+    settings = p.setdefault("settings", {})
+    authors = p.setdefault("authors", {})
 
+    if payload.get("category_key"):
+        p["category"] = payload.get("category_key")
 
-def add_submitter_to_plugin(slug: str, user_id: int, username: str = "") -> bool:
-    db = load_plugins()
-    plugins = db.get("plugins", [])
-    
-    for p in plugins:
-        if p.get("slug") == slug:
-            submitters = p.setdefault("submitters", [])
-            
-            for sub in submitters:
-                if sub.get("user_id") == user_id:
-                    return False
-
-            submitters.append({"user_id": user_id, "username": username})
-            save_plugins(db)
-            _invalidate_all_plugins()
-            return True
+    ru_locale["name"] = plugin.get("name") or ru_locale.get("name")
+    en_locale["name"] = plugin.get("name") or en_locale.get("name")
+
+    author_text = plugin.get("author")
+    if author_text:
+        authors["ru"] = author_text
+        authors["en"] = author_text
+        authors["handles"] = list(set(re.findall(r"@[\w]+", author_text)))
+
+    ru_locale["description"] = (
+        payload.get("description_ru")
+        or plugin.get("description")
+        or ru_locale.get("description")
+    )
+    en_locale["description"] = (
+        payload.get("description_en")
+        or plugin.get("description")
+        or en_locale.get("description")
+    )
+
+    ru_locale["usage"] = payload.get("usage_ru") or ru_locale.get("usage")
+    en_locale["usage"] = payload.get("usage_en") or en_locale.get("usage")
+
+    ru_locale["version"] = plugin.get("version") or ru_locale.get("version")
+    en_locale["version"] = plugin.get("version") or en_locale.get("version")
+
+    ru_locale["min_version"] = plugin.get("min_version") or ru_locale.get("min_version")
+    en_locale["min_version"] = plugin.get("min_version") or en_locale.get("min_version")
+
+    settings["has_ui"] = plugin.get("has_ui_settings", settings.get("has_ui"))
+    ru_locale["settings_label"] = "✅" if settings["has_ui"] else "❌"
+    en_locale["settings_label"] = "✅" if settings["has_ui"] else "❌"
+
+    requirements["min_version"] = plugin.get("min_version") or requirements.get("min_version")
+    p["updated_at"] = datetime.utcnow().isoformat()
     
-    return False
+    changelog = payload.get("changelog", "")
+    if changelog:
+        updates = p.setdefault("updates", [])
+        updates.append({
+            "version": plugin.get("version"),
+            "changelog": changelog,
+            "date": datetime.utcnow().isoformat(),
+        })
+    save_plugin(p)
 
 
-def remove_plugin_entry(slug: str) -> bool:
-    db = load_plugins()
-    plugins = db.get("plugins", [])
-    idx = next((i for i, p in enumerate(plugins) if p.get("slug") == slug), None)
-    if idx is None:
+def add_submitter_to_plugin(slug: str, user_id: int, username: str = "") -> bool:
+    p = find_plugin_by_slug(slug)
+    if p is None:
         return False
-    plugins.pop(idx)
-    save_plugins(db)
-    _invalidate_all_plugins()
+
+    submitters = p.setdefault("submitters", [])
+    for sub in submitters:
+        if sub.get("user_id") == user_id:
+            return False
+
+    submitters.append({"user_id": user_id, "username": username})
+    save_plugin(p)
     return True
 
 
+def remove_plugin_entry(slug: str) -> bool:
+    return remove_plugin(slug) is not None
+
+
 def remove_icon_entry(slug: str) -> bool:
-    db = load_icons()
-    icons = db.get("iconpacks", [])
-    idx = next((i for i, p in enumerate(icons) if p.get("slug") == slug), None)
-    if idx is None:
-        return False
-    icons.pop(idx)
-    save_icons(db)
-    _invalidate_all_icons()
-    return True
+    return remove_icon(slug) is not None
 
 
 async def remove_user_content(user_id: int, username: str = "") -> dict:
@@ -3,9 +3,8 @@ from __future__ import annotations
 
 from typing import Any, Dict, List, Optional
 
-from storage import load_config, save_config, load_plugins, save_plugins
-from bot.cache import invalidate
-from catalog import invalidate_catalog_cache, plugin_source_filter_key
+from storage import load_config, save_config, load_plugins
+from catalog import plugin_source_filter_key, save_plugin
 
 
 def _norm_id(value: Any) -> str:
@@ -43,7 +42,6 @@ def add_custom_source(username: str, title: str = "", link: str = "") -> Optiona
     sources.append(entry)
     cfg["custom_sources"] = sources
     save_config(cfg)
-    invalidate("config")
     return entry
 
 
@@ -56,7 +54,6 @@ def delete_custom_source(source_id: str) -> bool:
         return False
     cfg["custom_sources"] = remaining
     save_config(cfg)
-    invalidate("config")
     return True
 
 
@@ -83,8 +80,6 @@ def attach_plugin_to_source(plugin_ref: str, source: Dict[str, Any]) -> Optional
     for plugin in plugins:
         if isinstance(plugin, dict) and _match_plugin(plugin, plugin_ref):
             plugin["source"] = dict(source)
-            save_plugins(db)
-            invalidate("plugins")
-            invalidate_catalog_cache()
+            save_plugin(plugin)
             return plugin.get("slug")
     return None
@@ -1,16 +1,12 @@
 from dataclasses import dataclass
 from typing import Any, Dict, Optional
-from uuid import uuid4
 
 from aiogram import Bot
 from aiogram.types import Document
 
+from blob_store import store_upload
 from plugin_parser import PluginParseError, parse_plugin_file
-from bot.helpers import download_document, get_uploads_subdir, sanitize_filename
-
-
-def _unique_upload_name(base_id: str, ext: str) -> str:
-    return f"{sanitize_filename(base_id)}-{uuid4().hex[:8]}.{ext}"
+from bot.helpers import download_document, fit_filename, get_uploads_subdir
 
 
 @dataclass
@@ -25,6 +21,7 @@ class PluginData:
     file_path: str
     file_id: Optional[str] = None
     storage: Optional[Dict[str, Any]] = None
+    blob: Optional[str] = None
     
     @property
     def settings_label(self) -> str:
@@ -42,6 +39,7 @@ class PluginData:
             "file_path": self.file_path,
             "file_id": self.file_id,
             "storage": self.storage,
+            "blob": self.blob,
         }
 
 
@@ -62,12 +60,7 @@ async def process_plugin_file(bot: Bot, document: Document) -> PluginData:
         temp_path.unlink(missing_ok=True)
         raise ValueError(f"parse_error:{e}") from e
     
-    final_name = _unique_upload_name(meta.id, "plugin")
-    final_path = uploads / final_name
-
-    if temp_path != final_path:
-        final_path.unlink(missing_ok=True)
-        temp_path.rename(final_path)
+    digest, final_path = await store_upload(temp_path, fit_filename(meta.id, "plugin"))
 
     return PluginData(
         id=meta.id,
@@ -79,6 +72,7 @@ async def process_plugin_file(bot: Bot, document: Document) -> PluginData:
         has_settings=meta.has_ui_settings,
         file_path=str(final_path),
         file_id=document.file_id,
+        blob=digest,
     )
 
 
@@ -155,7 +155,6 @@ def is_plugin_blocked(plugin_id: str) -> bool:
 
 def block_plugin(plugin_id: str) -> bool:
     from storage import load_config, save_config
-    from bot.cache import invalidate
 
     target = str(plugin_id or "").strip()
     if not target or is_plugin_blocked(target):
@@ -166,5 +165,4 @@ def block_plugin(plugin_id: str) -> bool:
     items.append(target)
     cfg["plugin_blocklist"] = items
     save_config(cfg)
-    invalidate("config")
     return True
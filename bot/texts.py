@@ -616,8 +616,20 @@ TEXTS: Dict[str, Dict[str, str]] = {
         "en": "<b>Updated plugins</b> (if you don't use @exteraPluginsRobot):",
     },
     "admin_broadcast_done": {
-        "ru": "Рассылка завершена. Отправлено: {sent}, ошибок: {failed}",
-        "en": "Broadcast finished. Sent: {sent}, failed: {failed}",
+        "ru": "Рассылка завершена. Отправлено: {sent}, ошибок: {failed}, заблокировали бота: {blocked}",
+        "en": "Broadcast finished. Sent: {sent}, failed: {failed}, blocked the bot: {blocked}",
+    },
+    "admin_broadcast_progress": {
+        "ru": "Рассылка идёт: {done}/{total}\nОтправлено: {sent}, ошибок: {failed}, заблокировали бота: {blocked}",
+        "en": "Broadcasting: {done}/{total}\nSent: {sent}, failed: {failed}, blocked the bot: {blocked}",
+    },
+    "admin_broadcast_stopped": {
+        "ru": "Рассылка остановлена. Отправлено: {sent}, ошибок: {failed}, заблокировали бота: {blocked}",
+        "en": "Broadcast stopped. Sent: {sent}, failed: {failed}, blocked the bot: {blocked}",
+    },
+    "admin_broadcast_busy": {
+        "ru": "Уже идёт другая рассылка",
+        "en": "Another broadcast is already running",
     },
     "admin_user_banned": {
         "ru": "Пользователь <code>{user_id}</code> заблокирован",
@@ -752,6 +764,7 @@ TEXTS: Dict[str, Dict[str, str]] = {
     "btn_back": {"ru": "Назад", "en": "Back"},
     "btn_forward": {"ru": "Вперёд", "en": "Forward"},
     "btn_cancel": {"ru": "Отмена", "en": "Cancel"},
+    "btn_broadcast_stop": {"ru": "Остановить рассылку", "en": "Stop broadcast"},
     "btn_catalog": {"ru": "Каталог", "en": "Catalog"},
     "btn_confirm": {"ru": "Подтвердить", "en": "Confirm"},
     "btn_delete": {"ru": "Удалить", "en": "Delete"},
@@ -1751,6 +1764,10 @@ TEXTS: Dict[str, Dict[str, str]] = {
         "en": "<b>📜 Action log</b>  (page {current}/{total}, total {count})\n\n{events}",
     },
     "admin_audit_log_empty": {"ru": "<b>📜 Журнал действий</b>\n\nПусто.", "en": "<b>📜 Action log</b>\n\nEmpty."},
+    "admin_audit_log_filter_votes": {"ru": "🗳 Голоса", "en": "🗳 Votes"},
+    "admin_audit_log_filter_decisions": {"ru": "⚖️ Решения", "en": "⚖️ Decisions"},
+    "admin_audit_log_filter_appeals": {"ru": "♻️ Апелляции", "en": "♻️ Appeals"},
+    "admin_audit_log_filter_bans": {"ru": "🚫 Баны", "en": "🚫 Bans"},
     "admin_blocklist_title": {
         "ru": "<b>🚫 Заблокированные плагины</b> ({count})\n\nПлагины, чья апелляция была отклонена. Нажмите, чтобы разблокировать.",
         "en": "<b>🚫 Blocked plugins</b> ({count})\n\nPlugins whose appeal was rejected. Tap to unblock.",
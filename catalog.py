@@ -1,20 +1,46 @@
+import asyncio
+import bisect
 import hashlib
+import itertools
+import logging
 import random
 import re
-from typing import Any, Dict, List, Optional
-
-from storage import load_icons, load_plugins
+import sqlite3
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from catalog_search import SearchIndex
+from storage import (
+    SLUG_TOKEN_FORMS,
+    StorageEvent,
+    catalog_fts_enabled,
+    document_version,
+    load_icons,
+    load_plugins,
+    load_slug_tokens,
+    save_icons,
+    save_plugins,
+    search_catalog_fts,
+    slug_token,
+    subscribe_storage_events,
+)
 
 CatalogEntry = Dict[str, Any]
+SearchHit = tuple[CatalogEntry, Optional[str]]
+
+logger = logging.getLogger(__name__)
 
 _ASCII_SLUG_RE = re.compile(r"^[A-Za-z0-9_-]{1,60}$")
+# Smallest number of FTS rows read per query round trip.
+_FTS_BATCH = 50
 
 
 def plugin_deeplink_token(slug: Optional[str]) -> str:
     s = (slug or "").strip()
     if _ASCII_SLUG_RE.match(s):
         return s
-    return "p" + hashlib.sha1(s.encode("utf-8")).hexdigest()[:16]
+    return slug_token(s, "p")
 
 
 def find_plugin_by_deeplink_token(token: Optional[str]) -> Optional[CatalogEntry]:
@@ -24,10 +50,10 @@ def find_plugin_by_deeplink_token(token: Optional[str]) -> Optional[CatalogEntry
     direct = find_plugin_by_slug(token)
     if direct:
         return direct
-    for plugin in _get_published_plugins():
-        if plugin_deeplink_token(plugin.get("slug")) == token:
-            return plugin
-    return None
+    plugin = find_plugin_by_slug(resolve_slug_token(token))
+    if plugin is None or plugin.get("status") != "published":
+        return None
+    return plugin
 
 _plugins_cache: Optional[List[CatalogEntry]] = None
 _icons_cache: Optional[List[CatalogEntry]] = None
@@ -35,25 +61,323 @@ _published_plugins_cache: Optional[List[CatalogEntry]] = None
 _published_icons_cache: Optional[List[CatalogEntry]] = None
 _slug_index: Dict[str, CatalogEntry] = {}
 _icon_slug_index: Dict[str, CatalogEntry] = {}
+# Sort keys parallel to _published_plugins_cache, and the key each listed
+# entry was inserted with (by id), so an entry edited in place can still be
+# found by bisect.
+_published_plugin_keys: List["_NewestFirst"] = []
+_published_plugin_positions: Dict[int, tuple[tuple[str, str], CatalogEntry]] = {}
+# Position of each published icon in catalog order, by id.
+_published_icon_ids: Dict[int, int] = {}
+# Search indexes over the published lists; dropped together with them and
+# patched alongside them otherwise.
+_plugin_search: Optional[SearchIndex] = None
+_icon_search: Optional[SearchIndex] = None
+_icon_order = itertools.count()
+# Published plugins split by (category, source filter), each kept in the same
+# newest-first order as the full list, plus the partitions every listed
+# entry was filed under (by id) so an entry edited in place can be removed.
+_plugin_partitions: Optional[Dict[tuple[str, str], tuple[List["_NewestFirst"], List[CatalogEntry]]]] = None
+_plugin_partition_members: Dict[int, tuple[tuple[str, str], ...]] = {}
+# Published entries by submitter id and author handle, for profile lookups.
+_plugin_authors: Optional["_AuthorIndex"] = None
+_icon_authors: Optional["_AuthorIndex"] = None
+_HANDLE_RE = re.compile(r"@\w+")
+
+
+class _AuthorIndex:
+    """Entries by ``("user", user_id)`` and ``("handle", "@name")`` keys."""
+
+    __slots__ = ("_entries", "_keys")
+
+    def __init__(self) -> None:
+        self._entries: Dict[tuple[str, Any], Dict[int, CatalogEntry]] = {}
+        self._keys: Dict[int, tuple[tuple[str, Any], ...]] = {}
+
+    def add(self, entry: CatalogEntry, keys: tuple[tuple[str, Any], ...]) -> None:
+        self.remove(entry)
+        if not keys:
+            return
+        self._keys[id(entry)] = keys
+        for key in keys:
+            self._entries.setdefault(key, {})[id(entry)] = entry
+
+    def remove(self, entry: CatalogEntry) -> None:
+        for key in self._keys.pop(id(entry), ()):
+            bucket = self._entries.get(key)
+            if bucket is None:
+                continue
+            bucket.pop(id(entry), None)
+            if not bucket:
+                del self._entries[key]
+
+    def find(self, keys: List[tuple[str, Any]]) -> List[CatalogEntry]:
+        found: Dict[int, CatalogEntry] = {}
+        for key in keys:
+            found.update(self._entries.get(key, {}))
+        return list(found.values())
+
+
+class _NewestFirst:
+    """Orders ``_plugin_sort_key`` values descending for :mod:`bisect`."""
+
+    __slots__ = ("key",)
+
+    def __init__(self, key: tuple[str, str]) -> None:
+        self.key = key
+
+    def __lt__(self, other: "_NewestFirst") -> bool:
+        return self.key > other.key
 
 
 SOURCE_ALL = "all"
 SOURCE_OFFICIAL = "official"
 SOURCE_EXTERNAL = "external"
 OFFICIAL_SOURCE_USERNAME = "exteraPluginsSup"
+ALL_CATEGORIES = "_all"
 
 
 def invalidate_catalog_cache() -> None:
     global _plugins_cache, _icons_cache, _published_plugins_cache, _published_icons_cache
-    global _slug_index, _icon_slug_index
+    global _slug_index, _icon_slug_index, _plugin_search, _icon_search, _plugin_partitions
+    global _plugin_authors, _icon_authors
     _plugins_cache = None
     _icons_cache = None
     _published_plugins_cache = None
+    _plugin_partitions = None
+    _plugin_authors = None
+    _icon_authors = None
     _published_icons_cache = None
+    _plugin_search = None
+    _icon_search = None
     _slug_index.clear()
     _icon_slug_index.clear()
 
 
+def _list_published_plugin(plugin: CatalogEntry) -> None:
+    if _published_plugins_cache is None or id(plugin) in _published_plugin_positions:
+        return
+    sort_key = _plugin_sort_key(plugin)
+    wrapped = _NewestFirst(sort_key)
+    idx = bisect.bisect_right(_published_plugin_keys, wrapped)
+    _published_plugin_keys.insert(idx, wrapped)
+    _published_plugins_cache.insert(idx, plugin)
+    _published_plugin_positions[id(plugin)] = (sort_key, plugin)
+    if _plugin_search is not None:
+        _plugin_search.add(plugin, wrapped)
+    if _plugin_partitions is not None:
+        members = _plugin_partition_keys(plugin)
+        _plugin_partition_members[id(plugin)] = members
+        for member in members:
+            keys, entries = _plugin_partitions.setdefault(member, ([], []))
+            pos = bisect.bisect_right(keys, wrapped)
+            keys.insert(pos, wrapped)
+            entries.insert(pos, plugin)
+    if _plugin_authors is not None and not is_external_plugin(plugin):
+        _plugin_authors.add(plugin, _author_keys(plugin, with_texts=True))
+
+
+def _unlist_published_plugin(plugin: CatalogEntry) -> None:
+    if _published_plugins_cache is None:
+        return
+    found = _published_plugin_positions.pop(id(plugin), None)
+    if found is None:
+        return
+    sort_key = found[0]
+    idx = bisect.bisect_left(_published_plugin_keys, _NewestFirst(sort_key))
+    while idx < len(_published_plugin_keys) and _published_plugin_keys[idx].key == sort_key:
+        if _published_plugins_cache[idx] is plugin:
+            del _published_plugin_keys[idx]
+            del _published_plugins_cache[idx]
+            break
+        idx += 1
+    if _plugin_search is not None:
+        _plugin_search.remove(plugin)
+    if _plugin_partitions is not None:
+        for member in _plugin_partition_members.pop(id(plugin), ()):
+            partition = _plugin_partitions.get(member)
+            if partition is None:
+                continue
+            keys, entries = partition
+            pos = bisect.bisect_left(keys, _NewestFirst(sort_key))
+            while pos < len(keys) and keys[pos].key == sort_key:
+                if entries[pos] is plugin:
+                    del keys[pos]
+                    del entries[pos]
+                    break
+                pos += 1
+            if not entries:
+                del _plugin_partitions[member]
+    if _plugin_authors is not None:
+        _plugin_authors.remove(plugin)
+
+
+def _reindex_plugin(slug: str, plugin: Optional[CatalogEntry]) -> None:
+    key = _normalize_slug(slug)
+    previous = _slug_index.get(key)
+    if previous is not None:
+        _unlist_published_plugin(previous)
+    if plugin is None:
+        _slug_index.pop(key, None)
+        return
+    _unlist_published_plugin(plugin)
+    if key:
+        _slug_index[key] = plugin
+    if plugin.get("status") == "published":
+        _list_published_plugin(plugin)
+
+
+def _list_published_icon(icon: CatalogEntry) -> None:
+    if _published_icons_cache is None or id(icon) in _published_icon_ids:
+        return
+    _published_icon_ids[id(icon)] = next(_icon_order)
+    _published_icons_cache.append(icon)
+    if _icon_authors is not None:
+        _icon_authors.add(icon, _author_keys(icon))
+
+
+def _unlist_published_icon(icon: CatalogEntry) -> None:
+    if _published_icons_cache is None or _published_icon_ids.pop(id(icon), None) is None:
+        return
+    for idx, item in enumerate(_published_icons_cache):
+        if item is icon:
+            del _published_icons_cache[idx]
+            break
+    if _icon_search is not None:
+        _icon_search.remove(icon)
+    if _icon_authors is not None:
+        _icon_authors.remove(icon)
+
+
+def _reindex_icon(slug: str, icon: Optional[CatalogEntry]) -> None:
+    key = _normalize_slug(slug)
+    previous = _icon_slug_index.get(key)
+    if previous is not None and previous is not icon:
+        _unlist_published_icon(previous)
+    if icon is None:
+        _icon_slug_index.pop(key, None)
+        return
+    if key:
+        _icon_slug_index[key] = icon
+    if icon.get("status") != "published":
+        _unlist_published_icon(icon)
+        return
+    _list_published_icon(icon)
+    if _icon_search is not None and id(icon) in _published_icon_ids:
+        # Edits in place are re-indexed too; the entry keeps its position.
+        _icon_search.add(icon, _published_icon_ids[id(icon)])
+    if _icon_authors is not None and id(icon) in _published_icon_ids:
+        _icon_authors.add(icon, _author_keys(icon))
+
+
+def _on_storage_event(event: StorageEvent) -> None:
+    global _plugins_cache, _icons_cache, _published_plugins_cache, _published_icons_cache
+    global _plugin_search, _icon_search, _plugin_partitions, _plugin_authors, _icon_authors
+    if event.doc_key == "plugins":
+        cached, loader, collection, reindex = _plugins_cache, load_plugins, "plugins", _reindex_plugin
+    elif event.doc_key == "icons":
+        cached, loader, collection, reindex = _icons_cache, load_icons, "iconpacks", _reindex_icon
+    else:
+        return
+    if cached is None or event.upserted is None or cached is not loader().get(collection):
+        # Not known row by row, or storage now holds a different list.
+        if event.doc_key == "plugins":
+            _plugins_cache = None
+            _published_plugins_cache = None
+            _plugin_search = None
+            _plugin_partitions = None
+            _plugin_authors = None
+            _slug_index.clear()
+        else:
+            _icons_cache = None
+            _published_icons_cache = None
+            _icon_search = None
+            _icon_authors = None
+            _icon_slug_index.clear()
+        return
+    for slug in event.deleted or ():
+        reindex(slug, None)
+    for slug, entry in event.upserted.items():
+        reindex(slug, entry)
+
+
+subscribe_storage_events(_on_storage_event)
+
+
+# token -> {doc_key: slug} for every token form of every catalog slug, with
+# each slug also mapped to itself. Seeded once from the slug_tokens table and
+# then kept in step with catalog storage events, so lookups never hit SQLite.
+_slug_tokens: Optional[Dict[str, Dict[str, str]]] = None
+_CATALOG_COLLECTIONS = {"plugins": ("plugins", load_plugins), "icons": ("iconpacks", load_icons)}
+
+
+def _slug_token_forms(slug: str) -> tuple[str, ...]:
+    return (slug, *(slug_token(slug, prefix, size) for prefix, size in SLUG_TOKEN_FORMS))
+
+
+def _add_slug_tokens(doc_key: str, slug: str) -> None:
+    for token in _slug_token_forms(slug):
+        _slug_tokens.setdefault(token, {}).setdefault(doc_key, slug)
+
+
+def _drop_slug_tokens(doc_key: str, slug: str) -> None:
+    for token in _slug_token_forms(slug):
+        bucket = _slug_tokens.get(token)
+        if bucket is not None and bucket.get(doc_key) == slug:
+            del bucket[doc_key]
+            if not bucket:
+                del _slug_tokens[token]
+
+
+def init_slug_tokens() -> None:
+    global _slug_tokens
+    _slug_tokens = {}
+    for token, doc_key, slug in load_slug_tokens():
+        _slug_tokens.setdefault(token, {}).setdefault(doc_key, slug)
+
+
+def _on_slug_token_event(event: StorageEvent) -> None:
+    spec = _CATALOG_COLLECTIONS.get(event.doc_key)
+    if spec is None or _slug_tokens is None:
+        return
+    if event.upserted is None:
+        for token in list(_slug_tokens):
+            bucket = _slug_tokens[token]
+            bucket.pop(event.doc_key, None)
+            if not bucket:
+                del _slug_tokens[token]
+        collection, loader = spec
+        for entry in loader().get(collection) or []:
+            slug = entry.get("slug") if isinstance(entry, dict) else None
+            if isinstance(slug, str) and slug:
+                _add_slug_tokens(event.doc_key, slug)
+        return
+    for slug in event.deleted or ():
+        _drop_slug_tokens(event.doc_key, slug)
+    for slug in event.upserted:
+        _add_slug_tokens(event.doc_key, slug)
+
+
+subscribe_storage_events(_on_slug_token_event)
+
+
+def resolve_slug_token(token: Optional[str]) -> Optional[str]:
+    """Return the plugin or icon slug ``token`` stands for, if any.
+
+    Slugs resolve to themselves, so a real slug that looks like a token is
+    never shadowed; otherwise plugins win over icons.
+    """
+    if not token:
+        return None
+    if _slug_tokens is None:
+        init_slug_tokens()
+    bucket = _slug_tokens.get(token)
+    if not bucket:
+        return None
+    if token in bucket.values():
+        return token
+    return bucket.get("plugins") or bucket.get("icons")
+
+
 def _load_plugins() -> List[CatalogEntry]:
     global _plugins_cache, _slug_index
     if _plugins_cache is not None:
@@ -89,27 +413,198 @@ def _load_icons() -> List[CatalogEntry]:
 
 
 def _get_published_plugins() -> List[CatalogEntry]:
-    global _published_plugins_cache
+    global _published_plugins_cache, _plugin_search, _plugin_partitions, _plugin_authors
     if _published_plugins_cache is not None:
         return _published_plugins_cache
     
-    _published_plugins_cache = sorted(
+    published = sorted(
         [p for p in _load_plugins() if p.get("status") == "published"],
         key=_plugin_sort_key,
         reverse=True,
     )
+    _published_plugin_keys[:] = [_NewestFirst(_plugin_sort_key(p)) for p in published]
+    _published_plugin_positions.clear()
+    for plugin, wrapped in zip(published, _published_plugin_keys):
+        _published_plugin_positions[id(plugin)] = (wrapped.key, plugin)
+    _published_plugins_cache = published
+    _plugin_search = None
+    _plugin_partitions = None
+    _plugin_authors = None
     return _published_plugins_cache
 
 
+def _plugin_partition_keys(plugin: CatalogEntry) -> tuple[tuple[str, str], ...]:
+    categories = [ALL_CATEGORIES]
+    category = plugin.get("category")
+    if isinstance(category, str) and category not in {"", ALL_CATEGORIES}:
+        categories.append(category)
+    sources = [SOURCE_ALL]
+    if is_external_plugin(plugin):
+        sources.append(SOURCE_EXTERNAL)
+        source_key = plugin_source_filter_key(plugin)
+        if source_key != SOURCE_EXTERNAL:
+            sources.append(source_key)
+    else:
+        sources.append(SOURCE_OFFICIAL)
+    return tuple((category_key, source) for category_key in categories for source in sources)
+
+
+def _get_plugin_partitions() -> Dict[tuple[str, str], tuple[List["_NewestFirst"], List[CatalogEntry]]]:
+    global _plugin_partitions
+    published = _get_published_plugins()
+    if _plugin_partitions is None:
+        partitions: Dict[tuple[str, str], tuple[List[_NewestFirst], List[CatalogEntry]]] = {}
+        _plugin_partition_members.clear()
+        for plugin, wrapped in zip(published, _published_plugin_keys):
+            members = _plugin_partition_keys(plugin)
+            _plugin_partition_members[id(plugin)] = members
+            for member in members:
+                keys, entries = partitions.setdefault(member, ([], []))
+                keys.append(wrapped)
+                entries.append(plugin)
+        _plugin_partitions = partitions
+    return _plugin_partitions
+
+
+def _plugin_partition(category_key: Optional[str], source_filter: str) -> List[CatalogEntry]:
+    category_key = category_key or ALL_CATEGORIES
+    source_filter = (source_filter or SOURCE_ALL).strip().lower() or SOURCE_ALL
+    partition = _get_plugin_partitions().get((category_key, source_filter))
+    return partition[1] if partition is not None else []
+
+
 def _get_published_icons() -> List[CatalogEntry]:
-    global _published_icons_cache
+    global _published_icons_cache, _icon_search, _icon_authors
     if _published_icons_cache is not None:
         return _published_icons_cache
     
-    _published_icons_cache = [i for i in _load_icons() if i.get("status") == "published"]
+    published = [i for i in _load_icons() if i.get("status") == "published"]
+    _published_icon_ids.clear()
+    _published_icon_ids.update((id(i), next(_icon_order)) for i in published)
+    _published_icons_cache = published
+    _icon_search = None
+    _icon_authors = None
     return _published_icons_cache
 
 
+def _plugin_search_fields(plugin: CatalogEntry) -> tuple[List[Any], List[Any]]:
+    names: List[Any] = []
+    others: List[Any] = [plugin.get("slug"), plugin.get("category")]
+    for locale in ("ru", "en"):
+        locale_data = plugin.get(locale, {}) or {}
+        names.append(locale_data.get("name"))
+        others.extend([locale_data.get("description"), locale_data.get("usage")])
+    source = plugin.get("source")
+    if isinstance(source, dict):
+        others.extend([source.get("title"), source.get("username"), source.get("id")])
+    return names, others
+
+
+def _icon_search_fields(icon: CatalogEntry) -> tuple[List[Any], List[Any]]:
+    names: List[Any] = []
+    others: List[Any] = [icon.get("slug")]
+    for locale in ("ru", "en"):
+        locale_data = icon.get(locale, {}) or {}
+        names.append(locale_data.get("name"))
+        others.extend([locale_data.get("description"), locale_data.get("usage")])
+    return names, others
+
+
+def _get_plugin_search() -> SearchIndex:
+    global _plugin_search
+    published = _get_published_plugins()
+    if _plugin_search is None:
+        index = SearchIndex(_plugin_search_fields)
+        index.add_many(zip(published, _published_plugin_keys))
+        _plugin_search = index
+    return _plugin_search
+
+
+def _get_icon_search() -> SearchIndex:
+    global _icon_search
+    published = _get_published_icons()
+    if _icon_search is None:
+        index = SearchIndex(_icon_search_fields)
+        index.add_many((icon, _published_icon_ids.get(id(icon), 0)) for icon in published)
+        _icon_search = index
+    return _icon_search
+
+
+def _upsert_entry(
+    entry: CatalogEntry,
+    loader,
+    saver,
+    collection_key: str,
+    index: Dict[str, CatalogEntry],
+) -> CatalogEntry:
+    database = loader()
+    items = database.setdefault(collection_key, [])
+    current = index.get(_normalize_slug(entry.get("slug")))
+    if current is None:
+        items.append(entry)
+        current = entry
+    elif current is not entry:
+        # Replace in place so references held elsewhere stay valid.
+        current.clear()
+        current.update(entry)
+    saver(database, changed=[current.get("slug")])
+    return current
+
+
+def _remove_entry(
+    slug: Optional[str],
+    loader,
+    saver,
+    collection_key: str,
+    index: Dict[str, CatalogEntry],
+) -> Optional[CatalogEntry]:
+    current = index.get(_normalize_slug(slug))
+    if current is None:
+        return None
+    database = loader()
+    items = database.get(collection_key, [])
+    for idx, item in enumerate(items):
+        if item is current:
+            del items[idx]
+            break
+    saver(database, changed=[current.get("slug")])
+    return current
+
+
+def upsert_plugin(entry: CatalogEntry) -> CatalogEntry:
+    """Insert ``entry`` or replace the plugin with the same slug.
+
+    Only that row is saved; the slug index and the sorted published list are
+    patched from the resulting storage event instead of being rebuilt.
+    """
+    _load_plugins()
+    return _upsert_entry(entry, load_plugins, save_plugins, "plugins", _slug_index)
+
+
+def remove_plugin(slug: Optional[str]) -> Optional[CatalogEntry]:
+    _load_plugins()
+    return _remove_entry(slug, load_plugins, save_plugins, "plugins", _slug_index)
+
+
+def save_plugin(plugin: CatalogEntry) -> None:
+    """Persist a plugin that was edited in place."""
+    save_plugins(load_plugins(), changed=[plugin.get("slug")])
+
+
+def upsert_icon(entry: CatalogEntry) -> CatalogEntry:
+    _load_icons()
+    return _upsert_entry(entry, load_icons, save_icons, "iconpacks", _icon_slug_index)
+
+
+def remove_icon(slug: Optional[str]) -> Optional[CatalogEntry]:
+    _load_icons()
+    return _remove_entry(slug, load_icons, save_icons, "iconpacks", _icon_slug_index)
+
+
+def save_icon(icon: CatalogEntry) -> None:
+    save_icons(load_icons(), changed=[icon.get("slug")])
+
+
 def _plugin_sort_key(plugin: CatalogEntry) -> tuple[str, str]:
     channel_message = plugin.get("channel_message") if isinstance(plugin.get("channel_message"), dict) else {}
     date = (
@@ -136,20 +631,18 @@ def is_external_plugin(plugin: Optional[CatalogEntry]) -> bool:
     return bool(plugin and plugin_source_type(plugin) == SOURCE_EXTERNAL)
 
 
-def _filter_plugins_by_source(entries: List[CatalogEntry], source_filter: str = SOURCE_ALL) -> List[CatalogEntry]:
+def _source_predicate(source_filter: str = SOURCE_ALL) -> Optional[Callable[[CatalogEntry], bool]]:
     source_filter = (source_filter or SOURCE_ALL).strip().lower()
     if source_filter in {"", SOURCE_ALL}:
-        return entries
+        return None
     if source_filter == SOURCE_EXTERNAL:
-        return [p for p in entries if is_external_plugin(p)]
+        return is_external_plugin
     if source_filter == SOURCE_OFFICIAL:
-        return [p for p in entries if not is_external_plugin(p)]
-    return [
-        p
-        for p in entries
-        if isinstance(p.get("source"), dict)
+        return lambda p: not is_external_plugin(p)
+    return lambda p: (
+        isinstance(p.get("source"), dict)
         and str(p["source"].get("id") or p["source"].get("username") or "").strip().lower() == source_filter
-    ]
+    )
 
 
 def plugin_source_filter_key(plugin: CatalogEntry) -> str:
@@ -170,42 +663,37 @@ def plugin_source_display(plugin: CatalogEntry) -> str:
 
 
 def list_plugin_sources() -> List[Dict[str, Any]]:
-    entries = _get_published_plugins()
-    counts: Dict[str, Dict[str, Any]] = {
-        SOURCE_ALL: {"key": SOURCE_ALL, "label": "Все источники", "count": len(entries), "type": SOURCE_ALL},
-        SOURCE_OFFICIAL: {
+    partitions = _get_plugin_partitions()
+    sources: List[Dict[str, Any]] = [
+        {"key": SOURCE_ALL, "label": "Все источники", "count": len(_plugin_partition(None, SOURCE_ALL)), "type": SOURCE_ALL},
+        {
             "key": SOURCE_OFFICIAL,
             "label": f"@{OFFICIAL_SOURCE_USERNAME}",
-            "count": 0,
+            "count": len(_plugin_partition(None, SOURCE_OFFICIAL)),
             "type": SOURCE_OFFICIAL,
         },
-    }
-
-    for plugin in entries:
-        key = plugin_source_filter_key(plugin)
-        if key == SOURCE_OFFICIAL:
-            counts[SOURCE_OFFICIAL]["count"] += 1
-            continue
-        item = counts.setdefault(
-            key,
-            {
-                "key": key,
-                "label": plugin_source_display(plugin),
-                "count": 0,
-                "type": SOURCE_EXTERNAL,
-            },
-        )
-        item["count"] += 1
-
-    external = sorted(
-        [item for key, item in counts.items() if key not in {SOURCE_ALL, SOURCE_OFFICIAL}],
-        key=lambda item: str(item.get("label") or "").lower(),
-    )
-    return [counts[SOURCE_ALL], counts[SOURCE_OFFICIAL], *external]
+    ]
+    external = [
+        {
+            "key": source,
+            # Labelled after the newest plugin, as the first one listed.
+            "label": plugin_source_display(entries[0]),
+            "count": len(entries),
+            "type": SOURCE_EXTERNAL,
+        }
+        for (category_key, source), (_, entries) in partitions.items()
+        if category_key == ALL_CATEGORIES and source not in {SOURCE_ALL, SOURCE_OFFICIAL, SOURCE_EXTERNAL}
+    ]
+    external.sort(key=lambda item: str(item.get("label") or "").lower())
+    return [*sources, *external]
+
+
+def count_plugins(category_key: Optional[str] = ALL_CATEGORIES, source_filter: str = SOURCE_ALL) -> int:
+    return len(_plugin_partition(category_key, source_filter))
 
 
 def list_published_plugins(limit: Optional[int] = None, source_filter: str = SOURCE_ALL) -> List[CatalogEntry]:
-    entries = _filter_plugins_by_source(_get_published_plugins(), source_filter)
+    entries = _plugin_partition(None, source_filter)
     if limit is not None:
         return entries[:limit]
     return entries
@@ -219,72 +707,174 @@ def list_published_icons(limit: Optional[int] = None) -> List[CatalogEntry]:
 
 
 def list_plugins_by_category(category_key: str, source_filter: str = SOURCE_ALL) -> List[CatalogEntry]:
-    entries = _filter_plugins_by_source(_get_published_plugins(), source_filter)
-    if category_key in (None, "", "_all"):
-        return entries
-    return [p for p in entries if p.get("category") == category_key]
+    """Published plugins of one category and source, newest first.
 
+    The list is maintained in place; slice it rather than mutating it.
+    """
+    return _plugin_partition(category_key, source_filter)
 
-def search_plugins(query: str, limit: int = 10, source_filter: str = SOURCE_ALL) -> List[CatalogEntry]:
+
+async def _fts_hits(
+    doc_key: str,
+    query: str,
+    limit: Optional[int],
+    index: Dict[str, CatalogEntry],
+    predicate: Optional[Callable[[CatalogEntry], bool]] = None,
+) -> Optional[List[SearchHit]]:
+    if not catalog_fts_enabled():
+        return None
+    # Rows can still be dropped here (filtered out, or unpublished in memory
+    # but not yet committed), so keep reading batches until the page is full.
+    batch = None if limit is None else max(limit, _FTS_BATCH)
+    offset = 0
+    hits: List[SearchHit] = []
+    while True:
+        try:
+            rows = await asyncio.to_thread(search_catalog_fts, doc_key, query, batch, offset)
+        except sqlite3.Error:
+            logger.exception("FTS catalog search failed, falling back to the in-memory index")
+            return None
+        for slug, snippet in rows:
+            entry = index.get(_normalize_slug(slug))
+            if entry is None or entry.get("status") != "published":
+                continue
+            if predicate is not None and not predicate(entry):
+                continue
+            hits.append((entry, snippet or None))
+            if limit is not None and len(hits) >= limit:
+                return hits
+        if batch is None or len(rows) < batch:
+            return hits
+        offset += batch
+
+
+async def search_plugin_hits(
+    query: str,
+    limit: Optional[int] = 10,
+    source_filter: str = SOURCE_ALL,
+) -> List[SearchHit]:
+    """Like :func:`search_plugins`, paired with a text snippet when FTS search is on."""
     normalized = query.strip().lower()
-    entries = _filter_plugins_by_source(_get_published_plugins(), source_filter)
-    
+    predicate = _source_predicate(source_filter)
     if not normalized:
-        result = entries.copy()
+        result = list_published_plugins(source_filter=source_filter).copy()
         random.shuffle(result)
-        return result[:limit]
+        return [(plugin, None) for plugin in result[:limit]]
+    _load_plugins()
+    hits = await _fts_hits("plugins", normalized, limit, _slug_index, predicate)
+    if hits is None:
+        hits = [(plugin, None) for plugin in _get_plugin_search().search(normalized, limit, predicate)]
+    return hits
 
-    def matches(plugin: CatalogEntry) -> bool:
-        haystack_parts: List[str] = []
-        for locale in ("ru", "en"):
-            locale_data = plugin.get(locale, {}) or {}
-            haystack_parts.extend([
-                locale_data.get("name"),
-                locale_data.get("description"),
-                locale_data.get("usage"),
-            ])
-        haystack_parts.append(plugin.get("slug"))
-        haystack_parts.append(plugin.get("category"))
-        source = plugin.get("source")
-        if isinstance(source, dict):
-            haystack_parts.extend([
-                source.get("title"),
-                source.get("username"),
-                source.get("id"),
-            ])
-        haystack = " ".join(filter(None, haystack_parts)).lower()
-        return normalized in haystack
-
-    results = [p for p in entries if matches(p)]
-    random.shuffle(results)
-    return results[:limit]
-
-
-def search_icons(query: str, limit: int = 10) -> List[CatalogEntry]:
+
+async def search_icon_hits(query: str, limit: Optional[int] = 10) -> List[SearchHit]:
     normalized = query.strip().lower()
-    entries = _get_published_icons()
-    
     if not normalized:
-        result = entries.copy()
+        result = _get_published_icons().copy()
         random.shuffle(result)
-        return result[:limit]
+        return [(icon, None) for icon in result[:limit]]
+    _load_icons()
+    hits = await _fts_hits("icons", normalized, limit, _icon_slug_index)
+    if hits is None:
+        hits = [(icon, None) for icon in _get_icon_search().search(normalized, limit)]
+    return hits
 
-    def matches(icon: CatalogEntry) -> bool:
-        haystack_parts: List[str] = []
-        for locale in ("ru", "en"):
-            locale_data = icon.get(locale, {}) or {}
-            haystack_parts.extend([
-                locale_data.get("name"),
-                locale_data.get("description"),
-                locale_data.get("usage"),
-            ])
-        haystack_parts.append(icon.get("slug"))
-        haystack = " ".join(filter(None, haystack_parts)).lower()
-        return normalized in haystack
 
-    results = [i for i in entries if matches(i)]
-    random.shuffle(results)
-    return results[:limit]
+def complete_plugins(
+    query: str,
+    limit: Optional[int] = 10,
+    source_filter: str = SOURCE_ALL,
+) -> List[CatalogEntry]:
+    """Published plugins whose names start with ``query``, allowing typos."""
+    return _get_plugin_search().complete(query, limit, _source_predicate(source_filter))
+
+
+def complete_icons(query: str, limit: Optional[int] = 10) -> List[CatalogEntry]:
+    return _get_icon_search().complete(query, limit)
+
+
+def _merge_hits(completions: List[CatalogEntry], hits: List[SearchHit], limit: Optional[int]) -> List[SearchHit]:
+    snippets = {id(entry): snippet for entry, snippet in hits}
+    merged: List[SearchHit] = [(entry, snippets.get(id(entry))) for entry in completions]
+    seen = {id(entry) for entry in completions}
+    merged.extend(hit for hit in hits if id(hit[0]) not in seen)
+    return merged[:limit]
+
+
+async def suggest_plugin_hits(query: str, limit: Optional[int] = 10) -> List[SearchHit]:
+    """Name completions first, then the remaining full-text matches."""
+    return _merge_hits(complete_plugins(query, limit), await search_plugin_hits(query, limit), limit)
+
+
+async def suggest_icon_hits(query: str, limit: Optional[int] = 10) -> List[SearchHit]:
+    return _merge_hits(complete_icons(query, limit), await search_icon_hits(query, limit), limit)
+
+
+_SEARCH_SESSION_LIMIT = 512
+
+
+@dataclass(frozen=True, slots=True)
+class SearchSession:
+    """Ranked plugin slugs for one query, frozen when the session was opened."""
+
+    session_id: str
+    query: str
+    source_filter: str
+    slugs: tuple[str, ...]
+
+    def __len__(self) -> int:
+        return len(self.slugs)
+
+    def page(self, page: int, per_page: int) -> tuple[str, ...]:
+        start = max(0, page) * per_page
+        return self.slugs[start:start + per_page]
+
+
+_search_sessions: "OrderedDict[str, SearchSession]" = OrderedDict()
+
+
+async def open_search_session(query: str, source_filter: str = SOURCE_ALL) -> SearchSession:
+    """Rank ``query`` once and keep the result server-side.
+
+    The id is derived from the query, the filter and the catalog version, so
+    repeating a search on an unchanged catalog reuses the same session.
+    """
+    normalized = " ".join(query.lower().split())
+    source_filter = (source_filter or SOURCE_ALL).strip().lower()
+    raw = f"{document_version('plugins')}\0{source_filter}\0{normalized}"
+    session_id = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+    session = get_search_session(session_id)
+    if session is not None:
+        return session
+    slugs = tuple(
+        slug
+        for slug in (plugin.get("slug") for plugin in await search_plugins(normalized, None, source_filter))
+        if slug
+    )
+    session = SearchSession(session_id, normalized, source_filter, slugs)
+    _search_sessions[session_id] = session
+    while len(_search_sessions) > _SEARCH_SESSION_LIMIT:
+        _search_sessions.popitem(last=False)
+    return session
+
+
+def get_search_session(session_id: Optional[str]) -> Optional[SearchSession]:
+    session = _search_sessions.get(session_id or "")
+    if session is not None:
+        _search_sessions.move_to_end(session.session_id)
+    return session
+
+
+async def search_plugins(
+    query: str,
+    limit: Optional[int] = 10,
+    source_filter: str = SOURCE_ALL,
+) -> List[CatalogEntry]:
+    return [plugin for plugin, _ in await search_plugin_hits(query, limit, source_filter)]
+
+
+async def search_icons(query: str, limit: Optional[int] = 10) -> List[CatalogEntry]:
+    return [icon for icon, _ in await search_icon_hits(query, limit)]
 
 
 def _normalize_slug(value: Optional[str]) -> str:
@@ -309,73 +899,72 @@ def find_icon_by_slug(slug: Optional[str]) -> Optional[CatalogEntry]:
     return _icon_slug_index.get(target)
 
 
+def _author_keys(entry: CatalogEntry, with_texts: bool = False) -> tuple[tuple[str, Any], ...]:
+    """Index keys for an entry's submitters and author handles.
+
+    With ``with_texts`` the @handles mentioned in the localized author lines
+    and the raw ``author``/``author_channel`` blocks count as well.
+    """
+    keys: set[tuple[str, Any]] = set()
+    for sub in entry.get("submitters", []) or []:
+        if isinstance(sub, dict) and sub.get("user_id") is not None:
+            keys.add(("user", sub.get("user_id")))
+    authors = entry.get("authors", {}) if isinstance(entry.get("authors"), dict) else {}
+    for handle in authors.get("handles", []) or []:
+        if isinstance(handle, str):
+            keys.add(("handle", handle.lower()))
+    if with_texts:
+        texts = [authors.get("ru"), authors.get("en")]
+        raw_blocks = entry.get("raw_blocks", {}) or {}
+        for locale in ("ru", "en"):
+            raw = raw_blocks.get(locale) if isinstance(raw_blocks.get(locale), dict) else {}
+            texts.extend([raw.get("author"), raw.get("author_channel")])
+        for text in texts:
+            if isinstance(text, str):
+                keys.update(("handle", handle) for handle in _HANDLE_RE.findall(text.lower()))
+    return tuple(keys)
+
+
+def _user_author_keys(user_id: int, username: str) -> List[tuple[str, Any]]:
+    keys: List[tuple[str, Any]] = [("user", user_id)]
+    if username:
+        keys.append(("handle", f"@{username.lower()}"))
+    return keys
+
+
+def _get_plugin_authors() -> _AuthorIndex:
+    global _plugin_authors
+    published = _get_published_plugins()
+    if _plugin_authors is None:
+        index = _AuthorIndex()
+        for plugin in published:
+            if not is_external_plugin(plugin):
+                index.add(plugin, _author_keys(plugin, with_texts=True))
+        _plugin_authors = index
+    return _plugin_authors
+
+
+def _get_icon_authors() -> _AuthorIndex:
+    global _icon_authors
+    published = _get_published_icons()
+    if _icon_authors is None:
+        index = _AuthorIndex()
+        for icon in published:
+            index.add(icon, _author_keys(icon))
+        _icon_authors = index
+    return _icon_authors
+
+
 def find_user_plugins(user_id: int, username: str = "") -> List[CatalogEntry]:
-    results = []
-    handle = f"@{username.lower()}" if username else ""
-    
-    for plugin in _get_published_plugins():
-        if is_external_plugin(plugin):
-            continue
-        submitters = plugin.get("submitters", [])
-        
-        for sub in submitters:
-            if sub.get("user_id") == user_id:
-                results.append(plugin)
-                break
-        else:
-            if handle:
-                authors = plugin.get("authors", {})
-                handles = authors.get("handles", [])
-                raw_blocks = plugin.get("raw_blocks", {}) or {}
-                raw_ru = raw_blocks.get("ru") if isinstance(raw_blocks.get("ru"), dict) else {}
-                raw_en = raw_blocks.get("en") if isinstance(raw_blocks.get("en"), dict) else {}
-                
-                if any(h.lower() == handle for h in handles):
-                    results.append(plugin)
-                    continue
-                
-                for locale in ("ru", "en"):
-                    author_text = (authors.get(locale) or "").lower()
-                    if handle in author_text:
-                        results.append(plugin)
-                        break
-                else:
-                    raw_author_text = " ".join(
-                        filter(
-                            None,
-                            [
-                                (raw_ru.get("author") or ""),
-                                (raw_ru.get("author_channel") or ""),
-                                (raw_en.get("author") or ""),
-                                (raw_en.get("author_channel") or ""),
-                            ],
-                        )
-                    ).lower()
-                    if handle and handle in raw_author_text:
-                        results.append(plugin)
-    
-    return results
+    """Official published plugins submitted by or credited to the user, newest first."""
+    found = _get_plugin_authors().find(_user_author_keys(user_id, username))
+    found.sort(key=lambda plugin: _NewestFirst(_published_plugin_positions[id(plugin)][0]))
+    return found
 
 
 def find_user_icons(user_id: int, username: str = "") -> List[CatalogEntry]:
-    results = []
-    handle = f"@{username.lower()}" if username else ""
-    
-    for icon in _get_published_icons():
-        submitters = icon.get("submitters", [])
-        
-        for sub in submitters:
-            if sub.get("user_id") == user_id:
-                results.append(icon)
-                break
-        else:
-            if handle:
-                authors = icon.get("authors", {})
-                handles = authors.get("handles", [])
-                
-                if any(h.lower() == handle for h in handles):
-                    results.append(icon)
-    
-    return results
+    found = _get_icon_authors().find(_user_author_keys(user_id, username))
+    found.sort(key=lambda icon: _published_icon_ids.get(id(icon), 0))
+    return found
 
 
@@ -0,0 +1,505 @@
+"""In-memory token, trigram and name-completion index over published catalog entries."""
+
+import bisect
+import heapq
+import re
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+CatalogEntry = Dict[str, Any]
+
+_TOKEN_RE = re.compile(r"\w+")
+
+RANK_EXACT_NAME = 0
+RANK_NAME_PREFIX = 1
+RANK_TOKEN = 2
+RANK_PARTIAL = 3
+
+# Completion typos allowed per query word, by word length.
+_TYPO_BUDGET = ((3, 0), (6, 1))
+_MAX_TYPOS = 2
+
+# A short query word that prefixes more vocabulary words than this is
+# matched by walking entries in order rather than by merging postings.
+_WALK_SPAN = 256
+
+
+def normalize_text(value: Any) -> str:
+    return " ".join(str(value or "").lower().split())
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _trigrams(token: str) -> set[str]:
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+def _typo_budget(token: str) -> int:
+    for max_len, budget in _TYPO_BUDGET:
+        if len(token) <= max_len:
+            return budget
+    return _MAX_TYPOS
+
+
+_doc_order = attrgetter("order")
+
+
+def _osa_row(query: str, word: str, depth: int, rows: List[List[int]]) -> List[int]:
+    """Distances from every prefix of ``query`` to ``word[:depth]``, given the rows above."""
+    char = word[depth - 1]
+    above = rows[depth - 1]
+    row = [depth]
+    for i in range(1, len(query) + 1):
+        cost = 0 if query[i - 1] == char else 1
+        value = min(above[i] + 1, row[i - 1] + 1, above[i - 1] + cost)
+        if i > 1 and depth > 1 and query[i - 1] == word[depth - 2] and query[i - 2] == char:
+            value = min(value, rows[depth - 2][i - 2] + 1)
+        row.append(value)
+    return row
+
+
+def _prefix_end(prefix: str) -> str:
+    """Smallest string sorting after every string that starts with ``prefix``."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class _Doc:
+    __slots__ = ("entry", "names", "name_tokens", "tokens", "order")
+
+    def __init__(
+        self,
+        entry: CatalogEntry,
+        names: tuple[str, ...],
+        name_tokens: frozenset[str],
+        tokens: frozenset[str],
+        order: Any,
+    ) -> None:
+        self.entry = entry
+        self.names = names
+        self.name_tokens = name_tokens
+        self.tokens = tokens
+        self.order = order
+
+
+class SearchIndex:
+    """Ranked search over entries added with :meth:`add`.
+
+    ``fields(entry)`` returns the entry's names and its other searchable
+    texts. Every query token has to occur in one of them; tokens of three or
+    more characters match anywhere inside a word, shorter ones match word
+    prefixes. Results are ranked exact name, name prefix, whole-word match,
+    then partial match, and ties keep ``order``. The buckets are filled in
+    that order from their own postings and the partial matches are only
+    collected while a page still has room.
+
+    Trigrams are indexed over the distinct words rather than over entries: a
+    query word can only ever match inside a single indexed word, and the
+    vocabulary is far smaller than the catalog.
+
+    :meth:`complete` serves as-you-type lookups over name words only. The
+    sorted name vocabulary is walked as a flattened trie: edit-distance rows
+    are shared by words with a common prefix, and a whole prefix range is
+    settled by bisect once no longer prefix can change its distance.
+    """
+
+    def __init__(self, fields: Callable[[CatalogEntry], tuple[Iterable[Any], Iterable[Any]]]) -> None:
+        self._fields = fields
+        self._docs: Dict[int, _Doc] = {}
+        self._token_postings: Dict[str, set[int]] = {}
+        self._sorted_tokens: List[str] = []
+        self._trigram_tokens: Dict[str, set[str]] = {}
+        self._name_postings: Dict[str, set[int]] = {}
+        self._sorted_names: List[str] = []
+        self._full_names: Dict[str, set[int]] = {}
+        self._sorted_full_names: List[str] = []
+        self._ordered: Optional[List[_Doc]] = None
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, entry: CatalogEntry) -> bool:
+        return id(entry) in self._docs
+
+    def add(self, entry: CatalogEntry, order: Any) -> None:
+        self._add(entry, order, keep_sorted=True)
+
+    def add_many(self, items: Iterable[tuple[CatalogEntry, Any]]) -> None:
+        for entry, order in items:
+            self._add(entry, order, keep_sorted=False)
+        self._sorted_tokens = sorted(self._token_postings)
+        self._sorted_names = sorted(self._name_postings)
+        self._sorted_full_names = sorted(self._full_names)
+
+    def _add(self, entry: CatalogEntry, order: Any, keep_sorted: bool) -> None:
+        self.remove(entry)
+        self._ordered = None
+        names, others = self._fields(entry)
+        names = tuple(name for name in (normalize_text(value) for value in names) if name)
+        name_tokens = frozenset(tokenize(" ".join(names)))
+        tokens = name_tokens | frozenset(tokenize(" ".join(str(value) for value in others if value)))
+        doc_id = id(entry)
+        self._docs[doc_id] = _Doc(entry, names, name_tokens, tokens, order)
+        for name in names:
+            postings = self._full_names.get(name)
+            if postings is None:
+                postings = self._full_names[name] = set()
+                if keep_sorted:
+                    bisect.insort(self._sorted_full_names, name)
+            postings.add(doc_id)
+        for token in name_tokens:
+            postings = self._name_postings.get(token)
+            if postings is None:
+                postings = self._name_postings[token] = set()
+                if keep_sorted:
+                    bisect.insort(self._sorted_names, token)
+            postings.add(doc_id)
+        for token in tokens:
+            postings = self._token_postings.get(token)
+            if postings is None:
+                postings = self._token_postings[token] = set()
+                if keep_sorted:
+                    bisect.insort(self._sorted_tokens, token)
+                for gram in _trigrams(token):
+                    self._trigram_tokens.setdefault(gram, set()).add(token)
+            postings.add(doc_id)
+
+    def remove(self, entry: CatalogEntry) -> None:
+        doc_id = id(entry)
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        self._ordered = None
+        for name in doc.names:
+            postings = self._full_names.get(name)
+            if postings is None:
+                continue
+            postings.discard(doc_id)
+            if not postings:
+                del self._full_names[name]
+                idx = bisect.bisect_left(self._sorted_full_names, name)
+                if idx < len(self._sorted_full_names) and self._sorted_full_names[idx] == name:
+                    del self._sorted_full_names[idx]
+        for token in doc.name_tokens:
+            postings = self._name_postings.get(token)
+            if postings is None:
+                continue
+            postings.discard(doc_id)
+            if not postings:
+                del self._name_postings[token]
+                idx = bisect.bisect_left(self._sorted_names, token)
+                if idx < len(self._sorted_names) and self._sorted_names[idx] == token:
+                    del self._sorted_names[idx]
+        for token in doc.tokens:
+            postings = self._token_postings.get(token)
+            if postings is None:
+                continue
+            postings.discard(doc_id)
+            if postings:
+                continue
+            del self._token_postings[token]
+            idx = bisect.bisect_left(self._sorted_tokens, token)
+            if idx < len(self._sorted_tokens) and self._sorted_tokens[idx] == token:
+                del self._sorted_tokens[idx]
+            for gram in _trigrams(token):
+                words = self._trigram_tokens.get(gram)
+                if words is not None:
+                    words.discard(token)
+                    if not words:
+                        del self._trigram_tokens[gram]
+
+    @staticmethod
+    def _prefix_span(words: List[str], prefix: str) -> int:
+        """How many of the sorted ``words`` start with ``prefix``."""
+        start = bisect.bisect_left(words, prefix)
+        return bisect.bisect_left(words, _prefix_end(prefix), start) - start
+
+    @staticmethod
+    def _doc_matches(doc: _Doc, token: str) -> bool:
+        if len(token) >= 3:
+            return any(token in word for word in doc.tokens)
+        return any(word.startswith(token) for word in doc.tokens)
+
+    def _prefix_docs(self, prefix: str) -> set[int]:
+        found: set[int] = set()
+        start = bisect.bisect_left(self._sorted_tokens, prefix)
+        for token in self._sorted_tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            found |= self._token_postings[token]
+        return found
+
+    def _substring_docs(self, token: str) -> set[int]:
+        candidates = []
+        for gram in _trigrams(token):
+            words = self._trigram_tokens.get(gram)
+            if not words:
+                return set()
+            candidates.append(words)
+        candidates.sort(key=len)
+        words = set(candidates[0])
+        for other in candidates[1:]:
+            words &= other
+            if not words:
+                return set()
+        found: set[int] = set()
+        for word in words:
+            if token in word:
+                found |= self._token_postings[word]
+        return found
+
+    def _candidates(self, tokens: List[str]) -> set[int]:
+        found: Optional[set[int]] = None
+        # Cheap, selective tokens first so the intersection shrinks early.
+        for token in sorted(tokens, key=len, reverse=True):
+            if len(token) >= 3:
+                docs = self._substring_docs(token)
+            elif found is not None and len(found) < self._prefix_span(self._sorted_tokens, token):
+                # Checking the few candidates left beats merging the postings.
+                found = {doc_id for doc_id in found if self._doc_matches(self._docs[doc_id], token)}
+                continue
+            else:
+                docs = self._prefix_docs(token)
+            found = docs if found is None else found & docs
+            if not found:
+                return set()
+        return found or set()
+
+    def _name_docs(self, query: str) -> tuple[set[int], set[int]]:
+        """Docs with a name equal to ``query``, and the rest of those whose name starts with it."""
+        exact = self._full_names.get(query, set())
+        prefixed: set[int] = set()
+        start = bisect.bisect_right(self._sorted_full_names, query)
+        end = bisect.bisect_left(self._sorted_full_names, _prefix_end(query), start)
+        for name in self._sorted_full_names[start:end]:
+            prefixed |= self._full_names[name]
+        return exact, prefixed - exact
+
+    def _word_docs(self, tokens: List[str]) -> set[int]:
+        found: Optional[set[int]] = None
+        for token in tokens:
+            postings = self._token_postings.get(token)
+            if not postings:
+                return set()
+            found = set(postings) if found is None else found & postings
+        return found or set()
+
+    def _pick(
+        self,
+        doc_ids: Iterable[int],
+        taken: set[int],
+        predicate: Optional[Callable[[CatalogEntry], bool]],
+        count: Optional[int],
+        key: Callable[[_Doc], Any] = _doc_order,
+    ) -> List[_Doc]:
+        """The first ``count`` docs by ``key`` not in ``taken``; adds them to it."""
+        docs = [self._docs[doc_id] for doc_id in doc_ids if doc_id not in taken]
+        if predicate is not None:
+            docs = [doc for doc in docs if predicate(doc.entry)]
+        docs = sorted(docs, key=key) if count is None else heapq.nsmallest(count, docs, key=key)
+        taken.update(id(doc.entry) for doc in docs)
+        return docs
+
+    def _fill(
+        self,
+        buckets: Iterable[Callable[[], Iterable[int]]],
+        limit: Optional[int],
+        predicate: Optional[Callable[[CatalogEntry], bool]],
+        taken: set[int],
+    ) -> List[_Doc]:
+        """Docs from ``buckets`` in turn; a bucket is only looked up while the page has room."""
+        found: List[_Doc] = []
+        for bucket in buckets:
+            if limit is not None and len(found) >= limit:
+                break
+            found.extend(self._pick(bucket(), taken, predicate, None if limit is None else limit - len(found)))
+        return found
+
+    @staticmethod
+    def _rank(doc: _Doc, query: str, tokens: List[str]) -> int:
+        if query in doc.names:
+            return RANK_EXACT_NAME
+        if any(name.startswith(query) for name in doc.names):
+            return RANK_NAME_PREFIX
+        if all(token in doc.tokens for token in tokens):
+            return RANK_TOKEN
+        return RANK_PARTIAL
+
+    def search(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        predicate: Optional[Callable[[CatalogEntry], bool]] = None,
+    ) -> List[CatalogEntry]:
+        normalized = normalize_text(query)
+        tokens = list(dict.fromkeys(tokenize(normalized)))
+        if not tokens:
+            return []
+        exact, prefixed = self._name_docs(normalized)
+        # One bucket per rank; every doc of a bucket is also a candidate.
+        buckets = (
+            lambda: exact,
+            lambda: prefixed,
+            lambda: self._word_docs(tokens),
+        )
+        taken: set[int] = set()
+        found = self._fill(buckets, limit, predicate, taken)
+        if limit is None or len(found) < limit:
+            found += self._partial_docs(tokens, taken, predicate, None if limit is None else limit - len(found))
+        return [doc.entry for doc in found]
+
+    def _partial_docs(
+        self,
+        tokens: List[str],
+        taken: set[int],
+        predicate: Optional[Callable[[CatalogEntry], bool]],
+        count: Optional[int],
+    ) -> List[_Doc]:
+        if count is None or any(
+            len(token) >= 3 or self._prefix_span(self._sorted_tokens, token) <= _WALK_SPAN for token in tokens
+        ):
+            return self._pick(self._candidates(tokens), taken, predicate, count)
+        # Only short, common prefixes: matches are dense, so walking entries
+        # in order fills the page long before the postings could be merged.
+        return self._walk(lambda doc: all(self._doc_matches(doc, token) for token in tokens), taken, predicate, count)
+
+    def _walk(
+        self,
+        matches: Callable[[_Doc], bool],
+        taken: set[int],
+        predicate: Optional[Callable[[CatalogEntry], bool]],
+        count: int,
+    ) -> List[_Doc]:
+        """The first ``count`` docs in ``order`` that match and are not in ``taken``; adds them to it."""
+        if self._ordered is None:
+            self._ordered = sorted(self._docs.values(), key=_doc_order)
+        found: List[_Doc] = []
+        for doc in self._ordered:
+            if id(doc.entry) in taken or not matches(doc):
+                continue
+            if predicate is not None and not predicate(doc.entry):
+                continue
+            found.append(doc)
+            if len(found) >= count:
+                break
+        taken.update(id(doc.entry) for doc in found)
+        return found
+
+    def _fuzzy_prefixes(self, query: str, max_typos: int) -> Dict[str, int]:
+        """Name words with a prefix within ``max_typos`` edits of ``query``.
+
+        Distances are optimal string alignment (Levenshtein plus adjacent
+        transpositions), keyed by word with the best prefix distance. The
+        first letter is taken as typed, which keeps the walk to one slice of
+        the vocabulary.
+        """
+        words = self._sorted_names
+        size = len(query)
+        # rows[d] / best[d] belong to the first d characters of the word
+        # currently being walked; best[d] is the smallest full-query distance
+        # of any of its prefixes.
+        rows: List[List[int]] = [list(range(size + 1))]
+        best: List[int] = [size]
+        path = ""
+        found: Dict[str, int] = {}
+        idx = bisect.bisect_left(words, query[0])
+        end = bisect.bisect_left(words, _prefix_end(query[0]), idx)
+        while idx < end:
+            word = words[idx]
+            common = 0
+            limit = min(len(path), len(word))
+            while common < limit and path[common] == word[common]:
+                common += 1
+            del rows[common + 1:]
+            del best[common + 1:]
+            skip_to: Optional[str] = None
+            for depth in range(common + 1, len(word) + 1):
+                row = _osa_row(query, word, depth, rows)
+                rows.append(row)
+                best.append(min(best[-1], row[-1]))
+                # Row minimums never drop with depth, so once the row is out
+                # of budget (or a prefix matched exactly) every word below
+                # this prefix shares its distance.
+                if best[-1] == 0 or min(row) > max_typos:
+                    skip_to = word[:depth]
+                    break
+            if skip_to is not None:
+                stop = bisect.bisect_left(words, _prefix_end(skip_to), idx + 1, end)
+                if best[-1] <= max_typos:
+                    found.update(dict.fromkeys(words[idx:stop], best[-1]))
+                path = skip_to
+                idx = stop
+                continue
+            if best[len(word)] <= max_typos:
+                found[word] = best[len(word)]
+            path = word
+            idx += 1
+        return found
+
+    def complete(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        predicate: Optional[Callable[[CatalogEntry], bool]] = None,
+    ) -> List[CatalogEntry]:
+        """Entries whose names start with the query words, tolerating typos.
+
+        Each query word must be a prefix of some name word within its typo
+        budget (none up to three characters, one up to six, two beyond) and
+        start with the same letter.
+        Results are ranked by total typos, then exact name and name prefix,
+        then ``order``. Names starting with the whole query come first
+        without typos, so the vocabulary is only walked when they do not fill
+        ``limit``.
+        """
+        normalized = normalize_text(query)
+        tokens = list(dict.fromkeys(tokenize(normalized)))
+        if not tokens:
+            return []
+        exact, prefixed = self._name_docs(normalized)
+        taken: set[int] = set()
+        found = self._fill((lambda: exact, lambda: prefixed), limit, predicate, taken)
+        if limit is not None and len(found) >= limit:
+            return [doc.entry for doc in found]
+        if limit is not None and all(
+            _typo_budget(token) == 0 and self._prefix_span(self._sorted_names, token) > _WALK_SPAN for token in tokens
+        ):
+            # Typo-free, common prefixes: the remaining matches all rank
+            # alike, so the first ones in order are the answer.
+            found += self._walk(
+                lambda doc: all(any(word.startswith(token) for word in doc.name_tokens) for token in tokens),
+                taken,
+                predicate,
+                limit - len(found),
+            )
+            return [doc.entry for doc in found]
+        distances: Optional[Dict[int, int]] = None
+        for token in tokens:
+            per_doc: Dict[int, int] = {}
+            for word, typos in self._fuzzy_prefixes(token, _typo_budget(token)).items():
+                for doc_id in self._name_postings[word]:
+                    if typos < per_doc.get(doc_id, typos + 1):
+                        per_doc[doc_id] = typos
+            if distances is None:
+                distances = per_doc
+            else:
+                distances = {
+                    doc_id: typos + per_doc[doc_id]
+                    for doc_id, typos in distances.items()
+                    if doc_id in per_doc
+                }
+            if not distances:
+                return [doc.entry for doc in found]
+        found += self._pick(
+            distances or (),
+            taken,
+            predicate,
+            None if limit is None else limit - len(found),
+            key=lambda doc: (
+                distances[id(doc.entry)],
+                min(self._rank(doc, normalized, tokens), RANK_TOKEN),
+                doc.order,
+            ),
+        )
+        return [doc.entry for doc in found]
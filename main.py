@@ -75,8 +75,12 @@ async def on_startup(bot: Bot) -> None:
 
     await preload_cache()
 
-    from storage import preload_storage
+    from catalog import init_slug_tokens
+    init_slug_tokens()
+
+    from storage import preload_storage, start_storage_revalidation
     await preload_storage()
+    start_storage_revalidation()
 
     from bot.services.publish import seed_updated_plugins
     seed_updated_plugins()
@@ -89,11 +93,13 @@ async def on_startup(bot: Bot) -> None:
         start_draft_reminder_worker,
         start_scheduled_publish_worker,
         cleanup_orphan_plugin_files,
+        load_archived_request_keys,
     )
+    load_archived_request_keys()
     start_draft_cleanup_worker()
     start_draft_reminder_worker(bot)
     start_scheduled_publish_worker(bot)
-    cleanup_orphan_plugin_files()
+    await cleanup_orphan_plugin_files()
 
     admin_flow.start_scheduled_posts_cleanup_worker()
 
@@ -103,6 +109,9 @@ async def on_startup(bot: Bot) -> None:
     from bot.services.backup import start_backup_worker
     start_backup_worker(bot)
 
+    from bot.services.broadcast import start_broadcast_worker
+    await start_broadcast_worker(bot)
+
     await joinly_flow.schedule_pending_post_guard_unlocks(bot)
     
     await start_log_worker()
@@ -128,11 +137,19 @@ async def on_shutdown(bot: Bot) -> None:
     from bot.services.backup import stop_backup_worker
     await stop_backup_worker()
 
+    from bot.services.broadcast import stop_broadcast_worker
+    await stop_broadcast_worker()
+
+    from bot.services.audit import flush_audit_events
+    await flush_audit_events()
+
     from user_store import flush_user_store
     await flush_user_store()
     
-    from storage import flush_all
+    from storage import flush_all, shutdown_storage_writer, stop_storage_revalidation
+    await stop_storage_revalidation()
     await flush_all()
+    await asyncio.to_thread(shutdown_storage_writer)
     
     await stop_log_worker()
     
@@ -1,13 +1,29 @@
 import asyncio
 import hashlib
+import heapq
+import itertools
 import logging
+import time
 import re
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 from uuid import uuid4
 
-from storage import load_requests, save_requests
+from blob_store import BLOBS_SUBDIR, is_blob_path, release_upload, sweep_orphan_blobs_async
+from storage import (
+    StorageEvent,
+    archive_requests_async,
+    delete_archived_requests,
+    find_archived_requests,
+    load_archived_request,
+    load_archived_request_index,
+    load_config,
+    load_requests,
+    save_requests,
+    subscribe_storage_events,
+)
 
 logger = logging.getLogger(__name__)
 _requests_cache: Optional[List[Dict[str, Any]]] = None
@@ -15,6 +31,43 @@ _id_index: Dict[str, Dict[str, Any]] = {}
 _route_token_index: Dict[str, Dict[str, Any]] = {}
 _route_tokens_ready = False
 _route_tokens_source_id: Optional[int] = None
+# Secondary indexes: key -> {id(entry): entry}. Buckets are unordered; readers
+# sort their hits by _request_seq, which follows the order of the list.
+_status_index: Dict[Any, Dict[int, Dict[str, Any]]] = {}
+_type_index: Dict[Any, Dict[int, Dict[str, Any]]] = {}
+_user_index: Dict[Any, Dict[int, Dict[str, Any]]] = {}
+_plugin_id_index: Dict[str, Dict[int, Dict[str, Any]]] = {}
+_indexed_keys: Dict[int, tuple] = {}
+_request_seq: Dict[int, int] = {}
+_next_request_seq = 0
+# Archived requests handed out by lookups, so that a caller editing one in
+# place and then saving it through update_* edits the object that is restored.
+_archived_entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_ARCHIVED_ENTRIES_SIZE = 256
+# Ids of archived requests and the id each archived route token belongs to.
+# Loaded once and kept up to date on archive and delete, so checking whether
+# a key is archived never touches SQLite; only loading a cold entry does.
+_archived_ids: Optional[set[str]] = None
+_archived_tokens: Dict[str, str] = {}
+# Request timers for the background workers. Per action, a min-heap of
+# (base time, push order, entry) with lazy deletion: _timer_stamps holds each
+# entry's live base time and heap items that disagree with it are stale.
+# Readers add the action's window (draft expiry, file retention) to the base.
+_TIMER_PUBLISH = "publish"
+_TIMER_REMIND = "remind"
+_TIMER_EXPIRE = "expire"
+_TIMER_PURGE_FILES = "purge_files"
+_TIMER_ACTIONS = (_TIMER_PUBLISH, _TIMER_REMIND, _TIMER_EXPIRE, _TIMER_PURGE_FILES)
+_timer_heaps: Dict[str, List[tuple[float, int, Dict[str, Any]]]] = {action: [] for action in _TIMER_ACTIONS}
+_timer_stamps: Dict[str, Dict[int, float]] = {action: {} for action in _TIMER_ACTIONS}
+_timer_pushes = itertools.count()
+_timer_wakeups: Dict[str, asyncio.Event] = {}
+# Due requests publish concurrently, but posts to one channel go out one at a
+# time and in due order.
+_scheduled_slots: Optional[asyncio.Semaphore] = None
+_scheduled_channel_locks: Dict[str, asyncio.Lock] = {}
+_scheduled_running: set[str] = set()
+_scheduled_inflight: set[asyncio.Task] = set()
 _cleanup_task: Optional[asyncio.Task] = None
 _reminder_task: Optional[asyncio.Task] = None
 _scheduled_task: Optional[asyncio.Task] = None
@@ -22,10 +75,20 @@ _draft_expiration = timedelta(hours=1)
 _draft_reminder_before = timedelta(minutes=10)
 _cleanup_interval_seconds = 300
 _reminder_interval_seconds = 300
-_scheduled_interval_seconds = 30
+_scheduled_idle_seconds = 300
+_scheduled_retry_base = timedelta(minutes=1)
+_scheduled_retry_max = timedelta(hours=1)
+_scheduled_concurrency = 4
+_scheduled_flood_retries = 3
+_scheduled_flood_wait_max = 60.0
 
 _REQUEST_ROUTE_TOKEN_RE = re.compile(r"^q[0-9a-f]{20}$")
 
+# Requests in any other status move to the archive table once they have not
+# been touched for ``moderation.archive_after_days`` days.
+HOT_STATUSES = frozenset({"draft", "pending", "error", "scheduled", "rework"})
+ARCHIVE_AFTER_DAYS = 30
+
 
 def _now_utc() -> datetime:
     return datetime.now(timezone.utc)
@@ -43,18 +106,6 @@ def _parse_datetime_utc(value: Any) -> Optional[datetime]:
     return parsed.astimezone(timezone.utc)
 
 
-def _scheduled_time_is_due(value: Any, now: Optional[datetime] = None) -> bool:
-    scheduled_at = _parse_datetime_utc(value)
-    if scheduled_at is None:
-        return False
-    current = now or _now_utc()
-    if current.tzinfo is None:
-        current = current.replace(tzinfo=timezone.utc)
-    else:
-        current = current.astimezone(timezone.utc)
-    return scheduled_at <= current
-
-
 def _get_requests_list() -> List[Dict[str, Any]]:
     global _requests_cache, _id_index, _route_tokens_ready, _route_tokens_source_id
     
@@ -68,17 +119,192 @@ def _get_requests_list() -> List[Dict[str, Any]]:
     _route_token_index.clear()
     _route_tokens_ready = False
     _route_tokens_source_id = None
+    _clear_request_indexes()
     for req in _requests_cache:
         req_id = req.get("id")
         if req_id:
             _id_index[req_id] = req
+        _index_request(req)
     
     return _requests_cache
 
 
-def _save_requests_list() -> None:
+def _clear_request_indexes() -> None:
+    for index in (_status_index, _type_index, _user_index, _plugin_id_index):
+        index.clear()
+    _indexed_keys.clear()
+    _request_seq.clear()
+    for action in _TIMER_ACTIONS:
+        _timer_heaps[action].clear()
+        _timer_stamps[action].clear()
+
+
+def _request_index_keys(entry: Dict[str, Any]) -> tuple:
+    payload = entry.get("payload")
+    user_id = payload.get("user_id") if isinstance(payload, dict) else None
+    if not isinstance(user_id, (int, str)):
+        user_id = None
+    return entry.get("status"), entry.get("type"), user_id, tuple(_request_plugin_ids(entry))
+
+
+def _bucket_add(index: Dict[Any, Dict[int, Dict[str, Any]]], key: Any, entry: Dict[str, Any]) -> None:
+    index.setdefault(key, {})[id(entry)] = entry
+
+
+def _bucket_discard(index: Dict[Any, Dict[int, Dict[str, Any]]], key: Any, entry: Dict[str, Any]) -> None:
+    bucket = index.get(key)
+    if bucket is None:
+        return
+    bucket.pop(id(entry), None)
+    if not bucket:
+        del index[key]
+
+
+def _drop_index_keys(entry: Dict[str, Any], keys: tuple) -> None:
+    status, request_type, user_id, plugin_ids = keys
+    _bucket_discard(_status_index, status, entry)
+    _bucket_discard(_type_index, request_type, entry)
+    if user_id is not None:
+        _bucket_discard(_user_index, user_id, entry)
+    for plugin_id in plugin_ids:
+        _bucket_discard(_plugin_id_index, plugin_id, entry)
+
+
+def _timestamp(value: Any) -> Optional[float]:
+    parsed = _parse_datetime_utc(value)
+    return parsed.timestamp() if parsed is not None else None
+
+
+def _request_timer_stamps(entry: Dict[str, Any]) -> Dict[str, float]:
+    stamps: Dict[str, float] = {}
+    status = entry.get("status")
+    payload = entry.get("payload") if isinstance(entry.get("payload"), dict) else {}
+    if status == "scheduled":
+        scheduled_at = payload.get("scheduled_at")
+        due = _timestamp(scheduled_at) if scheduled_at and isinstance(scheduled_at, str) else None
+        if due is not None:
+            stamps[_TIMER_PUBLISH] = due
+    elif status == "draft":
+        touched = _timestamp(entry.get("updated_at") or entry.get("submitted_at"))
+        if touched is not None:
+            stamps[_TIMER_EXPIRE] = touched
+            if not entry.get("reminder_sent_at"):
+                stamps[_TIMER_REMIND] = touched
+    elif status == "rejected" and payload and not payload.get("files_purged"):
+        rejected_at = _rejected_at(entry)
+        if rejected_at is not None:
+            stamps[_TIMER_PURGE_FILES] = rejected_at.timestamp()
+    return stamps
+
+
+def _track_timers(entry: Dict[str, Any]) -> None:
+    stamps = _request_timer_stamps(entry)
+    for action in _TIMER_ACTIONS:
+        live = _timer_stamps[action]
+        stamp = stamps.get(action)
+        if stamp == live.get(id(entry)):
+            continue
+        if stamp is None:
+            live.pop(id(entry), None)
+            continue
+        live[id(entry)] = stamp
+        heapq.heappush(_timer_heaps[action], (stamp, next(_timer_pushes), entry))
+        wakeup = _timer_wakeups.get(action)
+        if wakeup is not None:
+            wakeup.set()
+
+
+def _next_timer_in(action: str, now: float, window: float = 0.0) -> Optional[float]:
+    """Seconds until the earliest ``action`` timer fires, if there is one."""
+    heap = _timer_heaps[action]
+    live = _timer_stamps[action]
+    while heap:
+        stamp, _, entry = heap[0]
+        if live.get(id(entry)) == stamp:
+            return stamp + window - now
+        heapq.heappop(heap)
+    return None
+
+
+def _pop_timers(action: str, now: float, window: float = 0.0) -> List[tuple[Dict[str, Any], float]]:
+    """Remove and return the ``action`` timers that have fired, with their base times."""
+    heap = _timer_heaps[action]
+    live = _timer_stamps[action]
+    fired: List[tuple[Dict[str, Any], float]] = []
+    while heap and heap[0][0] + window <= now:
+        stamp, _, entry = heapq.heappop(heap)
+        if live.get(id(entry)) != stamp:
+            continue
+        # Forgotten until the entry is reindexed, which re-arms the timer if
+        # the request still qualifies.
+        del live[id(entry)]
+        fired.append((entry, stamp))
+    return fired
+
+
+def _unindex_request(entry: Dict[str, Any]) -> None:
+    keys = _indexed_keys.pop(id(entry), None)
+    _request_seq.pop(id(entry), None)
+    for live in _timer_stamps.values():
+        live.pop(id(entry), None)
+    if keys is not None:
+        _drop_index_keys(entry, keys)
+
+
+def _index_request(entry: Dict[str, Any]) -> None:
+    """(Re)index ``entry``; call after any change to its status, type or payload."""
+    global _next_request_seq
+    if not isinstance(entry, dict):
+        return
+    _track_timers(entry)
+    keys = _request_index_keys(entry)
+    old = _indexed_keys.get(id(entry))
+    if old == keys:
+        return
+    if old is None:
+        _request_seq[id(entry)] = _next_request_seq
+        _next_request_seq += 1
+    else:
+        _drop_index_keys(entry, old)
+    _indexed_keys[id(entry)] = keys
+    status, request_type, user_id, plugin_ids = keys
+    _bucket_add(_status_index, status, entry)
+    _bucket_add(_type_index, request_type, entry)
+    if user_id is not None:
+        _bucket_add(_user_index, user_id, entry)
+    for plugin_id in plugin_ids:
+        _bucket_add(_plugin_id_index, plugin_id, entry)
+
+
+def _in_list_order(entries: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return sorted(entries, key=lambda entry: _request_seq[id(entry)])
+
+
+def _on_storage_event(event: StorageEvent) -> None:
+    global _requests_cache, _route_tokens_ready
+    # Local saves come from this module, whose indexes are already current.
+    if event.doc_key != "requests" or not event.remote or _requests_cache is None:
+        return
+    if event.upserted is None:
+        _requests_cache = None
+        return
+    for request_id in event.deleted or ():
+        entry = _id_index.pop(request_id, None)
+        if entry is not None:
+            _unindex_request(entry)
+    _id_index.update(event.upserted)
+    for entry in event.upserted.values():
+        _index_request(entry)
+    _route_tokens_ready = False
+
+
+subscribe_storage_events(_on_storage_event)
+
+
+def _save_requests_list(*changed_ids: str) -> None:
+    """Persist the requests list; ``changed_ids`` limits re-serialization to those rows."""
     if _requests_cache is not None:
-        save_requests({"requests": _requests_cache})
+        save_requests({"requests": _requests_cache}, changed=changed_ids or None)
 
 
 def _route_token_candidate(request_id: str, nonce: int = 0) -> str:
@@ -127,7 +353,7 @@ def _ensure_all_request_route_tokens() -> List[Dict[str, Any]]:
     reserved = set(request_ids)
     reserved.update(last_valid_owner)
     rebuilt_index: Dict[str, Dict[str, Any]] = {}
-    changed = False
+    changed: List[str] = []
     for entry in requests:
         if not isinstance(entry, dict) or not entry.get("id"):
             continue
@@ -139,11 +365,11 @@ def _ensure_all_request_route_tokens() -> List[Dict[str, Any]]:
             nonce = 0
             while True:
                 token = _route_token_candidate(request_id, nonce)
-                if token not in reserved:
+                if token not in reserved and not _is_archived_key(token):
                     break
                 nonce += 1
             entry["route_token"] = token
-            changed = True
+            changed.append(request_id)
         reserved.add(token)
         rebuilt_index[token] = entry
 
@@ -152,13 +378,124 @@ def _ensure_all_request_route_tokens() -> List[Dict[str, Any]]:
     _route_tokens_ready = True
     _route_tokens_source_id = id(requests)
     if changed:
-        _save_requests_list()
+        _save_requests_list(*changed)
     return requests
 
 
 def _find_request_by_route_token(value: str) -> Optional[Dict[str, Any]]:
     _ensure_all_request_route_tokens()
-    return _route_token_index.get(value)
+    entry = _route_token_index.get(value)
+    if entry is None and _REQUEST_ROUTE_TOKEN_RE.fullmatch(value):
+        entry = _archived_request(value)
+    return entry
+
+
+def _remember_archived(entry: Dict[str, Any]) -> Dict[str, Any]:
+    request_id = str(entry.get("id") or "")
+    known = _archived_entries.get(request_id)
+    if known is not None:
+        _archived_entries.move_to_end(request_id)
+        return known
+    _archived_entries[request_id] = entry
+    if len(_archived_entries) > _ARCHIVED_ENTRIES_SIZE:
+        _archived_entries.popitem(last=False)
+    return entry
+
+
+def load_archived_request_keys() -> None:
+    global _archived_ids
+    ids: set[str] = set()
+    tokens: Dict[str, str] = {}
+    for request_id, route_token in load_archived_request_index():
+        ids.add(request_id)
+        if route_token:
+            tokens.setdefault(route_token, request_id)
+    _archived_tokens.clear()
+    _archived_tokens.update(tokens)
+    _archived_ids = ids
+
+
+def _archived_id(key: str) -> Optional[str]:
+    """Id of the archived request whose id or route token is ``key``."""
+    if _archived_ids is None:
+        load_archived_request_keys()
+    if key in _archived_ids:
+        return key
+    return _archived_tokens.get(key)
+
+
+def _is_archived_key(value: str) -> bool:
+    return _archived_id(value) is not None
+
+
+def _remember_archived_keys(entries: Iterable[Dict[str, Any]]) -> None:
+    if _archived_ids is None:
+        return
+    for entry in entries:
+        request_id = str(entry.get("id") or "")
+        _archived_ids.add(request_id)
+        route_token = str(entry.get("route_token") or "").strip()
+        if route_token:
+            _archived_tokens.setdefault(route_token, request_id)
+
+
+def _forget_archived_keys(request_id: str) -> None:
+    if _archived_ids is None:
+        return
+    _archived_ids.discard(request_id)
+    for token in [token for token, owner in _archived_tokens.items() if owner == request_id]:
+        del _archived_tokens[token]
+
+
+def _archived_request(key: str) -> Optional[Dict[str, Any]]:
+    """Look ``key`` (a request id or route token) up in the archive."""
+    request_id = _archived_id(key)
+    if request_id is None or request_id in _id_index:
+        return None
+    entry = _archived_entries.get(request_id)
+    if entry is not None:
+        _archived_entries.move_to_end(request_id)
+        return entry
+    entry = load_archived_request(request_id)
+    if entry is None or str(entry.get("id") or "") in _id_index:
+        return None
+    return _remember_archived(entry)
+
+
+async def _prefetch_archived_request(key: str) -> None:
+    # Loads a cold archived entry off the event loop, so the synchronous
+    # lookup that follows is served from _archived_entries.
+    request_id = _archived_id(key) if key else None
+    if request_id is None or request_id in _id_index or request_id in _archived_entries:
+        return
+    entry = await asyncio.to_thread(load_archived_request, request_id)
+    if entry is not None and str(entry.get("id") or "") not in _id_index:
+        _remember_archived(entry)
+
+
+def _hot_request(request_id: str) -> Optional[Dict[str, Any]]:
+    """Return the live entry for ``request_id``, restoring it from the archive."""
+    _get_requests_list()
+    entry = _id_index.get(request_id)
+    if entry is not None:
+        return entry
+    entry = _archived_request(request_id)
+    if entry is None:
+        return None
+    # The archived row stays behind until the request is archived again;
+    # lookups always prefer the hot copy.
+    _archived_entries.pop(request_id, None)
+    _get_requests_list().append(entry)
+    _id_index[request_id] = entry
+    _index_request(entry)
+    route_token = str(entry.get("route_token") or "").strip()
+    if _REQUEST_ROUTE_TOKEN_RE.fullmatch(route_token):
+        _route_token_index.setdefault(route_token, entry)
+    return entry
+
+
+def _is_reserved_request_value(value: str, reserved: set[str]) -> bool:
+    return value in reserved or _is_archived_key(value)
 
 
 def _touch_request(entry: Dict[str, Any]) -> None:
@@ -180,7 +517,7 @@ def add_request(payload: Dict[str, Any], request_type: str = "new") -> Dict[str,
     reserved_values = _reserved_request_values(requests)
     final_id = base_id
     suffix = 1
-    while final_id in reserved_values:
+    while _is_reserved_request_value(final_id, reserved_values):
         final_id = f"{base_id}+{suffix}"
         suffix += 1
 
@@ -196,6 +533,7 @@ def add_request(payload: Dict[str, Any], request_type: str = "new") -> Dict[str,
     
     requests.append(entry)
     _id_index[final_id] = entry
+    _index_request(entry)
     _route_tokens_ready = False
     _ensure_all_request_route_tokens()
     
@@ -214,7 +552,7 @@ def add_draft_request(payload: Dict[str, Any], request_type: str = "new") -> Dic
     reserved_values = _reserved_request_values(requests)
     final_id = base_id
     suffix = 1
-    while final_id in reserved_values:
+    while _is_reserved_request_value(final_id, reserved_values):
         final_id = f"{base_id}+{suffix}"
         suffix += 1
 
@@ -230,6 +568,7 @@ def add_draft_request(payload: Dict[str, Any], request_type: str = "new") -> Dic
 
     requests.append(entry)
     _id_index[final_id] = entry
+    _index_request(entry)
     _route_tokens_ready = False
     _ensure_all_request_route_tokens()
 
@@ -237,32 +576,40 @@ def add_draft_request(payload: Dict[str, Any], request_type: str = "new") -> Dic
 
 
 def get_requests(status: str = "pending", request_type: Optional[str] = None) -> List[Dict[str, Any]]:
-    requests = _get_requests_list()
-    result = [req for req in requests if req.get("status") == status]
+    _get_requests_list()
+    result = _status_index.get(status, {}).values()
     if request_type:
         result = [req for req in result if req.get("type") == request_type]
-    return result
+    return _in_list_order(result)
+
+
+def count_requests(status: str, request_type: Optional[str] = None) -> int:
+    _get_requests_list()
+    if request_type:
+        return len(get_requests(status, request_type))
+    return len(_status_index.get(status, ()))
 
 
 def get_all_requests(request_type: Optional[str] = None) -> List[Dict[str, Any]]:
-    requests = list(_get_requests_list())
+    requests = _get_requests_list()
     if request_type:
-        requests = [req for req in requests if req.get("type") == request_type]
-    return requests
+        return _in_list_order(_type_index.get(request_type, {}).values())
+    return list(requests)
 
 
 def get_user_requests(user_id: int) -> List[Dict[str, Any]]:
-    requests = _get_requests_list()
-    return [
-        req
-        for req in requests
-        if req.get("payload", {}).get("user_id") == user_id
-    ]
+    _get_requests_list()
+    if not isinstance(user_id, (int, str)):
+        return []
+    return _in_list_order(_user_index.get(user_id, {}).values())
 
 
 def get_request_by_id(request_id: str) -> Optional[Dict[str, Any]]:
     _get_requests_list()
-    return _id_index.get(request_id)
+    entry = _id_index.get(request_id)
+    if entry is None and request_id:
+        entry = _archived_request(request_id)
+    return entry
 
 
 def _request_plugin_ids(entry: Dict[str, Any]) -> set[str]:
@@ -295,21 +642,28 @@ def get_request_by_plugin_id(
     target = str(plugin_id or "").strip()
     if not target:
         return None
+    _get_requests_list()
     # Requests are appended to storage. Prefer the newest matching request so
     # an old published/rejected submission does not hide a pending update.
-    for entry in reversed(_get_requests_list()):
-        if statuses is not None and entry.get("status") not in statuses:
-            continue
-        if target in _request_plugin_ids(entry):
-            return entry
+    matches = [
+        entry
+        for entry in _plugin_id_index.get(target, {}).values()
+        if statuses is None or entry.get("status") in statuses
+    ]
+    if matches:
+        return max(matches, key=lambda entry: _request_seq[id(entry)])
+    if statuses is not None and not set(statuses) - HOT_STATUSES:
+        return None
+    for entry in find_archived_requests(target, statuses=statuses):
+        if str(entry.get("id") or "") not in _id_index:
+            return _remember_archived(entry)
     return None
 
 
 def request_deeplink_token(request_id: str) -> str:
     """Return the persisted, Bot API-safe routing token for a request."""
     value = str(request_id or "").strip()
-    _ensure_all_request_route_tokens()
-    entry = get_request_by_id(value) or _route_token_index.get(value)
+    entry = get_request_by_id(value) or _find_request_by_route_token(value)
     if not entry:
         raise ValueError(f"Unknown request id: {value!r}")
     return str(entry["route_token"])
@@ -336,6 +690,22 @@ def get_request_by_callback_token(token: str) -> Optional[Dict[str, Any]]:
     return _find_request_by_route_token(value) or get_request_by_id(value)
 
 
+async def get_request_by_id_async(request_id: str) -> Optional[Dict[str, Any]]:
+    """Like :func:`get_request_by_id`, reading an archived entry in a thread."""
+    await _prefetch_archived_request(str(request_id or "").strip())
+    return get_request_by_id(request_id)
+
+
+async def get_request_by_deeplink_token_async(token: str) -> Optional[Dict[str, Any]]:
+    await _prefetch_archived_request(str(token or "").strip())
+    return get_request_by_deeplink_token(token)
+
+
+async def get_request_by_callback_token_async(token: str) -> Optional[Dict[str, Any]]:
+    await _prefetch_archived_request(str(token or "").strip())
+    return get_request_by_callback_token(token)
+
+
 def _relocate_request_files(entry: Dict[str, Any], subdir: str) -> None:
     try:
         from bot.helpers import get_uploads_subdir
@@ -350,7 +720,8 @@ def _relocate_request_files(entry: Dict[str, Any], subdir: str) -> None:
         if not isinstance(item, dict):
             continue
         raw = item.get("file_path")
-        if not raw:
+        # Blobs are shared between requests and never move.
+        if not raw or is_blob_path(raw):
             continue
         src = Path(raw)
         dest = dest_dir / src.name
@@ -377,7 +748,7 @@ def update_request_status(
     actor: Optional[str] = None,
     actor_id: Optional[int] = None,
 ) -> bool:
-    entry = get_request_by_id(request_id)
+    entry = _hot_request(request_id)
     if not entry:
         return False
 
@@ -401,24 +772,26 @@ def update_request_status(
         "actor_id": int(actor_id) if actor_id else 0,
         "changed_at": _now_utc().isoformat(),
     })
+    _index_request(entry)
     
-    _save_requests_list()
+    _save_requests_list(request_id)
     return True
 
 
 def update_request_payload(request_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    entry = get_request_by_id(request_id)
+    entry = _hot_request(request_id)
     if not entry:
         return None
 
     entry.setdefault("payload", {}).update(fields)
     _touch_request(entry)
-    _save_requests_list()
+    _index_request(entry)
+    _save_requests_list(request_id)
     return entry
 
 
 def promote_draft_request(request_id: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    entry = get_request_by_id(request_id)
+    entry = _hot_request(request_id)
     if not entry:
         return None
 
@@ -426,59 +799,61 @@ def promote_draft_request(request_id: str, payload: Dict[str, Any]) -> Optional[
     entry["status"] = "pending"
     entry["submitted_at"] = _now_utc().isoformat()
     _touch_request(entry)
-    _save_requests_list()
+    _index_request(entry)
+    _save_requests_list(request_id)
     return entry
 
 
+def _release_request_files(entry: Dict[str, Any]) -> bool:
+    payload = entry.get("payload")
+    if not isinstance(payload, dict):
+        return False
+    released = False
+    for key in ("plugin", "icon"):
+        item = payload.get(key)
+        if isinstance(item, dict) and release_upload(item):
+            released = True
+    return released
+
+
+def release_request_files(request_id: str) -> bool:
+    """Let go of the uploaded files of a request that no longer needs them."""
+    entry = _hot_request(request_id)
+    if not entry or not _release_request_files(entry):
+        return False
+    _save_requests_list(request_id)
+    return True
+
+
 def delete_request_and_file(request_id: str) -> bool:
     entry = get_request_by_id(request_id)
     if entry:
-        payload = entry.get("payload", {})
-        plugin_path = (payload.get("plugin") or {}).get("file_path")
-        icon_path = (payload.get("icon") or {}).get("file_path")
-        for path in (plugin_path, icon_path):
-            if path:
-                Path(path).unlink(missing_ok=True)
+        _release_request_files(entry)
     return delete_request(request_id)
 
 
 def collect_draft_reminders() -> List[Dict[str, Any]]:
+    _get_requests_list()
     now = _now_utc()
+    window = (_draft_expiration - _draft_reminder_before).total_seconds()
     reminders: List[Dict[str, Any]] = []
-    for entry in list(_get_requests_list()):
-        if entry.get("status") != "draft":
-            continue
-        if entry.get("reminder_sent_at"):
+    for entry, touched in _pop_timers(_TIMER_REMIND, now.timestamp(), window):
+        # A draft already past expiry is removed without a reminder.
+        if now.timestamp() - touched >= _draft_expiration.total_seconds():
             continue
-        updated_at = entry.get("updated_at") or entry.get("submitted_at")
-        if not updated_at:
-            continue
-        updated_dt = _parse_datetime_utc(updated_at)
-        if updated_dt is None:
-            continue
-        age = now - updated_dt
-        if age >= (_draft_expiration - _draft_reminder_before) and age < _draft_expiration:
-            entry["reminder_sent_at"] = now.isoformat()
-            reminders.append(entry)
+        entry["reminder_sent_at"] = now.isoformat()
+        reminders.append(entry)
     if reminders:
-        _save_requests_list()
+        _save_requests_list(*(str(entry.get("id")) for entry in reminders))
     return reminders
 
 
 def cleanup_expired_drafts() -> int:
+    _get_requests_list()
     removed = 0
-    now = _now_utc()
-    for entry in list(_get_requests_list()):
-        if entry.get("status") != "draft":
-            continue
-        updated_at = entry.get("updated_at") or entry.get("submitted_at")
-        if not updated_at:
-            continue
-        updated_dt = _parse_datetime_utc(updated_at)
-        if updated_dt is None:
-            continue
-        if now - updated_dt > _draft_expiration:
-            delete_request_and_file(entry.get("id", ""))
+    expired = _pop_timers(_TIMER_EXPIRE, _now_utc().timestamp(), _draft_expiration.total_seconds())
+    for entry, _ in expired:
+        if delete_request_and_file(entry.get("id", "")):
             removed += 1
     if removed:
         logger.info("Draft cleanup removed %s entries", removed)
@@ -488,12 +863,9 @@ def cleanup_expired_drafts() -> int:
 def discard_user_drafts(user_id: int, plugin_id: Optional[str] = None) -> int:
     target = str(plugin_id).strip() if plugin_id else None
     removed = 0
-    for entry in list(_get_requests_list()):
+    for entry in get_user_requests(user_id):
         if entry.get("status") != "draft":
             continue
-        payload = entry.get("payload", {}) if isinstance(entry, dict) else {}
-        if not isinstance(payload, dict) or payload.get("user_id") != user_id:
-            continue
         if target and target not in _request_plugin_ids(entry):
             continue
         if delete_request_and_file(entry.get("id", "")):
@@ -503,12 +875,15 @@ def discard_user_drafts(user_id: int, plugin_id: Optional[str] = None) -> int:
     return removed
 
 
-def cleanup_orphan_plugin_files() -> int:
+async def cleanup_orphan_plugin_files() -> int:
     from bot.helpers import get_uploads_dir
 
+    removed = await sweep_orphan_blobs_async()
     attachments_dir = get_uploads_dir()
     if not attachments_dir.exists():
-        return 0
+        return removed
+    # Files uploaded before the blob store still need the full scan.
+    legacy_dirs = [path for path in attachments_dir.iterdir() if path.is_dir() and path.name != BLOBS_SUBDIR]
     active_paths = set()
     for entry in _get_requests_list():
         payload = entry.get("payload", {})
@@ -516,14 +891,14 @@ def cleanup_orphan_plugin_files() -> int:
             item = payload.get(key)
             if isinstance(item, dict) and item.get("file_path"):
                 active_paths.add(Path(item["file_path"]).resolve())
-    removed = 0
-    for file_path in attachments_dir.rglob("*.plugin"):
+    legacy_removed = 0
+    for file_path in (path for folder in legacy_dirs for path in folder.rglob("*.plugin")):
         if file_path.resolve() not in active_paths:
             file_path.unlink(missing_ok=True)
-            removed += 1
-    if removed:
-        logger.info("Removed %s orphan .plugin files", removed)
-    return removed
+            legacy_removed += 1
+    if legacy_removed:
+        logger.info("Removed %s orphan .plugin files", legacy_removed)
+    return removed + legacy_removed
 
 
 REJECTED_RETENTION_DAYS = 7
@@ -538,43 +913,115 @@ def _rejected_at(entry: Dict[str, Any]) -> Optional[datetime]:
 
 
 def cleanup_rejected_files(days: int = REJECTED_RETENTION_DAYS) -> int:
-    now = _now_utc()
-    removed = 0
-    for entry in _get_requests_list():
-        if entry.get("status") != "rejected":
-            continue
-        stamp = _rejected_at(entry)
-        if not stamp or (now - stamp) < timedelta(days=days):
-            continue
+    _get_requests_list()
+    purged_ids: List[str] = []
+    window = timedelta(days=days).total_seconds()
+    for entry, _ in _pop_timers(_TIMER_PURGE_FILES, _now_utc().timestamp(), window):
         payload = entry.get("payload") if isinstance(entry.get("payload"), dict) else {}
-        if not payload or payload.get("files_purged"):
-            continue
-        purged = False
-        for key in ("plugin", "icon"):
-            item = payload.get(key)
-            if not isinstance(item, dict):
-                continue
-            raw = item.get("file_path")
-            if raw and Path(raw).exists():
-                Path(raw).unlink(missing_ok=True)
-                purged = True
-        if purged:
+        if _release_request_files(entry):
             payload["files_purged"] = True
-            removed += 1
-    if removed:
-        _save_requests_list()
-        logger.info("Purged files of %s rejected request(s) older than %sd", removed, days)
-    return removed
+            purged_ids.append(str(entry.get("id")))
+    if purged_ids:
+        _save_requests_list(*purged_ids)
+        logger.info("Purged files of %s rejected request(s) older than %sd", len(purged_ids), days)
+    return len(purged_ids)
+
+
+def _archive_after() -> timedelta:
+    cfg = load_config()
+    raw = (cfg.get("moderation") or {}).get("archive_after_days") if isinstance(cfg, dict) else None
+    try:
+        days = float(raw) if raw is not None else ARCHIVE_AFTER_DAYS
+    except (TypeError, ValueError):
+        days = ARCHIVE_AFTER_DAYS
+    return timedelta(days=max(0.0, days))
+
+
+def _request_touched_at(entry: Dict[str, Any]) -> Optional[datetime]:
+    return _parse_datetime_utc(entry.get("updated_at") or entry.get("decided_at") or entry.get("submitted_at"))
+
+
+async def archive_stale_requests(after: Optional[timedelta] = None) -> int:
+    """Move requests outside HOT_STATUSES that are older than ``after`` to the archive."""
+    _get_requests_list()
+    cutoff = _now_utc() - (_archive_after() if after is None else after)
+    stale = []
+    for status, bucket in _status_index.items():
+        if status in HOT_STATUSES:
+            continue
+        for entry in bucket.values():
+            touched = _request_touched_at(entry)
+            if entry.get("id") and (touched is None or touched <= cutoff):
+                stale.append(entry)
+    if not stale:
+        return 0
+    stale = _in_list_order(stale)
+    stamps = {id(entry): entry.get("updated_at") for entry in stale}
+    await archive_requests_async((entry, _request_plugin_ids(entry)) for entry in stale)
+    _remember_archived_keys(stale)
+
+    # Requests touched while the archive was written stay hot; their archived
+    # copy is replaced when they are archived again.
+    moved = [
+        entry
+        for entry in stale
+        if _id_index.get(entry["id"]) is entry
+        and entry.get("status") not in HOT_STATUSES
+        and entry.get("updated_at") == stamps[id(entry)]
+    ]
+    if not moved:
+        return 0
+    dropped = {id(entry) for entry in moved}
+    requests = _get_requests_list()
+    requests[:] = [entry for entry in requests if id(entry) not in dropped]
+    for entry in moved:
+        _id_index.pop(entry["id"], None)
+        _unindex_request(entry)
+        route_token = str(entry.get("route_token") or "").strip()
+        if _route_token_index.get(route_token) is entry:
+            _route_token_index.pop(route_token, None)
+    _save_requests_list(*(str(entry["id"]) for entry in moved))
+    logger.info("Archived %s request(s)", len(moved))
+    return len(moved)
+
+
+async def _wait_for_timers(wakeup: asyncio.Event, timeout: float) -> None:
+    try:
+        await asyncio.wait_for(wakeup.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
 
 
 async def _cleanup_loop() -> None:
+    wakeup = _timer_wakeups[_TIMER_EXPIRE]
+    next_archive = time.monotonic() + _cleanup_interval_seconds
     while True:
-        await asyncio.sleep(_cleanup_interval_seconds)
+        _get_requests_list()
+        wakeup.clear()
+        now = _now_utc().timestamp()
+        delays = [
+            _next_timer_in(_TIMER_EXPIRE, now, _draft_expiration.total_seconds()),
+            _next_timer_in(_TIMER_PURGE_FILES, now, timedelta(days=REJECTED_RETENTION_DAYS).total_seconds()),
+        ]
+        timeout = min([next_archive - time.monotonic()] + [delay for delay in delays if delay is not None])
+        if timeout > 0:
+            await _wait_for_timers(wakeup, timeout)
+            continue
         cleanup_expired_drafts()
         try:
             cleanup_rejected_files()
         except Exception:
             logger.exception("cleanup_rejected_files failed")
+        if time.monotonic() >= next_archive:
+            next_archive = time.monotonic() + _cleanup_interval_seconds
+            try:
+                await archive_stale_requests()
+            except Exception:
+                logger.exception("archive_stale_requests failed")
+            try:
+                await sweep_orphan_blobs_async()
+            except Exception:
+                logger.exception("sweep_orphan_blobs failed")
 
 
 async def _reminder_loop(bot) -> None:
@@ -582,8 +1029,17 @@ async def _reminder_loop(bot) -> None:
     from bot.context import get_lang
     from bot.texts import t
 
+    wakeup = _timer_wakeups[_TIMER_REMIND]
     while True:
-        await asyncio.sleep(_reminder_interval_seconds)
+        _get_requests_list()
+        wakeup.clear()
+        window = (_draft_expiration - _draft_reminder_before).total_seconds()
+        delay = _next_timer_in(_TIMER_REMIND, _now_utc().timestamp(), window)
+        # The cap picks timers up again after the requests cache is dropped.
+        timeout = _reminder_interval_seconds if delay is None else min(delay, _reminder_interval_seconds)
+        if timeout > 0:
+            await _wait_for_timers(wakeup, timeout)
+            continue
         reminders = collect_draft_reminders()
         if not reminders:
             continue
@@ -613,6 +1069,9 @@ def start_draft_cleanup_worker() -> None:
         loop = asyncio.get_running_loop()
     except RuntimeError:
         return
+    wakeup = asyncio.Event()
+    _timer_wakeups[_TIMER_EXPIRE] = wakeup
+    _timer_wakeups[_TIMER_PURGE_FILES] = wakeup
     _cleanup_task = loop.create_task(_cleanup_loop())
 
 
@@ -624,6 +1083,7 @@ def start_draft_reminder_worker(bot) -> None:
         loop = asyncio.get_running_loop()
     except RuntimeError:
         return
+    _timer_wakeups[_TIMER_REMIND] = asyncio.Event()
     _reminder_task = loop.create_task(_reminder_loop(bot))
 
 
@@ -651,91 +1111,199 @@ async def stop_draft_reminder_worker() -> None:
     await _cancel_worker(task)
 
 
-async def _scheduled_publish_loop(bot) -> None:
-    from aiogram.enums import ParseMode
-    from bot.context import get_lang
-    from bot.texts import t
+def _scheduled_retry_delay(attempts: int) -> timedelta:
+    return min(_scheduled_retry_base * (2 ** min(max(attempts, 1) - 1, 16)), _scheduled_retry_max)
 
-    while True:
-        await asyncio.sleep(_scheduled_interval_seconds)
-        now = _now_utc()
-        for entry in list(get_requests(status="scheduled")):
-            request_id = entry.get("id")
-            if not request_id:
-                continue
 
-            payload = entry.get("payload", {})
-            scheduled_at = payload.get("scheduled_at")
-            if not scheduled_at or not isinstance(scheduled_at, str):
-                continue
+def _scheduled_channel(payload: Dict[str, Any]) -> str:
+    """Config section of the channel a scheduled request is posted to."""
+    return "icons_channel" if payload.get("submission_type") == "icon" or payload.get("icon") else "channel"
 
-            if not _scheduled_time_is_due(scheduled_at, now):
-                continue
 
+def _flood_wait_seconds(exc: BaseException) -> Optional[float]:
+    from aiogram.exceptions import TelegramRetryAfter
+    from telethon.errors import FloodWaitError
+
+    if isinstance(exc, TelegramRetryAfter):
+        return float(exc.retry_after or 1)
+    if isinstance(exc, FloodWaitError):
+        return float(exc.seconds or 1)
+    return None
+
+
+def _still_scheduled(entry: Dict[str, Any]) -> bool:
+    """Whether ``entry`` is still the live, due, scheduled request.
+
+    A publish can wait a long time for its channel and for flood limits; an
+    admin may cancel, reject, delete or publish the request meanwhile.
+    """
+    request_id = str(entry.get("id") or "")
+    if not request_id or _id_index.get(request_id) is not entry or entry.get("status") != "scheduled":
+        return False
+    payload = entry.get("payload")
+    scheduled_at = _parse_datetime_utc(payload.get("scheduled_at")) if isinstance(payload, dict) else None
+    return scheduled_at is not None and scheduled_at <= _now_utc()
+
+
+async def _post_scheduled_request(bot, entry: Dict[str, Any], channel: str) -> Optional[Dict[str, Any]]:
+    """Post ``entry`` to ``channel``; ``None`` if it stopped being due meanwhile."""
+    from bot.services.publish import publish_icon, publish_plugin
+
+    # The channel lock is taken before a publish slot, so requests queued
+    # behind one channel do not hold slots other channels could use.
+    lock = _scheduled_channel_locks.setdefault(channel, asyncio.Lock())
+    attempt = 0
+    async with lock:
+        while True:
             try:
-                from bot.services.publish import publish_icon, publish_plugin
-                from bot.services.admin_notifications import finalize_admin_notify_messages
-                from bot.services.audit import add_audit_event
-                from bot.services.moderation import delete_forum_request_message
-
-                logger.info("Publishing scheduled request %s", request_id)
-
-                if payload.get("submission_type") == "icon" or payload.get("icon"):
-                    result = await publish_icon(entry)
-                    notify_key = "notify_icon_published"
-                    name = (payload.get("icon") or {}).get("name", "")
-                    version = (payload.get("icon") or {}).get("version")
-                else:
-                    result = await publish_plugin(entry, bot)
-                    notify_key = "notify_published"
-                    name = (payload.get("plugin") or {}).get("name", "")
-                    version = (payload.get("plugin") or {}).get("version")
-
-                update_request_payload(request_id, {"scheduled_at": None})
-                update_request_status(request_id, "published")
-                await finalize_admin_notify_messages(bot, entry, "Заявка была принята по расписанию", "<code>scheduler</code>")
-                await delete_forum_request_message(bot, entry)
-                add_audit_event(
-                    "moderation.scheduled_publish_success",
-                    actor="scheduler",
-                    request_id=str(request_id),
-                    details={"link": result.get("link", ""), "name": name, "version": version},
+                async with _scheduled_slots:
+                    if not _still_scheduled(entry):
+                        return None
+                    if channel == "icons_channel":
+                        return await publish_icon(entry)
+                    return await publish_plugin(entry, bot)
+            except Exception as exc:
+                # Nothing is posted when the flood limit trips, so the post is
+                # retried while the channel lock keeps later posts waiting.
+                wait = _flood_wait_seconds(exc)
+                if wait is None or attempt >= _scheduled_flood_retries or wait > _scheduled_flood_wait_max:
+                    raise
+                attempt += 1
+                logger.warning(
+                    "event=scheduled_publish.flood_wait request_id=%s channel=%s wait=%.0f",
+                    entry.get("id"),
+                    channel,
+                    wait,
                 )
+                await asyncio.sleep(wait)
 
-                user_id = payload.get("user_id")
-                if user_id:
-                    lang = get_lang(user_id)
-                    try:
-                        await bot.send_message(
-                            user_id,
-                            t(notify_key, lang, name=name or "—", version=version or "—"),
-                            parse_mode=ParseMode.HTML,
-                            disable_web_page_preview=True,
-                        )
-                    except Exception:
-                        pass
 
-            except Exception as exc:
-                logger.exception("Scheduled publish error")
-                retry_at = datetime.now(timezone.utc) + timedelta(minutes=10)
-                update_request_payload(
-                    request_id,
-                    {
-                        "last_publish_error": str(exc),
-                        "last_publish_error_at": datetime.now(timezone.utc).isoformat(),
-                        "scheduled_at": retry_at.isoformat(),
-                    },
+async def _publish_scheduled_request(bot, entry: Dict[str, Any], due: float) -> None:
+    from aiogram.enums import ParseMode
+    from bot.context import get_lang
+    from bot.texts import t
+
+    request_id = entry.get("id")
+    if not request_id:
+        return
+    payload = entry.get("payload", {})
+    channel = _scheduled_channel(payload)
+    started = time.monotonic()
+    try:
+        from bot.services.admin_notifications import finalize_admin_notify_messages
+        from bot.services.audit import add_audit_event
+        from bot.services.moderation import delete_forum_request_message
+
+        logger.info("Publishing scheduled request %s", request_id)
+
+        result = await _post_scheduled_request(bot, entry, channel)
+        if result is None:
+            logger.info("event=scheduled_publish.dropped request_id=%s status=%s", request_id, entry.get("status"))
+            return
+        late = max(0.0, _now_utc().timestamp() - due)
+        logger.info(
+            "event=scheduled_publish.posted request_id=%s channel=%s late_ms=%d took_ms=%d",
+            request_id,
+            channel,
+            late * 1000,
+            (time.monotonic() - started) * 1000,
+        )
+        if channel == "icons_channel":
+            notify_key = "notify_icon_published"
+            name = (payload.get("icon") or {}).get("name", "")
+            version = (payload.get("icon") or {}).get("version")
+        else:
+            notify_key = "notify_published"
+            name = (payload.get("plugin") or {}).get("name", "")
+            version = (payload.get("plugin") or {}).get("version")
+
+        update_request_payload(request_id, {"scheduled_at": None, "publish_attempts": 0})
+        update_request_status(request_id, "published")
+        await finalize_admin_notify_messages(bot, entry, "Заявка была принята по расписанию", "<code>scheduler</code>")
+        await delete_forum_request_message(bot, entry)
+        add_audit_event(
+            "moderation.scheduled_publish_success",
+            actor="scheduler",
+            request_id=str(request_id),
+            details={
+                "link": result.get("link", ""),
+                "name": name,
+                "version": version,
+                "late_seconds": round(late, 1),
+            },
+        )
+
+        user_id = payload.get("user_id")
+        if user_id:
+            lang = get_lang(user_id)
+            try:
+                await bot.send_message(
+                    user_id,
+                    t(notify_key, lang, name=name or "—", version=version or "—"),
+                    parse_mode=ParseMode.HTML,
+                    disable_web_page_preview=True,
                 )
+            except Exception:
+                pass
+
+    except Exception as exc:
+        logger.exception("Scheduled publish error")
+        attempts = int(payload.get("publish_attempts") or 0) + 1
+        now = _now_utc()
+        update_request_payload(
+            request_id,
+            {
+                "last_publish_error": str(exc),
+                "last_publish_error_at": now.isoformat(),
+                "scheduled_at": (now + _scheduled_retry_delay(attempts)).isoformat(),
+                "publish_attempts": attempts,
+            },
+        )
+
+
+async def _run_scheduled_request(bot, entry: Dict[str, Any], due: float) -> None:
+    request_id = str(entry.get("id") or "")
+    # Rescheduling a request that is still being published re-arms it; the
+    # running publish settles it either way.
+    if request_id in _scheduled_running:
+        return
+    _scheduled_running.add(request_id)
+    try:
+        await _publish_scheduled_request(bot, entry, due)
+    finally:
+        _scheduled_running.discard(request_id)
+
+
+async def _scheduled_publish_loop(bot) -> None:
+    wakeup = _timer_wakeups[_TIMER_PUBLISH]
+    while True:
+        _get_requests_list()
+        wakeup.clear()
+        now = _now_utc().timestamp()
+        delay = _next_timer_in(_TIMER_PUBLISH, now)
+        if delay is None or delay > 0:
+            # Reschedules set ``wakeup``; the idle cap also covers a dropped
+            # requests cache and wall clock jumps.
+            timeout = _scheduled_idle_seconds if delay is None else min(delay, _scheduled_idle_seconds)
+            await _wait_for_timers(wakeup, timeout)
+            continue
+        for entry, due in _pop_timers(_TIMER_PUBLISH, now):
+            task = asyncio.create_task(_run_scheduled_request(bot, entry, due))
+            _scheduled_inflight.add(task)
+            task.add_done_callback(_scheduled_inflight.discard)
 
 
 def start_scheduled_publish_worker(bot) -> None:
-    global _scheduled_task
+    global _scheduled_task, _scheduled_slots
     if _scheduled_task and not _scheduled_task.done():
         return
     try:
         loop = asyncio.get_running_loop()
     except RuntimeError:
         return
+    _timer_wakeups[_TIMER_PUBLISH] = asyncio.Event()
+    _scheduled_slots = asyncio.Semaphore(_scheduled_concurrency)
+    _scheduled_channel_locks.clear()
     _scheduled_task = loop.create_task(_scheduled_publish_loop(bot))
 
 
@@ -744,6 +1312,10 @@ async def stop_scheduled_publish_worker() -> None:
     task = _scheduled_task
     _scheduled_task = None
     await _cancel_worker(task)
+    # Publishes already under way are left to finish rather than cut between
+    # the channel post and the catalog update.
+    if _scheduled_inflight:
+        await asyncio.gather(*_scheduled_inflight, return_exceptions=True)
 
 
 def delete_request(request_id: str) -> bool:
@@ -755,12 +1327,21 @@ def delete_request(request_id: str) -> bool:
         if req.get("id") == request_id:
             requests.pop(i)
             _id_index.pop(request_id, None)
+            _unindex_request(req)
             route_token = str(req.get("route_token") or "").strip()
             if _route_token_index.get(route_token) is req:
                 _route_token_index.pop(route_token, None)
-            _save_requests_list()
+            _save_requests_list(request_id)
+            # A request restored from the archive still has its archived row.
+            delete_archived_requests((request_id,))
+            _forget_archived_keys(request_id)
             return True
-    
+
+    if request_id and _archived_request(request_id) is not None:
+        _archived_entries.pop(request_id, None)
+        delete_archived_requests((request_id,))
+        _forget_archived_keys(request_id)
+        return True
     return False
 
 
@@ -769,22 +1350,32 @@ def delete_requests_by_plugin_id(plugin_id: str) -> int:
     if not target:
         return 0
 
+    _get_requests_list()
+    matches = _in_list_order(_plugin_id_index.get(target, {}).values())
+    matches.extend(find_archived_requests(target))
+    request_ids = [str(entry.get("id") or "") for entry in matches]
+    if get_request_by_id(target) is not None:
+        request_ids.append(target)
     removed = 0
-    for entry in list(_get_requests_list()):
-        request_id = str(entry.get("id") or "")
-        if request_id == target or target in _request_plugin_ids(entry):
-            if delete_request_and_file(request_id):
-                removed += 1
+    for request_id in dict.fromkeys(request_ids):
+        if delete_request_and_file(request_id):
+            removed += 1
     return removed
 
 
 def cleanup_hidden_requests(visible_statuses: Optional[set[str]] = None) -> int:
     visible = visible_statuses or {"draft", "pending", "scheduled", "error"}
+    _get_requests_list()
+    hidden = [
+        entry
+        for status, bucket in _status_index.items()
+        if str(status or "") not in visible
+        for entry in bucket.values()
+    ]
+    hidden.sort(key=lambda entry: _request_seq[id(entry)])
+    hidden.extend(find_archived_requests(exclude_statuses=visible))
     removed = 0
-    for entry in list(_get_requests_list()):
-        if str(entry.get("status") or "") in visible:
-            continue
-        request_id = str(entry.get("id") or "")
+    for request_id in dict.fromkeys(str(entry.get("id") or "") for entry in hidden):
         if request_id and delete_request_and_file(request_id):
             removed += 1
     return removed
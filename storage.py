@@ -1,15 +1,21 @@
 import asyncio
+import hashlib
 import json
 import random
+import re
 import logging
 import os
+import queue
 import sqlite3
 import threading
 import time
+import uuid
+from concurrent.futures import Future
 from copy import deepcopy
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 
 ROOT = Path(__file__).resolve().parent
 _CONFIG_META_KEY = "app_config"
@@ -90,6 +96,13 @@ SQLITE_PATH = _resolve_path(
     DATA_DIR / "storage.sqlite3",
 )
 
+# Opt-in FTS5 catalog search. The index lives in the same database and is kept
+# up to date by every writer once it exists; this only decides whether it gets
+# created and queried.
+FTS_SEARCH = str(
+    os.environ.get("STORAGE_FTS_SEARCH") or _storage_cfg.get("fts_search") or ""
+).strip().lower() in {"1", "true", "yes", "on"}
+
 _DOC_PLUGINS = "plugins"
 _DOC_ICONS = "icons"
 _DOC_REQUESTS = "requests"
@@ -106,7 +119,13 @@ _DOC_QUIZ = "quiz"
 
 _cache: Dict[str, Dict[str, Any]] = {}
 _cache_time: Dict[str, float] = {}
-_dirty: Dict[str, bool] = {}
+# Every mutation bumps the document generation; a document is clean once the
+# generation captured by its last written snapshot catches up.
+_generation: Dict[str, int] = {}
+_persisted_generation: Dict[str, int] = {}
+# Row keys callers reported changed since the last snapshot, or ``None`` when
+# unknown. Saves serialize only these rows; ``None`` means a full freeze.
+_changed_rows: Dict[str, Optional[set[str]]] = {}
 _save_locks: Dict[str, asyncio.Lock] = {}
 _last_save: Dict[str, float] = {}
 
@@ -126,6 +145,10 @@ _CONFIG_DEFAULTS: Dict[str, Any] = {
 
 _pending_save: Dict[str, bool] = {}
 _background_tasks: set = set()
+# While the revalidation task runs the in-memory documents are authoritative:
+# after another process commits, its change_log entries are merged in.
+_revalidate_task: Optional[asyncio.Task] = None
+_seen_foreign_writes = 0
 logger = logging.getLogger(__name__)
 
 
@@ -151,11 +174,33 @@ _config_cache: Optional[Dict[str, Any]] = None
 _config_cache_time: float = 0.0
 _config_generation = 0
 _config_persisted_generation = 0
-_config_write_lock = threading.Lock()
 
 _db_lock = threading.Lock()
 _db_ready = False
 
+_CONFIG_DOC = "config"
+_CHANGE_UPSERT = "upsert"
+_CHANGE_DELETE = "delete"
+_CHANGE_DOC = "doc"
+_CHANGE_LOG_RETENTION = 86400.0
+# Stamped on every change_log entry so a process can skip its own writes
+# while tailing the log.
+_ORIGIN = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+_change_cursor = 0
+_change_log_pruned_at = 0.0
+
+_CATALOG_DOCS = (_DOC_PLUGINS, _DOC_ICONS)
+_FTS_BUILT_KEY = "fts:catalog_built"
+_SLUG_TOKENS_BUILT_KEY = "slug_tokens:built"
+# (prefix, digest size) of every short token handed out for a slug: callback
+# data tokens and /start deep link tokens.
+SLUG_TOKEN_FORMS = (("t", 16), ("t", 10), ("p", 16))
+_FTS_TERM_RE = re.compile(r"\w+")
+# unicode61 only strips diacritics from Latin letters, so Cyrillic ё is
+# folded by hand on both the indexed text and the query.
+_FTS_FOLD = str.maketrans("ёЁ", "еЕ")
+_fts_ready = False
+
 
 class StorageError(RuntimeError):
     pass
@@ -285,7 +330,7 @@ def _is_doc_empty(doc_key: str, data: Dict[str, Any]) -> bool:
 
 
 def _ensure_db() -> None:
-    global _db_ready
+    global _db_ready, _change_cursor, _fts_ready
     if _db_ready:
         return
 
@@ -360,6 +405,83 @@ def _ensure_db() -> None:
             conn.execute("CREATE INDEX IF NOT EXISTS idx_requests_type ON requests_items(request_type)")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_requests_user ON requests_items(payload_user_id)")
 
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS requests_archive (
+                    request_id TEXT PRIMARY KEY,
+                    route_token TEXT,
+                    status TEXT,
+                    request_type TEXT,
+                    payload_user_id INTEGER,
+                    archived_at TEXT NOT NULL,
+                    payload TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_requests_archive_token ON requests_archive(route_token)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_requests_archive_status ON requests_archive(status)")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS requests_archive_plugins (
+                    plugin_id TEXT NOT NULL,
+                    request_id TEXT NOT NULL,
+                    PRIMARY KEY (plugin_id, request_id)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_requests_archive_plugins_request ON requests_archive_plugins(request_id)"
+            )
+
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS upload_blobs (
+                    sha256 TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    refs INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL,
+                    backed_up_at TEXT
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_upload_blobs_orphans ON upload_blobs(created_at) WHERE refs = 0"
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS upload_blob_refs (
+                    request_id TEXT NOT NULL,
+                    archived INTEGER NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    PRIMARY KEY (request_id, archived, sha256)
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_upload_blob_refs_sha ON upload_blob_refs(sha256)")
+
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS broadcast_jobs (
+                    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    status TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    lang TEXT,
+                    created_by INTEGER,
+                    chat_id INTEGER,
+                    message_id INTEGER,
+                    cursor INTEGER NOT NULL DEFAULT 0,
+                    total INTEGER NOT NULL DEFAULT 0,
+                    sent INTEGER NOT NULL DEFAULT 0,
+                    failed INTEGER NOT NULL DEFAULT 0,
+                    blocked INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_broadcast_jobs_status ON broadcast_jobs(status)")
+
             conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS users_items (
@@ -408,6 +530,50 @@ def _ensure_db() -> None:
                 """
             )
 
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS audit_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    created_at TEXT NOT NULL,
+                    event TEXT NOT NULL,
+                    actor_id INTEGER,
+                    actor TEXT,
+                    request_id TEXT,
+                    details TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_created_at ON audit_events(created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_event ON audit_events(event)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_actor ON audit_events(actor_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_request ON audit_events(request_id)")
+
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS change_log (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    doc_key TEXT NOT NULL,
+                    row_key TEXT,
+                    op TEXT NOT NULL,
+                    origin TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_change_log_created_at ON change_log(created_at)")
+
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS slug_tokens (
+                    token TEXT NOT NULL,
+                    doc_key TEXT NOT NULL,
+                    slug TEXT NOT NULL,
+                    PRIMARY KEY (token, doc_key)
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_slug_tokens_slug ON slug_tokens(doc_key, slug)")
+
             legacy_doc = "".join(
                 [
                     chr(115),
@@ -428,12 +594,57 @@ def _ensure_db() -> None:
                 (_meta_key(legacy_doc), _init_key(legacy_doc)),
             )
 
+            _fts_ready = _ensure_catalog_fts(conn)
+
             _migrate_from_kv_store(conn)
+            _migrate_audit_doc_to_rows(conn)
+            if _get_meta_value(conn, _SLUG_TOKENS_BUILT_KEY) != "1":
+                _rebuild_slug_tokens(conn)
+            if _fts_ready and _get_meta_value(conn, _FTS_BUILT_KEY) != "1":
+                _rebuild_catalog_fts(conn)
             conn.commit()
 
+            # Everything committed before this point is picked up by the
+            # first read of each document, so tailing starts here.
+            row = conn.execute("SELECT MAX(seq) FROM change_log").fetchone()
+            _change_cursor = int(row[0] or 0) if row else 0
+
         _db_ready = True
 
 
+def _ensure_catalog_fts(conn: sqlite3.Connection) -> bool:
+    if _table_exists(conn, "catalog_fts"):
+        return True
+    if not FTS_SEARCH:
+        return False
+    try:
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE catalog_fts USING fts5(
+                name,
+                body,
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+            """
+        )
+    except sqlite3.OperationalError as exc:
+        logger.warning("FTS5 is unavailable, catalog search stays in memory: %s", exc)
+        return False
+    # FTS5 rowids are tied to (doc_key, slug) here so single rows can be
+    # replaced without scanning the index.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS catalog_fts_keys (
+            id INTEGER PRIMARY KEY,
+            doc_key TEXT NOT NULL,
+            slug TEXT NOT NULL,
+            UNIQUE (doc_key, slug)
+        )
+        """
+    )
+    return True
+
+
 def _migrate_from_kv_store(conn: sqlite3.Connection) -> None:
     if not _table_exists(conn, "kv_store"):
         return
@@ -461,6 +672,18 @@ def _migrate_from_kv_store(conn: sqlite3.Connection) -> None:
     _set_meta_value(conn, "migration:kv_store_to_rows", "1")
 
 
+def _migrate_audit_doc_to_rows(conn: sqlite3.Connection) -> None:
+    if _get_meta_value(conn, "migration:audit_doc_to_rows") == "1":
+        return
+
+    doc = _read_audit_doc(conn)
+    events = [event for event in doc.get("events", []) if isinstance(event, dict)]
+    _insert_audit_events(conn, events)
+    doc["events"] = []
+    _set_meta_json(conn, _meta_key(_DOC_AUDIT), doc)
+    _set_meta_value(conn, "migration:audit_doc_to_rows", "1")
+
+
 def _read_items_payload(rows: list[sqlite3.Row]) -> list[Any]:
     out: list[Any] = []
     for row in rows:
@@ -477,142 +700,758 @@ def _loads_sqlite_json(value: Any) -> Any:
     return json.loads(value)
 
 
+_CATALOG_ROW_COLUMNS = ("slug", "status", "category", "updated_at", "published_at")
+_REQUEST_ROW_COLUMNS = (
+    "request_id",
+    "status",
+    "request_type",
+    "submitted_at",
+    "updated_at",
+    "payload_user_id",
+)
+_USER_ROW_COLUMNS = ("user_id", "language", "banned", "ban_reason")
+
+# Last persisted state of row-backed documents: row key -> (sort_order, payload).
+# A document is diffed against it on save so only changed rows hit SQLite.
+# ``None`` means the table state is unknown and the next save rewrites it.
+_row_state: Dict[str, Optional[Dict[str, tuple[Optional[int], str]]]] = {}
+_row_state_pending: Dict[str, Optional[Dict[str, tuple[Optional[int], str]]]] = {}
+_row_state_lock = threading.Lock()
+
+# Row keys another process changed that were already applied to ``_row_state``
+# but not yet merged into the cached document. Saves leave these rows alone so
+# a snapshot taken before the merge cannot revert or resurrect them.
+_remote_pending: Dict[str, set[str]] = {}
+
+
+@dataclass(frozen=True, slots=True)
+class _DocSnapshot:
+    doc_key: str
+    generation: int
+    meta: str
+    rows: Optional[tuple[tuple[tuple, str], ...]] = None
+    # Request id -> blob digests its payload claims; requests document only.
+    blob_refs: Optional[Dict[str, frozenset[str]]] = None
+    # Set when ``rows`` holds only the changed rows: keys to drop on top.
+    deleted: Optional[tuple[str, ...]] = None
+
+
+def _catalog_row_values(item: Any) -> tuple:
+    if not isinstance(item, dict):
+        return (None, None, None, None, None)
+    return (
+        item.get("slug"),
+        item.get("status"),
+        item.get("category"),
+        item.get("updated_at"),
+        item.get("published_at"),
+    )
+
+
+def _request_row_values(item: Any) -> tuple:
+    if not isinstance(item, dict):
+        return (None, None, None, None, None, None)
+    user_id = (item.get("payload") or {}).get("user_id")
+    return (
+        item.get("id"),
+        item.get("status"),
+        item.get("type"),
+        item.get("submitted_at"),
+        item.get("updated_at"),
+        user_id if isinstance(user_id, int) else None,
+    )
+
+
+def _user_row_values(user_id: Any, user_payload: Any) -> tuple:
+    if not isinstance(user_payload, dict):
+        user_payload = {}
+    language = user_payload.get("language")
+    ban_reason = user_payload.get("ban_reason")
+    return (
+        str(user_id),
+        language if isinstance(language, str) else None,
+        1 if user_payload.get("banned") else 0,
+        ban_reason if isinstance(ban_reason, str) else None,
+    )
+
+
+def _remember_rows(doc_key: str, rows: list[sqlite3.Row], key_column: str) -> None:
+    state: Optional[Dict[str, tuple[Optional[int], str]]] = {}
+    for row in rows:
+        key = row[key_column]
+        payload = row["payload"]
+        if isinstance(payload, bytes):
+            payload = payload.decode("utf-8", "replace")
+        if not isinstance(key, str) or not key or key in state:
+            state = None
+            break
+        order = row["sort_order"] if "sort_order" in row.keys() else None
+        state[key] = (order, payload)
+    with _row_state_lock:
+        _row_state[doc_key] = state
+        _row_state_pending.pop(doc_key, None)
+        _remote_pending.pop(doc_key, None)
+
+
+def _commit_row_state(doc_key: str) -> None:
+    with _row_state_lock:
+        if doc_key in _row_state_pending:
+            _row_state[doc_key] = _row_state_pending.pop(doc_key)
+
+
+def _discard_row_state(doc_key: str) -> None:
+    with _row_state_lock:
+        _row_state_pending.pop(doc_key, None)
+        _row_state[doc_key] = None
+
+
+def _detach_doc(doc_key: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Shallow-copy ``data`` and its row collection for ``_freeze_doc`` in a thread.
+
+    Rows added or removed on the loop meanwhile then cannot break the walk;
+    each row is serialized by a single ``json.dumps`` call.
+    """
+    payload = dict(data) if isinstance(data, dict) else {}
+    spec = _ROW_DOCS.get(doc_key)
+    items = payload.get(spec[0]) if spec is not None else None
+    if isinstance(items, (dict, list)):
+        payload[spec[0]] = items.copy()
+    return payload
+
+
+def _freeze_doc(doc_key: str, data: Dict[str, Any], generation: int = 0) -> _DocSnapshot:
+    """Capture all of ``data`` as immutable JSON so it can be written off the loop.
+
+    The writer diffs the rows against ``_row_state`` and only touches rows
+    that differ. Used when the changed rows are not known.
+    """
+    payload = dict(data) if isinstance(data, dict) else {}
+    payload.setdefault("updated_at", _now_iso())
+    spec = _ROW_DOCS.get(doc_key)
+    if spec is None:
+        return _DocSnapshot(doc_key, generation, json.dumps(payload, ensure_ascii=False))
+
+    collection_key = spec[0]
+    items = payload.pop(collection_key, None)
+    if doc_key == _DOC_USERS:
+        users = items if isinstance(items, dict) else {}
+        pairs = [(_user_row_values(user_id, user), user if isinstance(user, dict) else {}) for user_id, user in users.items()]
+    else:
+        values_of = spec[1]
+        pairs = [(values_of(item), item) for item in (items if isinstance(items, list) else [])]
+    rows = tuple((values, json.dumps(item, ensure_ascii=False)) for values, item in pairs)
+    blob_refs = None
+    if doc_key == _DOC_REQUESTS:
+        blob_refs = {values[0]: _request_blob_digests(item) for values, item in pairs if values[0]}
+    return _DocSnapshot(doc_key, generation, json.dumps(payload, ensure_ascii=False), rows, blob_refs)
+
+
+def _freeze_changed_rows(
+    doc_key: str,
+    data: Dict[str, Any],
+    changed: set[str],
+    generation: int = 0,
+) -> Optional[_DocSnapshot]:
+    """Capture only the ``changed`` rows of a row-backed document.
+
+    Changed keys missing from ``data`` are deleted. Returns ``None`` when the
+    rows cannot be written one by one: the persisted order is unknown, a key
+    repeats, or a new row sits before a persisted one (the writer appends
+    new rows at the end).
+    """
+    payload = dict(data) if isinstance(data, dict) else {}
+    payload.setdefault("updated_at", _now_iso())
+    collection_key, values_of = _ROW_DOCS[doc_key][:2]
+    items = payload.pop(collection_key, None)
+    pairs: list[tuple[tuple, Any]] = []
+    if doc_key == _DOC_USERS:
+        users = items if isinstance(items, dict) else {}
+        for key in changed:
+            if key in users:
+                user = users[key]
+                pairs.append((values_of(key, user), user if isinstance(user, dict) else {}))
+    else:
+        with _row_state_lock:
+            state = _row_state.get(doc_key)
+        if state is None or not isinstance(items, list):
+            return None
+        seen: set[str] = set()
+        last_persisted = -1
+        new_from = None
+        for index, item in enumerate(items):
+            key = values_of(item)[0]
+            if key in state:
+                last_persisted = index
+            if key not in changed:
+                continue
+            if key in seen:
+                return None
+            seen.add(key)
+            if key not in state and new_from is None:
+                new_from = index
+            pairs.append((values_of(item), item))
+        if new_from is not None and new_from < last_persisted:
+            return None
+    found = {values[0] for values, _ in pairs}
+    rows = tuple((values, json.dumps(item, ensure_ascii=False)) for values, item in pairs)
+    blob_refs = None
+    if doc_key == _DOC_REQUESTS:
+        blob_refs = {values[0]: _request_blob_digests(item) for values, item in pairs if values[0]}
+    return _DocSnapshot(
+        doc_key,
+        generation,
+        json.dumps(payload, ensure_ascii=False),
+        rows,
+        blob_refs,
+        tuple(key for key in changed if key not in found),
+    )
+
+
+def _log_changes(
+    conn: sqlite3.Connection,
+    doc_key: str,
+    changes: Iterable[tuple[Optional[str], str]],
+) -> None:
+    now = _now_iso()
+    conn.executemany(
+        "INSERT INTO change_log (doc_key, row_key, op, origin, created_at) VALUES (?, ?, ?, ?, ?)",
+        [(doc_key, row_key, op, _ORIGIN, now) for row_key, op in changes],
+    )
+
+
+def _fts_texts(item: Any) -> Optional[tuple[str, str]]:
+    if not isinstance(item, dict) or item.get("status") != "published":
+        return None
+    names: list[str] = []
+    body: list[Any] = []
+    for locale in ("ru", "en"):
+        locale_data = item.get(locale)
+        if not isinstance(locale_data, dict):
+            continue
+        names.append(str(locale_data.get("name") or ""))
+        body.extend([locale_data.get("description"), locale_data.get("usage")])
+    source = item.get("source")
+    if isinstance(source, dict):
+        body.extend([source.get("title"), source.get("username")])
+    body.extend([item.get("slug"), item.get("category")])
+    return (
+        " ".join(name for name in names if name).translate(_FTS_FOLD),
+        "\n".join(str(value) for value in body if value).translate(_FTS_FOLD),
+    )
+
+
+def _index_catalog_fts(
+    conn: sqlite3.Connection,
+    doc_key: str,
+    rows: Iterable[tuple[str, Optional[str]]],
+) -> None:
+    """Replace the FTS rows for ``(slug, payload)`` pairs; ``None`` payloads drop them."""
+    for slug, payload in rows:
+        row = conn.execute(
+            "SELECT id FROM catalog_fts_keys WHERE doc_key = ? AND slug = ?",
+            (doc_key, slug),
+        ).fetchone()
+        if row is not None:
+            conn.execute("DELETE FROM catalog_fts WHERE rowid = ?", (row[0],))
+        texts = _fts_texts(_loads_sqlite_json(payload)) if payload is not None else None
+        if texts is None:
+            if row is not None:
+                conn.execute("DELETE FROM catalog_fts_keys WHERE id = ?", (row[0],))
+            continue
+        if row is None:
+            row_id = conn.execute(
+                "INSERT INTO catalog_fts_keys (doc_key, slug) VALUES (?, ?)",
+                (doc_key, slug),
+            ).lastrowid
+        else:
+            row_id = row[0]
+        conn.execute("INSERT INTO catalog_fts (rowid, name, body) VALUES (?, ?, ?)", (row_id, *texts))
+
+
+def _reset_catalog_fts(conn: sqlite3.Connection, doc_key: str) -> None:
+    conn.execute(
+        "DELETE FROM catalog_fts WHERE rowid IN (SELECT id FROM catalog_fts_keys WHERE doc_key = ?)",
+        (doc_key,),
+    )
+    conn.execute("DELETE FROM catalog_fts_keys WHERE doc_key = ?", (doc_key,))
+
+
+def _rebuild_catalog_fts(conn: sqlite3.Connection) -> None:
+    conn.execute("DELETE FROM catalog_fts")
+    conn.execute("DELETE FROM catalog_fts_keys")
+    for doc_key in _CATALOG_DOCS:
+        table = _ROW_DOCS[doc_key][2]
+        rows = conn.execute(f"SELECT slug, payload FROM {table} ORDER BY sort_order").fetchall()
+        _index_catalog_fts(conn, doc_key, [(row[0], row[1]) for row in rows if row[0]])
+    _set_meta_value(conn, _FTS_BUILT_KEY, "1")
+
+
+def slug_token(slug: str, prefix: str = "t", digest_size: int = 16) -> str:
+    return prefix + hashlib.sha1(slug.encode("utf-8")).hexdigest()[:digest_size]
+
+
+def _index_slug_tokens(
+    conn: sqlite3.Connection,
+    doc_key: str,
+    rows: Iterable[tuple[str, Optional[str]]],
+) -> None:
+    """Map every token form, and the slug itself, to each slug in ``rows``.
+
+    The slug maps to itself so a real slug that happens to look like a
+    token is never shadowed by another slug's token.
+    """
+    for slug, payload in rows:
+        if payload is None:
+            conn.execute("DELETE FROM slug_tokens WHERE doc_key = ? AND slug = ?", (doc_key, slug))
+            continue
+        tokens = [slug, *(slug_token(slug, prefix, size) for prefix, size in SLUG_TOKEN_FORMS)]
+        conn.executemany(
+            "INSERT OR IGNORE INTO slug_tokens (token, doc_key, slug) VALUES (?, ?, ?)",
+            [(token, doc_key, slug) for token in tokens],
+        )
+
+
+def _rebuild_slug_tokens(conn: sqlite3.Connection) -> None:
+    conn.execute("DELETE FROM slug_tokens")
+    for doc_key in _CATALOG_DOCS:
+        table = _ROW_DOCS[doc_key][2]
+        rows = conn.execute(f"SELECT slug FROM {table} WHERE slug IS NOT NULL AND slug != ''").fetchall()
+        _index_slug_tokens(conn, doc_key, [(row[0], "") for row in rows])
+    _set_meta_value(conn, _SLUG_TOKENS_BUILT_KEY, "1")
+
+
+def _mirror_catalog_rows(
+    conn: sqlite3.Connection,
+    doc_key: str,
+    rows: list[tuple[str, Optional[str]]],
+    full: bool = False,
+) -> None:
+    """Keep slug tokens and the FTS index in step with written catalog rows."""
+    if doc_key not in _CATALOG_DOCS:
+        return
+    if full:
+        conn.execute("DELETE FROM slug_tokens WHERE doc_key = ?", (doc_key,))
+        if _fts_ready:
+            _reset_catalog_fts(conn, doc_key)
+    _index_slug_tokens(conn, doc_key, rows)
+    if _fts_ready:
+        _index_catalog_fts(conn, doc_key, rows)
+
+
+# Payload items of a request that can hold an uploaded file.
+_REQUEST_FILE_KEYS = ("plugin", "icon")
+_BLOB_DIGEST_RE = re.compile(r"[0-9a-f]{64}")
+
+
+def _request_blob_digests(item: Any) -> frozenset[str]:
+    """Digests claimed through the ``blob`` key of a request's file items."""
+    payload = item.get("payload") if isinstance(item, dict) else None
+    if not isinstance(payload, dict):
+        return frozenset()
+    digests = set()
+    for key in _REQUEST_FILE_KEYS:
+        file_item = payload.get(key)
+        digest = file_item.get("blob") if isinstance(file_item, dict) else None
+        if isinstance(digest, str) and _BLOB_DIGEST_RE.fullmatch(digest):
+            digests.add(digest)
+    return frozenset(digests)
+
+
+def _set_blob_refs(
+    conn: sqlite3.Connection,
+    request_id: str,
+    archived: int,
+    wanted: Optional[Iterable[str]],
+) -> None:
+    """Point the refs held by one request row at the ``wanted`` digests.
+
+    ``None`` drops them all. ``upload_blobs.refs`` moves with every ref added
+    or dropped.
+    """
+    wanted = set(wanted or ())
+    held = {
+        row[0]
+        for row in conn.execute(
+            "SELECT sha256 FROM upload_blob_refs WHERE request_id = ? AND archived = ?",
+            (request_id, archived),
+        )
+    }
+    added = [(request_id, archived, digest) for digest in wanted - held]
+    dropped = [(request_id, archived, digest) for digest in held - wanted]
+    if added:
+        conn.executemany("INSERT INTO upload_blob_refs (request_id, archived, sha256) VALUES (?, ?, ?)", added)
+        conn.executemany("UPDATE upload_blobs SET refs = refs + 1 WHERE sha256 = ?", [(row[2],) for row in added])
+    if dropped:
+        conn.executemany(
+            "DELETE FROM upload_blob_refs WHERE request_id = ? AND archived = ? AND sha256 = ?",
+            dropped,
+        )
+        conn.executemany("UPDATE upload_blobs SET refs = refs - 1 WHERE sha256 = ?", [(row[2],) for row in dropped])
+
+
+def _mirror_request_blobs(
+    conn: sqlite3.Connection,
+    doc_key: str,
+    rows: list[tuple[str, Optional[str]]],
+    blob_refs: Optional[Dict[str, frozenset[str]]],
+    full: bool = False,
+) -> None:
+    """Keep the blob refs of live requests in step with written request rows."""
+    if doc_key != _DOC_REQUESTS:
+        return
+    blob_refs = blob_refs or {}
+    if not full:
+        for request_id, payload in rows:
+            _set_blob_refs(conn, request_id, 0, None if payload is None else blob_refs.get(request_id))
+        return
+    conn.execute("DELETE FROM upload_blob_refs WHERE archived = 0")
+    conn.executemany(
+        "INSERT OR IGNORE INTO upload_blob_refs (request_id, archived, sha256) VALUES (?, 0, ?)",
+        [(request_id, digest) for request_id, _ in rows for digest in blob_refs.get(request_id, ())],
+    )
+    conn.execute(
+        "UPDATE upload_blobs SET refs = (SELECT COUNT(*) FROM upload_blob_refs AS r WHERE r.sha256 = upload_blobs.sha256)"
+    )
+
+
+def _plan_item_rows(
+    previous: Dict[str, tuple[Optional[int], str]],
+    rows: tuple[tuple[tuple, str], ...],
+    skip: set[str],
+) -> Optional[tuple[Dict[str, tuple[Optional[int], str]], list, list]]:
+    """Diff ordered rows against the persisted state.
+
+    New rows come back with a ``None`` order; the writer appends them after
+    the highest ``sort_order`` in the table. Returns ``None`` when the list
+    was reordered or a row was inserted before an existing one, since keeping
+    ``sort_order`` stable then needs a full rewrite. Keys in ``skip`` are
+    left untouched.
+    """
+    state: Dict[str, tuple[Optional[int], str]] = {}
+    upserts: list[tuple[Optional[int], tuple, str]] = []
+    seen: set[str] = set()
+    last_order = -1
+    appended = False
+    for values, payload in rows:
+        key = values[0]
+        if not isinstance(key, str) or not key or key in seen:
+            return None
+        seen.add(key)
+        if key in skip:
+            continue
+        old = previous.get(key)
+        if old is None:
+            appended = True
+            upserts.append((None, values, payload))
+            state[key] = (None, payload)
+            continue
+        order = old[0]
+        if appended or order is None or order <= last_order:
+            return None
+        if old[1] is not payload and old[1] != payload:
+            upserts.append((order, values, payload))
+        last_order = order
+        state[key] = (order, payload)
+    deletes = [
+        (order, key)
+        for key, (order, _) in previous.items()
+        if key not in seen and key not in skip
+    ]
+    for key in skip:
+        if key in previous:
+            state[key] = previous[key]
+    return state, upserts, deletes
+
+
+def _write_item_rows(
+    conn: sqlite3.Connection,
+    doc_key: str,
+    table: str,
+    columns: tuple[str, ...],
+    rows: tuple[tuple[tuple, str], ...],
+    blob_refs: Optional[Dict[str, frozenset[str]]] = None,
+) -> None:
+    key_column = columns[0]
+    placeholders = ", ".join("?" for _ in range(len(columns) + 2))
+    insert_sql = (
+        f"INSERT OR REPLACE INTO {table} (sort_order, {', '.join(columns)}, payload) "
+        f"VALUES ({placeholders})"
+    )
+
+    with _row_state_lock:
+        previous = _row_state.get(doc_key)
+        skip = set(_remote_pending.get(doc_key, ()))
+    plan = _plan_item_rows(previous, rows, skip) if previous is not None else None
+
+    if plan is None:
+        conn.execute(f"DELETE FROM {table}")
+        conn.executemany(
+            insert_sql,
+            [(idx, *values, payload) for idx, (values, payload) in enumerate(rows)],
+        )
+        state: Optional[Dict[str, tuple[Optional[int], str]]] = {}
+        for idx, (values, payload) in enumerate(rows):
+            key = values[0]
+            if not isinstance(key, str) or not key or key in state:
+                state = None
+                break
+            state[key] = (idx, payload)
+        _log_changes(conn, doc_key, [(None, _CHANGE_DOC)])
+        written = [(values[0], payload) for values, payload in rows if isinstance(values[0], str) and values[0]]
+        _mirror_catalog_rows(conn, doc_key, written, full=True)
+        _mirror_request_blobs(conn, doc_key, written, blob_refs, full=True)
+    else:
+        state, upserts, deletes = plan
+        changes: list[tuple[Optional[str], str]] = []
+        # Rows are matched on both sort_order and key so a stale state never
+        # touches a row another process has put in that slot.
+        for order, key in deletes:
+            conn.execute(
+                f"DELETE FROM {table} WHERE sort_order = ? AND {key_column} = ?",
+                (order, key),
+            )
+            changes.append((key, _CHANGE_DELETE))
+        update_sql = (
+            f"UPDATE {table} SET {', '.join(f'{column} = ?' for column in columns)}, payload = ? "
+            f"WHERE sort_order = ? AND {key_column} = ?"
+        )
+        next_order: Optional[int] = None
+        for order, values, payload in upserts:
+            key = values[0]
+            changes.append((key, _CHANGE_UPSERT))
+            if order is not None:
+                cursor = conn.execute(update_sql, (*values, payload, order, key))
+                if cursor.rowcount:
+                    continue
+            if next_order is None:
+                row = conn.execute(f"SELECT MAX(sort_order) FROM {table}").fetchone()
+                next_order = (row[0] if row and row[0] is not None else -1) + 1
+            conn.execute(f"DELETE FROM {table} WHERE {key_column} = ?", (key,))
+            conn.execute(insert_sql, (next_order, *values, payload))
+            state[key] = (next_order, payload)
+            next_order += 1
+        if changes:
+            _log_changes(conn, doc_key, changes)
+            written = [(key, None) for _, key in deletes] + [(values[0], payload) for _, values, payload in upserts]
+            _mirror_catalog_rows(conn, doc_key, written)
+            _mirror_request_blobs(conn, doc_key, written, blob_refs)
+
+    with _row_state_lock:
+        _row_state_pending[doc_key] = state
+
+
+def _write_user_rows(conn: sqlite3.Connection, rows: tuple[tuple[tuple, str], ...]) -> None:
+    insert_sql = (
+        "INSERT OR REPLACE INTO users_items (user_id, language, banned, ban_reason, payload) "
+        "VALUES (?, ?, ?, ?, ?)"
+    )
+    by_key = {values[0]: (values, payload) for values, payload in rows}
+
+    with _row_state_lock:
+        previous = _row_state.get(_DOC_USERS)
+        skip = set(_remote_pending.get(_DOC_USERS, ()))
+    if previous is None:
+        conn.execute("DELETE FROM users_items")
+        conn.executemany(insert_sql, [(*values, payload) for values, payload in by_key.values()])
+        _log_changes(conn, _DOC_USERS, [(None, _CHANGE_DOC)])
+        skip = set()
+        previous = {}
+    else:
+        stale = [key for key in previous if key not in by_key and key not in skip]
+        if stale:
+            conn.executemany("DELETE FROM users_items WHERE user_id = ?", [(key,) for key in stale])
+        changed = []
+        for key, (values, payload) in by_key.items():
+            if key in skip:
+                continue
+            old = previous.get(key)
+            if old is None or (old[1] is not payload and old[1] != payload):
+                changed.append((*values, payload))
+        if changed:
+            conn.executemany(insert_sql, changed)
+        if stale or changed:
+            _log_changes(
+                conn,
+                _DOC_USERS,
+                [(key, _CHANGE_DELETE) for key in stale] + [(row[0], _CHANGE_UPSERT) for row in changed],
+            )
+
+    state = {key: (None, payload) for key, (_, payload) in by_key.items() if key not in skip}
+    for key in skip:
+        if key in previous:
+            state[key] = previous[key]
+    with _row_state_lock:
+        _row_state_pending[_DOC_USERS] = state
+
+
+def _write_changed_item_rows(
+    conn: sqlite3.Connection,
+    doc_key: str,
+    table: str,
+    columns: tuple[str, ...],
+    rows: tuple[tuple[tuple, str], ...],
+    deleted: tuple[str, ...],
+    blob_refs: Optional[Dict[str, frozenset[str]]] = None,
+) -> None:
+    """Write the rows of a partial snapshot; rows not yet in the table are appended."""
+    key_column = columns[0]
+    placeholders = ", ".join("?" for _ in range(len(columns) + 2))
+    insert_sql = (
+        f"INSERT INTO {table} (sort_order, {', '.join(columns)}, payload) "
+        f"VALUES ({placeholders})"
+    )
+    update_sql = (
+        f"UPDATE {table} SET {', '.join(f'{column} = ?' for column in columns)}, payload = ? "
+        f"WHERE sort_order = ? AND {key_column} = ?"
+    )
+
+    with _row_state_lock:
+        state = _row_state.get(doc_key)
+        skip = set(_remote_pending.get(doc_key, ()))
+    changes: list[tuple[Optional[str], str]] = []
+    written: list[tuple[str, Optional[str]]] = []
+    for key in deleted:
+        if key in skip:
+            continue
+        if state is not None:
+            state.pop(key, None)
+        if conn.execute(f"DELETE FROM {table} WHERE {key_column} = ?", (key,)).rowcount:
+            changes.append((key, _CHANGE_DELETE))
+            written.append((key, None))
+    next_order: Optional[int] = None
+    for values, payload in rows:
+        key = values[0]
+        if key in skip:
+            continue
+        old = state.get(key) if state is not None else None
+        if old is not None and (old[1] is payload or old[1] == payload):
+            continue
+        changes.append((key, _CHANGE_UPSERT))
+        written.append((key, payload))
+        order = old[0] if old is not None else None
+        if order is None:
+            row = conn.execute(f"SELECT sort_order FROM {table} WHERE {key_column} = ?", (key,)).fetchone()
+            order = row[0] if row is not None else None
+        if order is None or not conn.execute(update_sql, (*values, payload, order, key)).rowcount:
+            if next_order is None:
+                row = conn.execute(f"SELECT MAX(sort_order) FROM {table}").fetchone()
+                next_order = (row[0] if row and row[0] is not None else -1) + 1
+            conn.execute(insert_sql, (next_order, *values, payload))
+            order = next_order
+            next_order += 1
+        if state is not None:
+            state[key] = (order, payload)
+    if changes:
+        _log_changes(conn, doc_key, changes)
+        _mirror_catalog_rows(conn, doc_key, written)
+        _mirror_request_blobs(conn, doc_key, written, blob_refs)
+    if state is not None:
+        # Updated in place; the rollback hook drops it if the write fails.
+        with _row_state_lock:
+            _row_state_pending[doc_key] = state
+
+
+def _write_changed_user_rows(
+    conn: sqlite3.Connection,
+    rows: tuple[tuple[tuple, str], ...],
+    deleted: tuple[str, ...],
+) -> None:
+    with _row_state_lock:
+        state = _row_state.get(_DOC_USERS)
+        skip = set(_remote_pending.get(_DOC_USERS, ()))
+    stale = [key for key in deleted if key not in skip]
+    if stale:
+        conn.executemany("DELETE FROM users_items WHERE user_id = ?", [(key,) for key in stale])
+    changed = []
+    for values, payload in rows:
+        key = values[0]
+        if key in skip:
+            continue
+        old = state.get(key) if state is not None else None
+        if old is None or (old[1] is not payload and old[1] != payload):
+            changed.append((*values, payload))
+    if changed:
+        conn.executemany(
+            "INSERT OR REPLACE INTO users_items (user_id, language, banned, ban_reason, payload) "
+            "VALUES (?, ?, ?, ?, ?)",
+            changed,
+        )
+    if stale or changed:
+        _log_changes(
+            conn,
+            _DOC_USERS,
+            [(key, _CHANGE_DELETE) for key in stale] + [(row[0], _CHANGE_UPSERT) for row in changed],
+        )
+    if state is not None:
+        with _row_state_lock:
+            for key in stale:
+                state.pop(key, None)
+            for row in changed:
+                state[row[0]] = (None, row[-1])
+            _row_state_pending[_DOC_USERS] = state
+
+
+def _write_row_snapshot(conn: sqlite3.Connection, snapshot: _DocSnapshot) -> None:
+    doc_key = snapshot.doc_key
+    rows = snapshot.rows or ()
+    if snapshot.deleted is not None:
+        if doc_key == _DOC_USERS:
+            _write_changed_user_rows(conn, rows, snapshot.deleted)
+        else:
+            table, columns = _ROW_DOCS[doc_key][2:]
+            _write_changed_item_rows(conn, doc_key, table, columns, rows, snapshot.deleted, snapshot.blob_refs)
+    elif doc_key == _DOC_USERS:
+        _write_user_rows(conn, rows)
+    else:
+        table, columns = _ROW_DOCS[doc_key][2:]
+        _write_item_rows(conn, doc_key, table, columns, rows, snapshot.blob_refs)
+    _set_meta_value(conn, _meta_key(doc_key), snapshot.meta)
+    _mark_initialized(conn, doc_key)
+
+
 def _read_plugins_doc(conn: sqlite3.Connection) -> Dict[str, Any]:
-    rows = conn.execute("SELECT CAST(payload AS BLOB) AS payload FROM plugins_items ORDER BY sort_order").fetchall()
+    rows = conn.execute(
+        "SELECT sort_order, slug, CAST(payload AS BLOB) AS payload FROM plugins_items ORDER BY sort_order"
+    ).fetchall()
     items = _read_items_payload(rows)
+    _remember_rows(_DOC_PLUGINS, rows, "slug")
     meta = _get_meta_json(conn, _meta_key(_DOC_PLUGINS), {})
     meta["plugins"] = items
     return meta
 
 
 def _write_plugins_doc(conn: sqlite3.Connection, data: Dict[str, Any]) -> None:
-    payload = dict(data) if isinstance(data, dict) else {}
-    items = payload.pop("plugins", [])
-    if not isinstance(items, list):
-        items = []
-
-    conn.execute("DELETE FROM plugins_items")
-    for idx, item in enumerate(items):
-        slug = status = category = updated_at = published_at = None
-        if isinstance(item, dict):
-            slug = item.get("slug")
-            status = item.get("status")
-            category = item.get("category")
-            updated_at = item.get("updated_at")
-            published_at = item.get("published_at")
-        conn.execute(
-            """
-            INSERT INTO plugins_items (
-                sort_order, slug, status, category, updated_at, published_at, payload
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                idx,
-                slug,
-                status,
-                category,
-                updated_at,
-                published_at,
-                json.dumps(item, ensure_ascii=False),
-            ),
-        )
-
-    _set_meta_json(conn, _meta_key(_DOC_PLUGINS), payload)
-    _mark_initialized(conn, _DOC_PLUGINS)
+    _write_row_snapshot(conn, _freeze_doc(_DOC_PLUGINS, data))
 
 
 def _read_icons_doc(conn: sqlite3.Connection) -> Dict[str, Any]:
-    rows = conn.execute("SELECT CAST(payload AS BLOB) AS payload FROM icons_items ORDER BY sort_order").fetchall()
+    rows = conn.execute(
+        "SELECT sort_order, slug, CAST(payload AS BLOB) AS payload FROM icons_items ORDER BY sort_order"
+    ).fetchall()
     items = _read_items_payload(rows)
+    _remember_rows(_DOC_ICONS, rows, "slug")
     meta = _get_meta_json(conn, _meta_key(_DOC_ICONS), {})
     meta["iconpacks"] = items
     return meta
 
 
 def _write_icons_doc(conn: sqlite3.Connection, data: Dict[str, Any]) -> None:
-    payload = dict(data) if isinstance(data, dict) else {}
-    items = payload.pop("iconpacks", [])
-    if not isinstance(items, list):
-        items = []
-
-    conn.execute("DELETE FROM icons_items")
-    for idx, item in enumerate(items):
-        slug = status = category = updated_at = published_at = None
-        if isinstance(item, dict):
-            slug = item.get("slug")
-            status = item.get("status")
-            category = item.get("category")
-            updated_at = item.get("updated_at")
-            published_at = item.get("published_at")
-        conn.execute(
-            """
-            INSERT INTO icons_items (
-                sort_order, slug, status, category, updated_at, published_at, payload
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                idx,
-                slug,
-                status,
-                category,
-                updated_at,
-                published_at,
-                json.dumps(item, ensure_ascii=False),
-            ),
-        )
-
-    _set_meta_json(conn, _meta_key(_DOC_ICONS), payload)
-    _mark_initialized(conn, _DOC_ICONS)
+    _write_row_snapshot(conn, _freeze_doc(_DOC_ICONS, data))
 
 
 def _read_requests_doc(conn: sqlite3.Connection) -> Dict[str, Any]:
-    rows = conn.execute("SELECT CAST(payload AS BLOB) AS payload FROM requests_items ORDER BY sort_order").fetchall()
+    rows = conn.execute(
+        "SELECT sort_order, request_id, CAST(payload AS BLOB) AS payload FROM requests_items ORDER BY sort_order"
+    ).fetchall()
     items = _read_items_payload(rows)
+    _remember_rows(_DOC_REQUESTS, rows, "request_id")
     meta = _get_meta_json(conn, _meta_key(_DOC_REQUESTS), {})
     meta["requests"] = items
     return meta
 
 
 def _write_requests_doc(conn: sqlite3.Connection, data: Dict[str, Any]) -> None:
-    payload = dict(data) if isinstance(data, dict) else {}
-    items = payload.pop("requests", [])
-    if not isinstance(items, list):
-        items = []
-
-    conn.execute("DELETE FROM requests_items")
-    for idx, item in enumerate(items):
-        request_id = status = request_type = submitted_at = updated_at = None
-        payload_user_id = None
-        if isinstance(item, dict):
-            request_id = item.get("id")
-            status = item.get("status")
-            request_type = item.get("type")
-            submitted_at = item.get("submitted_at")
-            updated_at = item.get("updated_at")
-            user_id = (item.get("payload") or {}).get("user_id")
-            if isinstance(user_id, int):
-                payload_user_id = user_id
-
-        conn.execute(
-            """
-            INSERT INTO requests_items (
-                sort_order, request_id, status, request_type, submitted_at, updated_at, payload_user_id, payload
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                idx,
-                request_id,
-                status,
-                request_type,
-                submitted_at,
-                updated_at,
-                payload_user_id,
-                json.dumps(item, ensure_ascii=False),
-            ),
-        )
-
-    _set_meta_json(conn, _meta_key(_DOC_REQUESTS), payload)
-    _mark_initialized(conn, _DOC_REQUESTS)
+    _write_row_snapshot(conn, _freeze_doc(_DOC_REQUESTS, data))
 
 
 def _read_users_doc(conn: sqlite3.Connection) -> Dict[str, Any]:
@@ -623,39 +1462,22 @@ def _read_users_doc(conn: sqlite3.Connection) -> Dict[str, Any]:
             users[str(row["user_id"])] = _loads_sqlite_json(row["payload"])
         except Exception:
             continue
+    _remember_rows(_DOC_USERS, rows, "user_id")
     meta = _get_meta_json(conn, _meta_key(_DOC_USERS), {})
     meta["users"] = users
     return meta
 
 
 def _write_users_doc(conn: sqlite3.Connection, data: Dict[str, Any]) -> None:
-    payload = dict(data) if isinstance(data, dict) else {}
-    users = payload.pop("users", {})
-    if not isinstance(users, dict):
-        users = {}
-
-    conn.execute("DELETE FROM users_items")
-    for user_id, user_data in users.items():
-        user_payload = user_data if isinstance(user_data, dict) else {}
-        language = user_payload.get("language")
-        banned = 1 if user_payload.get("banned") else 0
-        ban_reason = user_payload.get("ban_reason")
-        conn.execute(
-            """
-            INSERT INTO users_items (user_id, language, banned, ban_reason, payload)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (
-                str(user_id),
-                language if isinstance(language, str) else None,
-                banned,
-                ban_reason if isinstance(ban_reason, str) else None,
-                json.dumps(user_payload, ensure_ascii=False),
-            ),
-        )
+    _write_row_snapshot(conn, _freeze_doc(_DOC_USERS, data))
+
 
-    _set_meta_json(conn, _meta_key(_DOC_USERS), payload)
-    _mark_initialized(conn, _DOC_USERS)
+_ROW_DOCS = {
+    _DOC_PLUGINS: ("plugins", _catalog_row_values, "plugins_items", _CATALOG_ROW_COLUMNS),
+    _DOC_ICONS: ("iconpacks", _catalog_row_values, "icons_items", _CATALOG_ROW_COLUMNS),
+    _DOC_REQUESTS: ("requests", _request_row_values, "requests_items", _REQUEST_ROW_COLUMNS),
+    _DOC_USERS: ("users", _user_row_values, "users_items", _USER_ROW_COLUMNS),
+}
 
 
 def _read_subscriptions_doc(conn: sqlite3.Connection) -> Dict[str, Any]:
@@ -902,30 +1724,386 @@ def _read_sqlite_doc_sync(doc_key: str) -> Dict[str, Any]:
     return data
 
 
-def _write_sqlite_doc_sync(doc_key: str, data: Dict[str, Any]) -> None:
-    _ensure_db()
-    payload = dict(data) if isinstance(data, dict) else {}
-    payload.setdefault("updated_at", _now_iso())
-    with _connect() as conn:
-        _WRITERS[doc_key](conn, payload)
-        conn.commit()
+_WRITER_MAX_BATCH = 256
+_WATCH_INTERVAL = 1.0
+_WATCH_TICK = object()
+
+_write_queue: "queue.Queue[tuple[Callable[[sqlite3.Connection], Any], Optional[Callable[[], None]], Future]]" = queue.Queue()
+_writer_thread: Optional[threading.Thread] = None
+_writer_start_lock = threading.Lock()
+_data_version: Optional[int] = None
+_foreign_writes = 0
+_writer_stats: Dict[str, Any] = {
+    "commits": 0,
+    "jobs": 0,
+    "failed_jobs": 0,
+    "last_batch": 0,
+    "last_commit_ms": 0.0,
+    "max_commit_ms": 0.0,
+    "total_commit_ms": 0.0,
+}
+
+
+def _writer_connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(SQLITE_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _run_writer_batch(conn: sqlite3.Connection, batch: list) -> None:
+    started = time.perf_counter()
+    done: list[tuple[Future, Any]] = []
+    rollbacks: list[Callable[[], None]] = []
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        for job, on_rollback, future in batch:
+            if not future.set_running_or_notify_cancel():
+                continue
+            # A savepoint per job keeps one bad document from aborting the
+            # rest of the group commit.
+            conn.execute("SAVEPOINT storage_job")
+            try:
+                result = job(conn)
+            except BaseException as exc:
+                conn.execute("ROLLBACK TO storage_job")
+                conn.execute("RELEASE storage_job")
+                if on_rollback:
+                    on_rollback()
+                _writer_stats["failed_jobs"] += 1
+                future.set_exception(exc)
+                continue
+            conn.execute("RELEASE storage_job")
+            if on_rollback:
+                rollbacks.append(on_rollback)
+            done.append((future, result))
+        conn.execute("COMMIT")
+    except BaseException as exc:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        for on_rollback in rollbacks:
+            on_rollback()
+        for future, _ in done:
+            future.set_exception(exc)
+        logger.error("Storage group commit failed", exc_info=True)
+        return
+
+    elapsed_ms = (time.perf_counter() - started) * 1000.0
+    _writer_stats["commits"] += 1
+    _writer_stats["jobs"] += len(done)
+    _writer_stats["last_batch"] = len(done)
+    _writer_stats["last_commit_ms"] = elapsed_ms
+    _writer_stats["max_commit_ms"] = max(_writer_stats["max_commit_ms"], elapsed_ms)
+    _writer_stats["total_commit_ms"] += elapsed_ms
+    for future, result in done:
+        future.set_result(result)
+
+
+def _poll_data_version(conn: sqlite3.Connection) -> None:
+    # data_version of a connection only moves when *another* connection
+    # commits, so the writer's own commits never look like foreign changes.
+    global _data_version, _foreign_writes
+    row = conn.execute("PRAGMA data_version").fetchone()
+    version = int(row[0]) if row else 0
+    if _data_version is not None and version != _data_version:
+        _foreign_writes += 1
+    _data_version = version
+
+
+def _writer_loop() -> None:
+    conn: Optional[sqlite3.Connection] = None
+    while True:
+        try:
+            item = _write_queue.get(timeout=_WATCH_INTERVAL)
+        except queue.Empty:
+            item = _WATCH_TICK
+        if item is None:
+            break
+        batch = [] if item is _WATCH_TICK else [item]
+        stop = False
+        while len(batch) < _WRITER_MAX_BATCH:
+            try:
+                item = _write_queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                stop = True
+                break
+            batch.append(item)
+        try:
+            if conn is None:
+                _ensure_db()
+                conn = _writer_connect()
+            _poll_data_version(conn)
+            if batch:
+                _run_writer_batch(conn, batch)
+        except BaseException as exc:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            if conn is not None:
+                conn.close()
+                conn = None
+        if stop:
+            break
+    if conn is not None:
+        conn.close()
+
+
+def _ensure_writer() -> None:
+    global _writer_thread
+    if _writer_thread is not None and _writer_thread.is_alive():
+        return
+    with _writer_start_lock:
+        if _writer_thread is not None and _writer_thread.is_alive():
+            return
+        _writer_thread = threading.Thread(target=_writer_loop, name="storage-writer", daemon=True)
+        _writer_thread.start()
+
+
+def _submit_write(
+    job: Callable[[sqlite3.Connection], Any],
+    on_rollback: Optional[Callable[[], None]] = None,
+) -> Future:
+    """Queue ``job`` for the writer thread, which commits it together with
+    whatever else is queued at the time."""
+    _ensure_writer()
+    future: Future = Future()
+    _write_queue.put((job, on_rollback, future))
+    return future
+
+
+def _run_write_sync(
+    job: Callable[[sqlite3.Connection], Any],
+    on_rollback: Optional[Callable[[], None]] = None,
+) -> Any:
+    if threading.current_thread() is _writer_thread:
+        raise StorageError("Storage writer cannot wait on its own queue")
+    return _submit_write(job, on_rollback).result()
+
+
+async def _run_write(
+    job: Callable[[sqlite3.Connection], Any],
+    on_rollback: Optional[Callable[[], None]] = None,
+) -> Any:
+    return await asyncio.wrap_future(_submit_write(job, on_rollback))
+
+
+def storage_writer_stats() -> Dict[str, Any]:
+    stats = dict(_writer_stats)
+    stats["queue_depth"] = _write_queue.qsize()
+    stats["avg_commit_ms"] = stats["total_commit_ms"] / stats["commits"] if stats["commits"] else 0.0
+    return stats
+
+
+def shutdown_storage_writer(timeout: float = 30.0) -> None:
+    thread = _writer_thread
+    if thread is None or not thread.is_alive():
+        return
+    _write_queue.put(None)
+    thread.join(timeout)
+
+
+def _write_snapshot(conn: sqlite3.Connection, snapshot: _DocSnapshot) -> None:
+    if snapshot.rows is not None:
+        _write_row_snapshot(conn, snapshot)
+        return
+    _WRITERS[snapshot.doc_key](conn, json.loads(snapshot.meta))
+    _log_changes(conn, snapshot.doc_key, [(None, _CHANGE_DOC)])
+
+
+def _doc_write_job(snapshot: _DocSnapshot) -> Callable[[sqlite3.Connection], None]:
+    def job(conn: sqlite3.Connection) -> None:
+        _write_snapshot(conn, snapshot)
+        # Later jobs of the same group commit diff against this state; the
+        # rollback hook forgets it if the transaction does not commit.
+        _commit_row_state(snapshot.doc_key)
+
+    return job
+
+
+def _write_sqlite_doc_sync(doc_key: str, data: Dict[str, Any] | _DocSnapshot) -> None:
+    snapshot = data if isinstance(data, _DocSnapshot) else _freeze_doc(doc_key, data)
+    _run_write_sync(_doc_write_job(snapshot), lambda: _discard_row_state(doc_key))
+
+
+@dataclass(frozen=True, slots=True)
+class StorageEvent:
+    """A change to one cached document, local or merged from another process.
+
+    ``upserted`` maps changed row keys to the live cached items and
+    ``deleted`` holds removed row keys. Both are ``None`` when the change is
+    not known row by row; subscribers then treat the document as replaced.
+    """
+
+    doc_key: str
+    version: int
+    upserted: Optional[Dict[str, Any]] = None
+    deleted: Optional[frozenset] = None
+    remote: bool = False
+
+
+_doc_versions: Dict[str, int] = {}
+# Version of the last whole-document event; rows changed before it are
+# implicitly at that version.
+_doc_reset_versions: Dict[str, int] = {}
+_row_versions: Dict[str, Dict[str, int]] = {}
+_subscribers: List[Callable[[StorageEvent], None]] = []
+
+
+def subscribe_storage_events(callback: Callable[[StorageEvent], None]) -> None:
+    if callback not in _subscribers:
+        _subscribers.append(callback)
+
+
+def unsubscribe_storage_events(callback: Callable[[StorageEvent], None]) -> None:
+    if callback in _subscribers:
+        _subscribers.remove(callback)
+
+
+def document_version(doc_key: str) -> int:
+    return _doc_versions.get(doc_key, 0)
+
+
+def row_version(doc_key: str, row_key: str) -> int:
+    return max(
+        _row_versions.get(doc_key, {}).get(row_key, 0),
+        _doc_reset_versions.get(doc_key, 0),
+    )
+
+
+def _publish_event(
+    doc_key: str,
+    upserted: Optional[Dict[str, Any]] = None,
+    deleted: Optional[frozenset] = None,
+    *,
+    remote: bool = False,
+) -> None:
+    version = _doc_versions.get(doc_key, 0) + 1
+    _doc_versions[doc_key] = version
+    if upserted is None:
+        deleted = None
+        _doc_reset_versions[doc_key] = version
+        _row_versions.pop(doc_key, None)
+    else:
+        deleted = deleted or frozenset()
+        rows = _row_versions.setdefault(doc_key, {})
+        for key in upserted:
+            rows[key] = version
+        for key in deleted:
+            rows.pop(key, None)
+    event = StorageEvent(doc_key, version, upserted, deleted, remote)
+    for callback in list(_subscribers):
+        try:
+            callback(event)
+        except Exception:
+            logger.exception("Storage event subscriber failed for %s", doc_key)
+
+
+def _describe_local_change(
+    doc_key: str,
+    previous: Optional[Dict[str, Any]],
+    data: Dict[str, Any],
+    changed: Optional[Iterable[str]],
+) -> tuple[Optional[Dict[str, Any]], Optional[frozenset]]:
+    spec = _ROW_DOCS.get(doc_key)
+    if spec is None or changed is None or not isinstance(previous, dict):
+        return None, None
+    collection = data.get(spec[0]) if isinstance(data, dict) else None
+    # A new collection object means holders of the old one must rebuild.
+    if collection is None or collection is not previous.get(spec[0]):
+        return None, None
+    keys = {str(key) for key in changed}
+    upserted: Dict[str, Any] = {}
+    if isinstance(collection, dict):
+        for key in keys:
+            if key in collection:
+                upserted[key] = collection[key]
+    elif keys:
+        key_of = spec[1]
+        for item in collection:
+            key = key_of(item)[0]
+            if key in keys and key not in upserted:
+                upserted[key] = item
+    return upserted, frozenset(keys - set(upserted))
+
+
+def _is_dirty(doc_key: str) -> bool:
+    return _generation.get(doc_key, 0) > _persisted_generation.get(doc_key, 0)
 
 
 def _get_cached(doc_key: str, ttl: float = _TTL) -> Dict[str, Any]:
     now = time.time()
-    if doc_key in _cache and (_dirty.get(doc_key) or (now - _cache_time.get(doc_key, 0.0)) < ttl):
+    if doc_key in _cache and (
+        _revalidate_task is not None
+        or _is_dirty(doc_key)
+        or (now - _cache_time.get(doc_key, 0.0)) < ttl
+    ):
         return _cache[doc_key]
 
     data = _read_sqlite_doc_sync(doc_key)
+    replaced = doc_key in _cache
     _cache[doc_key] = data
     _cache_time[doc_key] = now
+    _changed_rows[doc_key] = set()
+    if replaced:
+        _publish_event(doc_key)
     return data
 
 
-def _set_cached(doc_key: str, data: Dict[str, Any]) -> None:
+def _set_cached(doc_key: str, data: Dict[str, Any], changed: Optional[Iterable[str]] = None) -> None:
+    if changed is not None and not isinstance(changed, (set, frozenset, list, tuple)):
+        changed = list(changed)
+    upserted, deleted = _describe_local_change(doc_key, _cache.get(doc_key), data, changed)
     _cache[doc_key] = data
     _cache_time[doc_key] = time.time()
-    _dirty[doc_key] = True
+    _generation[doc_key] = _generation.get(doc_key, 0) + 1
+    pending = _changed_rows.get(doc_key, set())
+    if changed is None or pending is None:
+        _changed_rows[doc_key] = None
+    else:
+        pending.update(str(key) for key in changed)
+        _changed_rows[doc_key] = pending
+    _publish_event(doc_key, upserted, deleted)
+
+
+def _take_changed_snapshot(doc_key: str) -> Optional[_DocSnapshot]:
+    """Freeze only the rows changed since the last snapshot, when they are known."""
+    changed = _changed_rows.get(doc_key)
+    _changed_rows[doc_key] = set()
+    if changed is None or doc_key not in _ROW_DOCS:
+        return None
+    return _freeze_changed_rows(doc_key, _cache[doc_key], changed, _generation.get(doc_key, 0))
+
+
+def _take_snapshot(doc_key: str) -> _DocSnapshot:
+    snapshot = _take_changed_snapshot(doc_key)
+    if snapshot is None:
+        snapshot = _freeze_doc(doc_key, _cache[doc_key], _generation.get(doc_key, 0))
+    return snapshot
+
+
+async def _take_snapshot_async(doc_key: str) -> _DocSnapshot:
+    generation = _generation.get(doc_key, 0)
+    snapshot = _take_changed_snapshot(doc_key)
+    if snapshot is None:
+        # A full freeze serializes every row; keep that off the loop.
+        detached = _detach_doc(doc_key, _cache[doc_key])
+        snapshot = await asyncio.to_thread(_freeze_doc, doc_key, detached, generation)
+    return snapshot
+
+
+async def _write_cached(doc_key: str) -> None:
+    snapshot = await _take_snapshot_async(doc_key)
+    try:
+        await _run_write(_doc_write_job(snapshot), lambda: _discard_row_state(doc_key))
+    except Exception:
+        # Which rows this snapshot carried is no longer known.
+        _changed_rows[doc_key] = None
+        raise
+    # A newer mutation may have happened while SQLite was writing; it keeps
+    # the document dirty because its generation is higher.
+    _persisted_generation[doc_key] = max(_persisted_generation.get(doc_key, 0), snapshot.generation)
 
 
 async def _schedule_save(doc_key: str) -> None:
@@ -942,27 +2120,29 @@ async def _schedule_save(doc_key: str) -> None:
         now = time.time()
 
     _last_save[doc_key] = now
+    await _write_if_dirty(doc_key)
+
+
+async def _write_if_dirty(doc_key: str) -> None:
+    # Snapshots of one document must reach the writer in the order they
+    # were taken, so only one save per document is in flight.
     if doc_key not in _save_locks:
         _save_locks[doc_key] = asyncio.Lock()
 
     async with _save_locks[doc_key]:
-        if doc_key in _cache and _dirty.get(doc_key):
-            data = deepcopy(_cache[doc_key])
-            await asyncio.to_thread(_write_sqlite_doc_sync, doc_key, data)
-            # A newer mutation may have happened while SQLite was writing.
-            # Only mark the document clean if the saved snapshot is current.
-            if _cache.get(doc_key) == data:
-                _dirty[doc_key] = False
+        if doc_key in _cache and _is_dirty(doc_key):
+            await _write_cached(doc_key)
 
 
-def _save_sync(doc_key: str, data: Dict[str, Any]) -> None:
-    _set_cached(doc_key, data)
+def _save_sync(doc_key: str, data: Dict[str, Any], changed: Optional[Iterable[str]] = None) -> None:
+    _set_cached(doc_key, data, changed)
     try:
         loop = asyncio.get_running_loop()
         _spawn(loop, _schedule_save(doc_key))
     except RuntimeError:
-        _write_sqlite_doc_sync(doc_key, data)
-        _dirty[doc_key] = False
+        snapshot = _take_snapshot(doc_key)
+        _write_sqlite_doc_sync(doc_key, snapshot)
+        _persisted_generation[doc_key] = max(_persisted_generation.get(doc_key, 0), snapshot.generation)
 
 
 def _normalize_dict(data: Dict[str, Any], default: Dict[str, Any]) -> Dict[str, Any]:
@@ -1000,7 +2180,9 @@ def _normalize_config_defaults(data: Dict[str, Any]) -> tuple[Dict[str, Any], bo
 def load_config() -> Dict[str, Any]:
     global _config_cache, _config_cache_time
     now = time.time()
-    if _config_cache is not None and (now - _config_cache_time) < _CONFIG_TTL:
+    if _config_cache is not None and (
+        _revalidate_task is not None or (now - _config_cache_time) < _CONFIG_TTL
+    ):
         return _config_cache
 
     try:
@@ -1018,30 +2200,44 @@ def load_config() -> Dict[str, Any]:
     data, changed = _normalize_config_defaults(data)
     if changed:
         try:
-            with _connect() as conn:
-                _set_meta_json(conn, _CONFIG_META_KEY, data)
-                conn.commit()
+            _submit_write(_config_write_job(data, _config_generation))
         except Exception:
             pass
 
+    replaced = _config_cache is not None
     _config_cache = data
     _config_cache_time = now
+    if replaced:
+        _publish_event(_CONFIG_DOC)
     return data
 
 
-def _write_config_sync(payload: Dict[str, Any], generation: int) -> None:
-    global _config_persisted_generation
+def _config_write_job(payload: Dict[str, Any], generation: int) -> Callable[[sqlite3.Connection], int]:
+    text = json.dumps(payload if isinstance(payload, dict) else {}, ensure_ascii=False)
 
-    with _config_write_lock:
-        # If a newer save was requested before this worker got the lock,
-        # writing this snapshot would roll the configuration back.
+    def job(conn: sqlite3.Connection) -> int:
+        # If a newer save was queued before this one ran, writing this
+        # snapshot would roll the configuration back.
         if generation < _config_generation:
-            return
-        _ensure_db()
-        with _connect() as conn:
-            _set_meta_json(conn, _CONFIG_META_KEY, payload)
-            conn.commit()
-        _config_persisted_generation = max(_config_persisted_generation, generation)
+            return 0
+        _set_meta_value(conn, _CONFIG_META_KEY, text)
+        _log_changes(conn, _CONFIG_DOC, [(None, _CHANGE_DOC)])
+        return generation
+
+    return job
+
+
+def _mark_config_persisted(generation: int) -> None:
+    global _config_persisted_generation
+    _config_persisted_generation = max(_config_persisted_generation, generation)
+
+
+def _write_config_sync(payload: Dict[str, Any], generation: int) -> None:
+    _mark_config_persisted(_run_write_sync(_config_write_job(payload, generation)))
+
+
+async def _write_config(payload: Dict[str, Any], generation: int) -> None:
+    _mark_config_persisted(await _run_write(_config_write_job(payload, generation)))
 
 
 def save_config(data: Dict[str, Any]) -> None:
@@ -1054,10 +2250,11 @@ def save_config(data: Dict[str, Any]) -> None:
     generation = _config_generation
     _config_cache = payload
     _config_cache_time = time.time()
+    _publish_event(_CONFIG_DOC)
 
     try:
         loop = asyncio.get_running_loop()
-        _spawn(loop, asyncio.to_thread(_write_config_sync, payload, generation))
+        _spawn(loop, _write_config(payload, generation))
     except RuntimeError:
         _write_config_sync(payload, generation)
 
@@ -1066,32 +2263,98 @@ def load_plugins() -> Dict[str, Any]:
     return _normalize_dict(_get_cached(_DOC_PLUGINS), {"plugins": []})
 
 
-def save_plugins(data: Dict[str, Any]) -> None:
-    _save_sync(_DOC_PLUGINS, data)
+def save_plugins(data: Dict[str, Any], changed: Optional[Iterable[str]] = None) -> None:
+    _save_sync(_DOC_PLUGINS, data, changed)
 
 
 def load_icons() -> Dict[str, Any]:
     return _normalize_dict(_get_cached(_DOC_ICONS), {"iconpacks": []})
 
 
-def save_icons(data: Dict[str, Any]) -> None:
-    _save_sync(_DOC_ICONS, data)
+def save_icons(data: Dict[str, Any], changed: Optional[Iterable[str]] = None) -> None:
+    _save_sync(_DOC_ICONS, data, changed)
 
 
 def load_requests() -> Dict[str, Any]:
     return _normalize_dict(_get_cached(_DOC_REQUESTS), {"requests": []})
 
 
-def save_requests(data: Dict[str, Any]) -> None:
-    _save_sync(_DOC_REQUESTS, data)
+def save_requests(data: Dict[str, Any], changed: Optional[Iterable[str]] = None) -> None:
+    _save_sync(_DOC_REQUESTS, data, changed)
 
 
 def load_users() -> Dict[str, Any]:
     return _normalize_dict(_get_cached(_DOC_USERS), {"users": {}})
 
 
-def save_users(data: Dict[str, Any]) -> None:
-    _save_sync(_DOC_USERS, data)
+def save_users(data: Dict[str, Any], changed: Optional[Iterable[str]] = None) -> None:
+    _save_sync(_DOC_USERS, data, changed)
+
+
+def iter_user_rows(batch_size: int = 5000) -> Iterator[tuple[str, Dict[str, Any]]]:
+    """Stream ``(user_id, payload)`` from ``users_items`` without caching the document."""
+    _ensure_db()
+    with _connect() as conn:
+        cursor = conn.execute("SELECT user_id, CAST(payload AS BLOB) AS payload FROM users_items")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                try:
+                    payload = _loads_sqlite_json(row["payload"])
+                except Exception:
+                    continue
+                if isinstance(payload, dict):
+                    yield str(row["user_id"]), payload
+
+
+def _user_rows_job(rows: list[tuple]) -> Callable[[sqlite3.Connection], None]:
+    def job(conn: sqlite3.Connection) -> None:
+        conn.executemany(
+            "INSERT OR REPLACE INTO users_items (user_id, language, banned, ban_reason, payload) "
+            "VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        _log_changes(conn, _DOC_USERS, [(row[0], _CHANGE_UPSERT) for row in rows])
+        _mark_initialized(conn, _DOC_USERS)
+        # Keep the row state in step so the next save_users diff stays small.
+        with _row_state_lock:
+            state = _row_state.get(_DOC_USERS)
+            if state is not None:
+                for row in rows:
+                    state[row[0]] = (None, row[-1])
+
+    return job
+
+
+def _discard_user_rows() -> None:
+    # A rolled-back batch may have touched the row state already.
+    _discard_row_state(_DOC_USERS)
+
+
+def _freeze_user_rows(users: Iterable[tuple[Any, Dict[str, Any]]]) -> list[tuple]:
+    rows = [(*_user_row_values(user_id, payload), json.dumps(payload, ensure_ascii=False)) for user_id, payload in users]
+    cached = _cache.get(_DOC_USERS)
+    cached_users = cached.get("users") if isinstance(cached, dict) else None
+    if isinstance(cached_users, dict):
+        # These writes bypass the users document, so patch its cached copy.
+        for row in rows:
+            cached_users[row[0]] = json.loads(row[-1])
+    return rows
+
+
+def save_user_rows(users: Iterable[tuple[Any, Dict[str, Any]]]) -> None:
+    """Upsert only the given users' rows."""
+    rows = _freeze_user_rows(users)
+    if rows:
+        _run_write_sync(_user_rows_job(rows), _discard_user_rows)
+
+
+async def save_user_rows_async(users: Iterable[tuple[Any, Dict[str, Any]]]) -> None:
+    rows = _freeze_user_rows(users)
+    if rows:
+        await _run_write(_user_rows_job(rows), _discard_user_rows)
 
 
 def load_subscriptions() -> Dict[str, Any]:
@@ -1246,12 +2509,440 @@ def build_quiz(lang: str = "ru", count: int = QUIZ_QUESTIONS_PER_RUN) -> List[Di
     return quiz
 
 
-def load_audit() -> Dict[str, Any]:
-    return _normalize_dict(_get_cached(_DOC_AUDIT), {"events": []})
+def _insert_audit_events(conn: sqlite3.Connection, events: List[Dict[str, Any]]) -> None:
+    rows = []
+    for event in events:
+        actor_id = event.get("actor_id")
+        details = event.get("details")
+        rows.append(
+            (
+                str(event.get("created_at") or _now_iso()),
+                str(event.get("event") or ""),
+                actor_id if isinstance(actor_id, int) else None,
+                event.get("actor"),
+                event.get("request_id"),
+                json.dumps(details if isinstance(details, dict) else {}, ensure_ascii=False),
+            )
+        )
+    conn.executemany(
+        """
+        INSERT INTO audit_events (created_at, event, actor_id, actor, request_id, details)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
+
+
+def append_audit_events(events: List[Dict[str, Any]]) -> None:
+    if events:
+        _run_write_sync(lambda conn: _insert_audit_events(conn, events))
+
+
+async def append_audit_events_async(events: List[Dict[str, Any]]) -> None:
+    if events:
+        await _run_write(lambda conn: _insert_audit_events(conn, events))
+
+
+def _audit_filter_sql(
+    event_prefixes: Optional[List[str]] = None,
+    actor_id: Optional[int] = None,
+    request_id: Optional[str] = None,
+) -> tuple[List[str], List[Any]]:
+    clauses: List[str] = []
+    params: List[Any] = []
+    if event_prefixes:
+        # Range scans keep the prefix match on idx_audit_event.
+        ranges = []
+        for prefix in event_prefixes:
+            ranges.append("(event >= ? AND event < ?)")
+            params.extend([prefix, prefix + "\uffff"])
+        clauses.append("(" + " OR ".join(ranges) + ")")
+    if actor_id is not None:
+        clauses.append("actor_id = ?")
+        params.append(int(actor_id))
+    if request_id is not None:
+        clauses.append("request_id = ?")
+        params.append(str(request_id))
+    return clauses, params
+
+
+def _audit_row_to_event(row: sqlite3.Row) -> Dict[str, Any]:
+    try:
+        details = _loads_sqlite_json(row["details"])
+    except Exception:
+        details = {}
+    return {
+        "id": row["id"],
+        "event": row["event"],
+        "actor_id": row["actor_id"],
+        "actor": row["actor"],
+        "request_id": row["request_id"],
+        "details": details if isinstance(details, dict) else {},
+        "created_at": row["created_at"],
+    }
+
+
+def query_audit_events(
+    limit: int = 20,
+    *,
+    before_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    offset: int = 0,
+    event_prefixes: Optional[List[str]] = None,
+    actor_id: Optional[int] = None,
+    request_id: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Return audit events newest first.
+
+    ``before_id``/``after_id`` are keyset cursors; ``offset`` is only a
+    fallback for jumping to a page whose cursor is unknown.
+    """
+    clauses, params = _audit_filter_sql(event_prefixes, actor_id, request_id)
+    order = "DESC"
+    if before_id is not None:
+        clauses.append("id < ?")
+        params.append(int(before_id))
+    elif after_id is not None:
+        clauses.append("id > ?")
+        params.append(int(after_id))
+        order = "ASC"
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    params.extend([max(1, int(limit)), max(0, int(offset))])
+
+    _ensure_db()
+    with _connect() as conn:
+        rows = conn.execute(
+            f"SELECT * FROM audit_events {where} ORDER BY id {order} LIMIT ? OFFSET ?",
+            params,
+        ).fetchall()
+    events = [_audit_row_to_event(row) for row in rows]
+    if order == "ASC":
+        events.reverse()
+    return events
+
+
+def count_audit_events(
+    *,
+    event_prefixes: Optional[List[str]] = None,
+    actor_id: Optional[int] = None,
+    request_id: Optional[str] = None,
+) -> int:
+    clauses, params = _audit_filter_sql(event_prefixes, actor_id, request_id)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    _ensure_db()
+    with _connect() as conn:
+        row = conn.execute(f"SELECT COUNT(*) AS total FROM audit_events {where}", params).fetchone()
+    return int(row["total"]) if row else 0
+
+
+def load_slug_tokens() -> List[tuple[str, str, str]]:
+    """Every ``(token, doc_key, slug)`` row, to seed an in-memory lookup."""
+    _ensure_db()
+    with _connect() as conn:
+        rows = conn.execute("SELECT token, doc_key, slug FROM slug_tokens").fetchall()
+    return [(row["token"], row["doc_key"], row["slug"]) for row in rows]
+
+
+def _archive_rows(
+    items: Iterable[tuple[Dict[str, Any], Iterable[str]]],
+) -> tuple[list[tuple], list[tuple[str, str]], Dict[str, frozenset[str]]]:
+    # Serialized on the caller's thread: the live entries may change while
+    # the job waits in the write queue.
+    archived_at = _now_iso()
+    rows: list[tuple] = []
+    plugin_rows: list[tuple[str, str]] = []
+    blob_refs: Dict[str, frozenset[str]] = {}
+    for item, plugin_ids in items:
+        request_id, status, request_type, _, _, user_id = _request_row_values(item)
+        if not request_id:
+            continue
+        request_id = str(request_id)
+        rows.append(
+            (
+                request_id,
+                item.get("route_token"),
+                status,
+                request_type,
+                user_id,
+                archived_at,
+                json.dumps(item, ensure_ascii=False),
+            )
+        )
+        plugin_rows.extend((str(plugin_id), request_id) for plugin_id in plugin_ids if plugin_id)
+        blob_refs[request_id] = _request_blob_digests(item)
+    return rows, plugin_rows, blob_refs
+
+
+def _insert_archived_requests(
+    conn: sqlite3.Connection,
+    rows: list[tuple],
+    plugin_rows: list[tuple[str, str]],
+    blob_refs: Dict[str, frozenset[str]],
+) -> None:
+    # REPLACE gives a re-archived request a new rowid, which keeps rowid
+    # order equal to archive order.
+    conn.executemany(
+        """
+        INSERT OR REPLACE INTO requests_archive
+            (request_id, route_token, status, request_type, payload_user_id, archived_at, payload)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
+    conn.executemany("DELETE FROM requests_archive_plugins WHERE request_id = ?", [(row[0],) for row in rows])
+    conn.executemany(
+        "INSERT OR IGNORE INTO requests_archive_plugins (plugin_id, request_id) VALUES (?, ?)",
+        plugin_rows,
+    )
+    for row in rows:
+        _set_blob_refs(conn, row[0], 1, blob_refs.get(row[0]))
+
+
+async def archive_requests_async(items: Iterable[tuple[Dict[str, Any], Iterable[str]]]) -> int:
+    """Copy requests into ``requests_archive``, indexed by the given plugin ids.
+
+    Removing them from the requests document is left to the caller, after
+    this has committed.
+    """
+    rows, plugin_rows, blob_refs = _archive_rows(items)
+    if rows:
+        await _run_write(lambda conn: _insert_archived_requests(conn, rows, plugin_rows, blob_refs))
+    return len(rows)
+
+
+def _delete_archived_requests(conn: sqlite3.Connection, request_ids: list[str]) -> None:
+    params = [(request_id,) for request_id in request_ids]
+    conn.executemany("DELETE FROM requests_archive WHERE request_id = ?", params)
+    conn.executemany("DELETE FROM requests_archive_plugins WHERE request_id = ?", params)
+    for request_id in request_ids:
+        _set_blob_refs(conn, request_id, 1, None)
+
+
+def delete_archived_requests(request_ids: Iterable[str]) -> None:
+    ids = [str(request_id) for request_id in request_ids if request_id]
+    if not ids:
+        return
+    def job(conn: sqlite3.Connection) -> None:
+        _delete_archived_requests(conn, ids)
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        _run_write_sync(job)
+        return
+    _spawn(loop, _run_write(job))
+
+
+def _archived_request_from_row(row: sqlite3.Row) -> Optional[Dict[str, Any]]:
+    try:
+        item = _loads_sqlite_json(row["payload"])
+    except Exception:
+        return None
+    return item if isinstance(item, dict) else None
+
+
+def load_archived_request(key: str) -> Optional[Dict[str, Any]]:
+    """Return the archived request whose id or route token is ``key``."""
+    if not key:
+        return None
+    _ensure_db()
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT CAST(payload AS BLOB) AS payload FROM requests_archive WHERE request_id = ?",
+            (key,),
+        ).fetchone() or conn.execute(
+            "SELECT CAST(payload AS BLOB) AS payload FROM requests_archive WHERE route_token = ? LIMIT 1",
+            (key,),
+        ).fetchone()
+    return _archived_request_from_row(row) if row else None
+
+
+def load_archived_request_index() -> List[tuple[str, Optional[str]]]:
+    """Every archived ``(request_id, route_token)``, to seed an in-memory lookup."""
+    _ensure_db()
+    with _connect() as conn:
+        rows = conn.execute("SELECT request_id, route_token FROM requests_archive ORDER BY rowid").fetchall()
+    return [(row["request_id"], row["route_token"]) for row in rows]
+
+
+def find_archived_requests(
+    plugin_id: Optional[str] = None,
+    *,
+    statuses: Optional[Iterable[str]] = None,
+    exclude_statuses: Optional[Iterable[str]] = None,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Return archived requests, most recently archived first."""
+    clauses: List[str] = []
+    params: List[Any] = []
+    join = ""
+    if plugin_id:
+        join = "JOIN requests_archive_plugins AS p ON p.request_id = a.request_id AND p.plugin_id = ?"
+        params.append(str(plugin_id))
+    for column_values, negate in ((statuses, False), (exclude_statuses, True)):
+        if column_values is None:
+            continue
+        values = list(column_values)
+        if not values and not negate:
+            return []
+        if values:
+            marks = ",".join("?" * len(values))
+            clauses.append(f"(a.status IS NULL OR a.status NOT IN ({marks}))" if negate else f"a.status IN ({marks})")
+            params.extend(values)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    params.append(-1 if limit is None else max(0, int(limit)))
+    _ensure_db()
+    with _connect() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT CAST(a.payload AS BLOB) AS payload FROM requests_archive AS a {join}
+            {where} ORDER BY a.rowid DESC LIMIT ?
+            """,
+            params,
+        ).fetchall()
+    return [item for item in (_archived_request_from_row(row) for row in rows) if item is not None]
 
 
-def save_audit(data: Dict[str, Any]) -> None:
-    _save_sync(_DOC_AUDIT, data)
+def count_archived_requests(status: Optional[str] = None) -> int:
+    _ensure_db()
+    with _connect() as conn:
+        if status is None:
+            row = conn.execute("SELECT COUNT(*) AS total FROM requests_archive").fetchone()
+        else:
+            row = conn.execute("SELECT COUNT(*) AS total FROM requests_archive WHERE status = ?", (status,)).fetchone()
+    return int(row["total"]) if row else 0
+
+
+def _register_upload_blob(conn: sqlite3.Connection, digest: str, name: str, size: int) -> None:
+    # Refs may already exist when a request row was written first. A repeat
+    # upload restarts the orphan grace period.
+    now = _now_iso()
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO upload_blobs (sha256, name, size, refs, created_at)
+        VALUES (?, ?, ?, (SELECT COUNT(*) FROM upload_blob_refs WHERE sha256 = ?), ?)
+        """,
+        (digest, name, int(size), digest, now),
+    )
+    conn.execute("UPDATE upload_blobs SET name = ?, created_at = ? WHERE sha256 = ?", (name, now, digest))
+
+
+async def register_upload_blob_async(digest: str, name: str, size: int) -> None:
+    await _run_write(lambda conn: _register_upload_blob(conn, digest, name, size))
+
+
+def _drop_orphan_blobs(conn: sqlite3.Connection, cutoff: str) -> List[str]:
+    rows = conn.execute(
+        "SELECT sha256 FROM upload_blobs WHERE refs = 0 AND created_at < ?",
+        (cutoff,),
+    ).fetchall()
+    digests = [row[0] for row in rows]
+    conn.executemany("DELETE FROM upload_blobs WHERE sha256 = ?", [(digest,) for digest in digests])
+    return digests
+
+
+async def drop_orphan_blobs_async(cutoff: str) -> List[str]:
+    """Forget blobs no request has referenced since before ``cutoff``.
+
+    Returns their digests; removing the files is left to the caller.
+    """
+    return await _run_write(lambda conn: _drop_orphan_blobs(conn, cutoff))
+
+
+def backed_up_blob_digests() -> set[str]:
+    _ensure_db()
+    with _connect() as conn:
+        rows = conn.execute("SELECT sha256 FROM upload_blobs WHERE backed_up_at IS NOT NULL").fetchall()
+    return {row[0] for row in rows}
+
+
+async def mark_blobs_backed_up_async(digests: Iterable[str]) -> None:
+    now = _now_iso()
+    params = [(now, str(digest)) for digest in digests if digest]
+    if params:
+        await _run_write(lambda conn: conn.executemany("UPDATE upload_blobs SET backed_up_at = ? WHERE sha256 = ?", params))
+
+
+_BROADCAST_PROGRESS_FIELDS = ("status", "cursor", "total", "sent", "failed", "blocked", "message_id")
+
+
+async def create_broadcast_job_async(
+    text: str,
+    *,
+    lang: str,
+    created_by: int,
+    chat_id: int,
+    message_id: Optional[int],
+    total: int,
+) -> int:
+    now = _now_iso()
+
+    def job(conn: sqlite3.Connection) -> int:
+        cursor = conn.execute(
+            """
+            INSERT INTO broadcast_jobs
+                (status, text, lang, created_by, chat_id, message_id, total, created_at, updated_at)
+            VALUES ('running', ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (text, lang, created_by, chat_id, message_id, int(total), now, now),
+        )
+        return int(cursor.lastrowid)
+
+    return await _run_write(job)
+
+
+async def save_broadcast_progress_async(job_id: int, **fields: Any) -> None:
+    """Update the progress columns of a broadcast job; unknown fields are ignored."""
+    columns = [name for name in _BROADCAST_PROGRESS_FIELDS if name in fields]
+    if not columns:
+        return
+    params = [fields[name] for name in columns] + [_now_iso(), int(job_id)]
+    sql = f"UPDATE broadcast_jobs SET {', '.join(f'{name} = ?' for name in columns)}, updated_at = ? WHERE job_id = ?"
+    await _run_write(lambda conn: conn.execute(sql, params))
+
+
+def load_running_broadcast_jobs() -> List[Dict[str, Any]]:
+    _ensure_db()
+    with _connect() as conn:
+        rows = conn.execute("SELECT * FROM broadcast_jobs WHERE status = 'running' ORDER BY job_id").fetchall()
+    return [dict(row) for row in rows]
+
+
+def catalog_fts_enabled() -> bool:
+    _ensure_db()
+    return FTS_SEARCH and _fts_ready
+
+
+def search_catalog_fts(
+    doc_key: str,
+    query: str,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> List[tuple[str, str]]:
+    """Return ``(slug, snippet)`` pairs of published entries, best bm25 match first.
+
+    Every query word is matched as a word prefix. Only published rows are
+    indexed, but the index follows committed rows, so changes still waiting
+    in the write queue are not visible yet. Runs a blocking query; call it
+    through ``asyncio.to_thread`` from the event loop.
+    """
+    terms = _FTS_TERM_RE.findall(query.lower().translate(_FTS_FOLD))
+    if not terms or not catalog_fts_enabled():
+        return []
+    match = " ".join(f'"{term}"*' for term in terms)
+    sql = (
+        "SELECT k.slug, snippet(catalog_fts, -1, '', '', '…', 12) AS snippet "
+        "FROM catalog_fts JOIN catalog_fts_keys AS k ON k.id = catalog_fts.rowid "
+        "WHERE catalog_fts MATCH ? AND k.doc_key = ? "
+        "ORDER BY bm25(catalog_fts, 10.0, 1.0), k.id"
+    )
+    params: list[Any] = [match, doc_key]
+    if limit is not None:
+        sql += " LIMIT ? OFFSET ?"
+        params.extend([max(0, int(limit)), max(0, int(offset))])
+    with _connect() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    return [(row["slug"], row["snippet"] or "") for row in rows]
 
 
 def load_poster() -> Dict[str, Any]:
@@ -1298,18 +2989,298 @@ async def flush_all() -> None:
         _config_cache is not None
         and _config_persisted_generation < _config_generation
     ):
-        await asyncio.to_thread(
-            _write_config_sync,
-            deepcopy(_config_cache),
-            _config_generation,
-        )
+        await _write_config(_config_cache, _config_generation)
+
+    for doc_key in list(_generation):
+        await _write_if_dirty(doc_key)
+
+
+@dataclass(frozen=True, slots=True)
+class _RemoteChange:
+    doc_key: str
+    # Whole document, for documents without a row table and the config.
+    data: Optional[Dict[str, Any]] = None
+    # Row-backed documents: changed rows as key -> (item, payload) in table
+    # order plus deleted keys. ``full`` means the table was rewritten and any
+    # cached row missing from ``rows`` is gone.
+    rows: Optional[Dict[str, tuple[Any, str]]] = None
+    deleted: frozenset = frozenset()
+    full: bool = False
+
+
+def _read_remote_rows(conn: sqlite3.Connection, doc_key: str, keys: Optional[set[str]]) -> _RemoteChange:
+    table, columns = _ROW_DOCS[doc_key][2:]
+    key_column = columns[0]
+    ordered = doc_key != _DOC_USERS
+    select_sql = (
+        f"SELECT {'sort_order' if ordered else 'NULL'} AS sort_order, {key_column} AS row_key, "
+        f"CAST(payload AS BLOB) AS payload FROM {table}"
+    )
+    if keys is None:
+        fetched = conn.execute(f"{select_sql} ORDER BY {'sort_order' if ordered else key_column}").fetchall()
+    else:
+        fetched = []
+        wanted = sorted(keys)
+        for start in range(0, len(wanted), 500):
+            chunk = wanted[start:start + 500]
+            fetched.extend(
+                conn.execute(
+                    f"{select_sql} WHERE {key_column} IN ({', '.join('?' for _ in chunk)})",
+                    chunk,
+                ).fetchall()
+            )
+        if ordered:
+            fetched.sort(key=lambda row: row["sort_order"])
+
+    rows: Dict[str, tuple[Any, str]] = {}
+    orders: Dict[str, Optional[int]] = {}
+    for row in fetched:
+        key = row["row_key"]
+        payload = row["payload"]
+        if isinstance(payload, bytes):
+            payload = payload.decode("utf-8", "replace")
+        if not isinstance(key, str) or not key:
+            continue
+        try:
+            item = json.loads(payload)
+        except Exception:
+            continue
+        rows[key] = (item, payload)
+        orders[key] = row["sort_order"]
+
+    deleted = frozenset((keys or set()) - set(rows))
+    with _row_state_lock:
+        state = _row_state.get(doc_key)
+        pending = _remote_pending.setdefault(doc_key, set())
+        if keys is None:
+            if state is not None:
+                pending.update(state)
+            _row_state[doc_key] = {key: (orders[key], payload) for key, (_, payload) in rows.items()}
+        elif state is not None:
+            for key in deleted:
+                state.pop(key, None)
+            for key, (_, payload) in rows.items():
+                state[key] = (orders[key], payload)
+        pending.update(rows)
+        pending.update(deleted)
+    return _RemoteChange(doc_key, rows=rows, deleted=deleted, full=keys is None)
+
+
+def _read_detached_user_rows(conn: sqlite3.Connection, keys: Optional[set[str]]) -> _RemoteChange:
+    """Read remote user rows while the users document is not cached.
+
+    user_store keeps users as rows of its own and only needs them announced.
+    """
+    if keys is None:
+        return _RemoteChange(_DOC_USERS, full=True)
+    rows: Dict[str, tuple[Any, str]] = {}
+    wanted = sorted(keys)
+    for start in range(0, len(wanted), 500):
+        chunk = wanted[start:start + 500]
+        for row in conn.execute(
+            f"SELECT user_id, CAST(payload AS BLOB) AS payload FROM users_items "
+            f"WHERE user_id IN ({', '.join('?' for _ in chunk)})",
+            chunk,
+        ):
+            try:
+                item = _loads_sqlite_json(row["payload"])
+            except Exception:
+                continue
+            if isinstance(item, dict):
+                rows[str(row["user_id"])] = (item, "")
+    return _RemoteChange(_DOC_USERS, rows=rows, deleted=frozenset(keys - set(rows)))
+
+
+def _tail_change_log(conn: sqlite3.Connection) -> list[_RemoteChange]:
+    """Read entries committed by other processes since the last call.
+
+    Runs on the writer thread so the rows it reads cannot interleave with a
+    local commit of the same document.
+    """
+    global _change_cursor, _change_log_pruned_at
+    entries = conn.execute(
+        "SELECT seq, doc_key, row_key, op, origin FROM change_log WHERE seq > ? ORDER BY seq",
+        (_change_cursor,),
+    ).fetchall()
+    now = time.time()
+    if now - _change_log_pruned_at >= _CHANGE_LOG_RETENTION / 24:
+        _change_log_pruned_at = now
+        cutoff = datetime.fromtimestamp(now - _CHANGE_LOG_RETENTION, timezone.utc).isoformat()
+        conn.execute("DELETE FROM change_log WHERE created_at < ?", (cutoff,))
+    if not entries:
+        return []
+    _change_cursor = int(entries[-1]["seq"])
+
+    touched: Dict[str, Optional[set[str]]] = {}
+    for entry in entries:
+        if entry["origin"] == _ORIGIN:
+            continue
+        doc_key = entry["doc_key"]
+        row_key = entry["row_key"]
+        if entry["op"] == _CHANGE_DOC or row_key is None:
+            touched[doc_key] = None
+        elif touched.setdefault(doc_key, set()) is not None:
+            touched[doc_key].add(row_key)
+
+    changes: list[_RemoteChange] = []
+    for doc_key, keys in touched.items():
+        if doc_key == _CONFIG_DOC:
+            changes.append(_RemoteChange(doc_key, data=_get_meta_json(conn, _CONFIG_META_KEY, {})))
+        elif doc_key == _DOC_USERS and doc_key not in _cache:
+            changes.append(_read_detached_user_rows(conn, keys))
+        elif doc_key not in _cache:
+            continue
+        elif doc_key in _ROW_DOCS:
+            changes.append(_read_remote_rows(conn, doc_key, keys))
+        elif doc_key in _READERS:
+            changes.append(_RemoteChange(doc_key, data=_READERS[doc_key](conn)))
+    return changes
+
+
+def _merge_remote_rows(change: _RemoteChange) -> None:
+    doc_key = change.doc_key
+    rows = change.rows or {}
+    doc = _cache.get(doc_key)
+    collection = doc.get(_ROW_DOCS[doc_key][0]) if isinstance(doc, dict) else None
+    upserted: Dict[str, Any] = {}
+    deleted: set[str] = set(change.deleted)
+    local_changes = _changed_rows.get(doc_key)
+
+    def _gone(key: str) -> bool:
+        # After a full rewrite elsewhere, rows edited here but not saved yet
+        # survive; the next save inserts them again.
+        if key in rows:
+            return False
+        return not _is_dirty(doc_key) or (local_changes is not None and key not in local_changes)
+
+    if isinstance(collection, dict):
+        if change.full:
+            deleted.update(key for key in collection if _gone(key))
+        for key in deleted:
+            collection.pop(key, None)
+        for key, (item, _) in rows.items():
+            current = collection.get(key)
+            if isinstance(current, dict) and isinstance(item, dict):
+                current.clear()
+                current.update(item)
+            else:
+                collection[key] = item
+            upserted[key] = collection[key]
+    elif isinstance(collection, list):
+        key_of = _ROW_DOCS[doc_key][1]
+        by_key: Dict[str, Any] = {}
+        for entry in collection:
+            key = key_of(entry)[0]
+            if isinstance(key, str):
+                by_key.setdefault(key, entry)
+        if change.full:
+            deleted.update(key for key in by_key if _gone(key))
+        for key, (item, _) in rows.items():
+            current = by_key.get(key)
+            # Items are updated in place so references held by other modules
+            # (indexes, FSM lookups) stay valid.
+            if isinstance(current, dict) and isinstance(item, dict):
+                current.clear()
+                current.update(item)
+                upserted[key] = current
+            else:
+                upserted[key] = item
+        if change.full:
+            kept = [
+                entry
+                for entry in collection
+                if key_of(entry)[0] not in rows and key_of(entry)[0] not in deleted
+            ]
+            collection[:] = [upserted[key] for key in rows] + kept
+        else:
+            if deleted:
+                collection[:] = [
+                    entry for entry in collection if key_of(entry)[0] not in deleted
+                ]
+            collection.extend(item for key, item in upserted.items() if key not in by_key)
+
+    with _row_state_lock:
+        pending = _remote_pending.get(doc_key)
+        if pending is not None:
+            pending.difference_update(rows)
+            pending.difference_update(change.deleted)
+            if change.full:
+                pending.clear()
+    if local_changes is not None:
+        local_changes.difference_update(rows)
+        local_changes.difference_update(deleted)
+    _cache_time[doc_key] = time.time()
+    _publish_event(doc_key, upserted, frozenset(deleted), remote=True)
+
+
+def _apply_remote_change(change: _RemoteChange) -> None:
+    global _config_cache, _config_cache_time
+    doc_key = change.doc_key
+    if doc_key == _CONFIG_DOC:
+        # Unsaved local edits win; they are written as a whole on the next save.
+        if not change.data or _config_cache is None or _config_persisted_generation < _config_generation:
+            return
+        _config_cache, _ = _normalize_config_defaults(change.data)
+        _config_cache_time = time.time()
+        _publish_event(doc_key, remote=True)
+        return
+    if doc_key not in _cache:
+        upserted = None if change.full or change.rows is None else {key: item for key, (item, _) in change.rows.items()}
+        _publish_event(doc_key, upserted, change.deleted, remote=True)
+        return
+    if change.rows is not None:
+        _merge_remote_rows(change)
+        return
+    if change.data is None or _is_dirty(doc_key):
+        return
+    _cache[doc_key] = change.data
+    _cache_time[doc_key] = time.time()
+    _changed_rows[doc_key] = set()
+    _publish_event(doc_key, remote=True)
+
+
+async def _apply_change_feed() -> None:
+    for change in await _run_write(_tail_change_log):
+        _apply_remote_change(change)
 
-    for doc_key, is_dirty in list(_dirty.items()):
-        if is_dirty and doc_key in _cache:
-            data = deepcopy(_cache[doc_key])
-            await asyncio.to_thread(_write_sqlite_doc_sync, doc_key, data)
-            if _cache.get(doc_key) == data:
-                _dirty[doc_key] = False
+
+async def _revalidate_loop() -> None:
+    global _seen_foreign_writes
+    while True:
+        await asyncio.sleep(_WATCH_INTERVAL)
+        if _foreign_writes == _seen_foreign_writes:
+            continue
+        _seen_foreign_writes = _foreign_writes
+        try:
+            await _apply_change_feed()
+        except Exception:
+            logger.exception("Applying the storage change feed failed")
+
+
+def start_storage_revalidation() -> None:
+    global _revalidate_task, _seen_foreign_writes
+    if _revalidate_task and not _revalidate_task.done():
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    _ensure_writer()
+    _seen_foreign_writes = _foreign_writes
+    _revalidate_task = loop.create_task(_revalidate_loop())
+
+
+async def stop_storage_revalidation() -> None:
+    global _revalidate_task
+    task = _revalidate_task
+    _revalidate_task = None
+    if not task or task.done():
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
 
 
 async def preload_storage() -> None:
@@ -1318,12 +3289,13 @@ async def preload_storage() -> None:
         _DOC_PLUGINS,
         _DOC_ICONS,
         _DOC_REQUESTS,
-        _DOC_USERS,
         _DOC_SUBSCRIPTIONS,
         _DOC_UPDATED,
         _DOC_JOINLY,
         _DOC_STENKA,
-        _DOC_AUDIT,
+        _DOC_POSTER,
+        _DOC_DIALOGS,
+        _DOC_STATS,
         _DOC_QUIZ,
     ):
         await asyncio.to_thread(_get_cached, doc_key)
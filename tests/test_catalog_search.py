@@ -0,0 +1,89 @@
+import itertools
+import unittest
+from unittest import mock
+
+import catalog_search
+from catalog_search import SearchIndex
+
+# Five-letter words over ten letters: 100k distinct name words.
+_LETTERS = "abcdefghij"
+
+
+def _osa_prefix_distance(query: str, word: str) -> int:
+    """Smallest optimal string alignment distance from ``query`` to a prefix of ``word``."""
+    rows = [list(range(len(query) + 1))]
+    best = len(query)
+    for depth in range(1, len(word) + 1):
+        rows.append(catalog_search._osa_row(query, word, depth, rows))
+        best = min(best, rows[-1][-1])
+    return best
+
+
+def _index(names):
+    index = SearchIndex(lambda entry: ((entry["name"],), (entry.get("description"),)))
+    entries = [{"name": name} for name in names]
+    index.add_many((entry, order) for order, entry in enumerate(entries))
+    return index, entries
+
+
+class FuzzyWalkTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        words = ("".join(letters) for letters in itertools.product(_LETTERS, repeat=5))
+        cls.index, _ = _index(words)
+
+    def _count_rows(self, query, max_typos):
+        with mock.patch.object(catalog_search, "_osa_row", wraps=catalog_search._osa_row) as row:
+            found = self.index._fuzzy_prefixes(query, max_typos)
+        return found, row.call_count
+
+    def test_exact_prefix_settles_whole_range(self):
+        found, rows = self._count_rows("ab", 0)
+        self.assertEqual(len(found), 1000)
+        self.assertEqual(set(found.values()), {0})
+        # One row for "a", one per second letter; nothing below "ab".
+        self.assertLessEqual(rows, 1 + len(_LETTERS))
+
+    def test_typo_walk_prunes_out_of_budget_branches(self):
+        found, rows = self._count_rows("abdc", 1)
+        self.assertIn("abdca", found)
+        self.assertEqual(found["abcda"], 1)
+        self.assertLess(rows, 1000)
+
+    def test_walk_matches_brute_force(self):
+        words = ["".join(letters) for letters in itertools.product("abcd", repeat=4)]
+        index, _ = _index(words)
+        for query in ("a", "ab", "abc", "acb", "abdc", "aadd", "abcdd"):
+            for max_typos in (0, 1, 2):
+                expected = {}
+                for word in words:
+                    if word[0] != query[0]:
+                        continue
+                    distance = _osa_prefix_distance(query, word)
+                    if distance <= max_typos:
+                        expected[word] = distance
+                self.assertEqual(index._fuzzy_prefixes(query, max_typos), expected, (query, max_typos))
+
+
+class RankedLimitTest(unittest.TestCase):
+    def setUp(self):
+        names = [
+            "".join(letters) + " " + "".join(reversed(letters))
+            for letters in itertools.product("abcde", repeat=4)
+        ]
+        self.index, self.entries = _index(names)
+
+    def test_limit_returns_head_of_full_ranking(self):
+        for query in ("a", "ab", "abc", "a b", "b a", "cd", "abcd dcba", "bcd"):
+            for method in (self.index.search, self.index.complete):
+                full = method(query)
+                for limit in (1, 3, 20):
+                    self.assertEqual(method(query, limit), full[:limit], (method.__name__, query, limit))
+
+    def test_complete_skips_walk_when_names_fill_page(self):
+        with mock.patch.object(SearchIndex, "_fuzzy_prefixes", side_effect=AssertionError):
+            self.assertEqual(len(self.index.complete("ab", 10)), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,19 +1,94 @@
 import asyncio
 import logging
+import sys
 import time
-from copy import deepcopy
 from typing import Any, Dict, List, Optional
 
-from storage import load_users, save_users
-
-_users_cache: Dict[str, Dict[str, Any]] = {}
+from storage import (
+    StorageEvent,
+    iter_user_rows,
+    save_user_rows,
+    save_user_rows_async,
+    subscribe_storage_events,
+)
+
+_USERS_DOC = "users"
+
+
+class _User:
+    """One user's row. Flags and language live in slots; any other payload
+    field is kept in ``extra``, which stays ``None`` for most users."""
+
+    __slots__ = ("language", "banned", "broadcast_enabled", "broadcast_paid", "bot_blocked", "extra")
+
+    def __init__(self) -> None:
+        self.language: Optional[str] = None
+        self.banned = False
+        self.broadcast_enabled = True
+        self.broadcast_paid = False
+        self.bot_blocked = False
+        self.extra: Optional[Dict[str, Any]] = None
+
+    def update(self, fields: Dict[str, Any]) -> None:
+        for key, value in fields.items():
+            if key == "language":
+                self.language = sys.intern(value) if isinstance(value, str) else None
+            elif key == "banned":
+                self.banned = bool(value)
+            elif key == "broadcast_enabled":
+                self.broadcast_enabled = bool(value)
+            elif key == "broadcast_paid":
+                self.broadcast_paid = bool(value)
+            elif key == "bot_blocked":
+                self.bot_blocked = bool(value)
+            else:
+                if self.extra is None:
+                    self.extra = {}
+                self.extra[key] = value
+
+    def discard(self, key: str) -> None:
+        if self.extra is not None:
+            self.extra.pop(key, None)
+            if not self.extra:
+                self.extra = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = dict(self.extra) if self.extra else {}
+        if self.language is not None:
+            data["language"] = self.language
+        data["banned"] = self.banned
+        if not self.broadcast_enabled:
+            data["broadcast_enabled"] = False
+        if self.broadcast_paid:
+            data["broadcast_paid"] = True
+        if self.bot_blocked:
+            data["bot_blocked"] = True
+        return data
+
+
+def _record(payload: Dict[str, Any]) -> _User:
+    user = _User()
+    user.update(payload)
+    return user
+
+
+_users: Dict[int, _User] = {}
 _cache_loaded: bool = False
 _cache_lock = asyncio.Lock()
 _save_lock = asyncio.Lock()
-_dirty: bool = False
+# Mutations bump the generation and record the touched user ids; a save
+# writes only those rows and the store is clean once the counters match.
+_generation: int = 0
+_persisted_generation: int = 0
+_changed_users: set[int] = set()
 _last_save: float = 0
 _pending_save: bool = False
 _SAVE_INTERVAL = 5.0
+# A remote rewrite of the users table is re-read in a thread. Ids touched
+# while that read runs keep their in-memory record when the result is
+# swapped in.
+_reload_pending: bool = False
+_reloading: Optional[set[int]] = None
 _background_tasks: set = set()
 logger = logging.getLogger(__name__)
 
@@ -25,40 +100,70 @@ def _on_background_done(task: asyncio.Task) -> None:
     exc = task.exception()
     if exc is not None:
         logger.error(
-            "Background user-store save failed",
+            "Background user-store task failed",
             exc_info=(type(exc), exc, exc.__traceback__),
         )
 
 
-def _spawn(loop) -> None:
-    task = loop.create_task(_schedule_save())
+def _spawn(loop, coro) -> None:
+    task = loop.create_task(coro)
     _background_tasks.add(task)
     task.add_done_callback(_on_background_done)
 
 
-def _load_from_storage() -> Dict[str, Any]:
+def _load_from_storage() -> Dict[int, _User]:
+    users: Dict[int, _User] = {}
+    try:
+        for user_key, payload in iter_user_rows():
+            try:
+                users[int(user_key)] = _record(payload)
+            except ValueError:
+                continue
+    except Exception:
+        logger.exception("Loading users failed")
+    return users
+
+
+def _take_changed() -> tuple[int, list[tuple[int, Dict[str, Any]]]]:
+    generation = _generation
+    rows = [(user_id, _users[user_id].to_dict()) for user_id in _changed_users if user_id in _users]
+    _changed_users.clear()
+    return generation, rows
+
+
+def _save_to_storage() -> None:
+    global _persisted_generation
+    generation, rows = _take_changed()
+    save_user_rows(rows)
+    _persisted_generation = generation
+
+
+async def _save_to_storage_async() -> None:
+    global _persisted_generation
+    generation, rows = _take_changed()
     try:
-        data = load_users()
+        await save_user_rows_async(rows)
     except Exception:
-        data = {"users": {}}
-    if not isinstance(data, dict):
-        return {"users": {}}
-    users = data.get("users")
-    if not isinstance(users, dict):
-        data["users"] = {}
-    return data
+        _changed_users.update(user_id for user_id, _ in rows)
+        raise
+    _persisted_generation = max(_persisted_generation, generation)
 
 
-def _save_to_storage_sync(data: Dict[str, Any]) -> None:
-    payload = data if isinstance(data, dict) else {"users": {}}
-    users = payload.get("users")
-    if not isinstance(users, dict):
-        payload = {"users": {}}
-    save_users(payload)
+def _mark_changed(user_id: int) -> None:
+    global _generation
+    _generation += 1
+    _changed_users.add(user_id)
+    if _reloading is not None:
+        _reloading.add(user_id)
+    try:
+        loop = asyncio.get_running_loop()
+        _spawn(loop, _schedule_save())
+    except RuntimeError:
+        _save_to_storage()
 
 
 async def _ensure_loaded() -> None:
-    global _users_cache, _cache_loaded
+    global _users, _cache_loaded
 
     if _cache_loaded:
         return
@@ -67,15 +172,13 @@ async def _ensure_loaded() -> None:
         if _cache_loaded:
             return
 
-        data = await asyncio.to_thread(_load_from_storage)
-        _users_cache = data.get("users", {})
+        _users = await asyncio.to_thread(_load_from_storage)
         _cache_loaded = True
 
 
 async def _schedule_save() -> None:
-    global _dirty, _last_save, _pending_save
+    global _last_save, _pending_save
 
-    _dirty = True
     delay = _SAVE_INTERVAL - (time.time() - _last_save)
     if delay > 0:
         if _pending_save:
@@ -87,41 +190,106 @@ async def _schedule_save() -> None:
             _pending_save = False
 
     async with _save_lock:
-        if not _dirty:
+        if _persisted_generation >= _generation:
             return
         _last_save = time.time()
-        data = {"users": deepcopy(_users_cache)}
-        await asyncio.to_thread(_save_to_storage_sync, data)
-        if _users_cache == data["users"]:
-            _dirty = False
+        await _save_to_storage_async()
 
 
 def _ensure_loaded_sync() -> None:
-    global _users_cache, _cache_loaded
+    global _users, _cache_loaded
     if not _cache_loaded:
-        data = _load_from_storage()
-        _users_cache = data.get("users", {})
+        _users = _load_from_storage()
         _cache_loaded = True
 
 
+def _adopt_users(users: Dict[int, _User], keep: set[int]) -> None:
+    global _users
+    # Unsaved local edits win; they are written on the next save.
+    for user_id in keep:
+        user = _users.get(user_id)
+        if user is None:
+            users.pop(user_id, None)
+        else:
+            users[user_id] = user
+    _users = users
+
+
+async def _reload_users() -> None:
+    global _reload_pending, _reloading
+    _reloading = set()
+    try:
+        while _reload_pending:
+            _reload_pending = False
+            users = await asyncio.to_thread(_load_from_storage)
+            _adopt_users(users, _changed_users | _reloading)
+    finally:
+        _reloading = None
+
+
+def _on_storage_event(event: StorageEvent) -> None:
+    global _reload_pending
+    # Local writes go straight to rows; only other processes' changes matter.
+    if event.doc_key != _USERS_DOC or not event.remote or not _cache_loaded:
+        return
+    if event.upserted is None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            _adopt_users(_load_from_storage(), _changed_users)
+            return
+        if not _reload_pending and _reloading is None:
+            _spawn(loop, _reload_users())
+        _reload_pending = True
+        return
+    for user_key in event.deleted or ():
+        user_id = int(user_key)
+        _users.pop(user_id, None)
+        if _reloading is not None:
+            _reloading.add(user_id)
+    for user_key, payload in event.upserted.items():
+        user_id = int(user_key)
+        if _reloading is not None:
+            _reloading.add(user_id)
+        # Unsaved local edits win; they are written on the next save.
+        if user_id not in _changed_users and isinstance(payload, dict):
+            _users[user_id] = _record(payload)
+
+
+subscribe_storage_events(_on_storage_event)
+
+
+def _user_for_update(user_id: int) -> _User:
+    _ensure_loaded_sync()
+    user_id = int(user_id)
+    user = _users.get(user_id)
+    if user is None:
+        user = _users[user_id] = _User()
+    return user
+
+
 def get_user_language(user_id: int) -> Optional[str]:
     _ensure_loaded_sync()
-    return _users_cache.get(str(user_id), {}).get("language")
+    user = _users.get(int(user_id))
+    return user.language if user is not None else None
 
 
 def get_user(user_id: int) -> Dict[str, Any]:
     _ensure_loaded_sync()
-    return _users_cache.get(str(user_id), {}).copy()
+    user = _users.get(int(user_id))
+    return user.to_dict() if user is not None else {}
 
 
 def is_broadcast_enabled(user_id: int) -> bool:
-    user = get_user(user_id)
-    return bool(user.get("broadcast_enabled", True))
+    _ensure_loaded_sync()
+    user = _users.get(int(user_id))
+    return user is None or user.broadcast_enabled
 
 
 def has_paid_broadcast_disable(user_id: int) -> bool:
-    user = get_user(user_id)
-    return bool(user.get("broadcast_paid", False))
+    _ensure_loaded_sync()
+    user = _users.get(int(user_id))
+    return user is not None and user.broadcast_paid
 
 
 def set_broadcast_enabled(user_id: int, enabled: bool) -> None:
@@ -133,39 +301,40 @@ def set_paid_broadcast_disable(user_id: int, paid: bool) -> None:
 
 
 def set_user_language(user_id: int, language: str) -> None:
-    _ensure_loaded_sync()
+    update_user(user_id, language=language.lower())
 
-    user_key = str(user_id)
-    if user_key not in _users_cache:
-        _users_cache[user_key] = {}
 
-    _users_cache[user_key]["language"] = language.lower()
+def update_user(user_id: int, **fields: Any) -> None:
+    _user_for_update(user_id).update(fields)
+    _mark_changed(int(user_id))
 
-    try:
-        loop = asyncio.get_running_loop()
-        _spawn(loop)
-    except RuntimeError:
-        _save_to_storage_sync({"users": _users_cache})
 
+def mark_bot_blocked(user_id: int) -> None:
+    update_user(user_id, bot_blocked=True)
 
-def update_user(user_id: int, **fields: Any) -> None:
-    _ensure_loaded_sync()
 
-    user_key = str(user_id)
-    if user_key not in _users_cache:
-        _users_cache[user_key] = {}
+def clear_bot_blocked(user_id: int) -> None:
+    _ensure_loaded_sync()
+    user = _users.get(int(user_id))
+    if user is not None and user.bot_blocked:
+        user.bot_blocked = False
+        _mark_changed(int(user_id))
 
-    _users_cache[user_key].update(fields)
 
-    try:
-        loop = asyncio.get_running_loop()
-        _spawn(loop)
-    except RuntimeError:
-        _save_to_storage_sync({"users": _users_cache})
+def broadcast_recipient_ids(after: int = 0) -> List[int]:
+    """Ids above ``after``, ascending, of users a broadcast should reach."""
+    _ensure_loaded_sync()
+    return sorted(
+        user_id
+        for user_id, user in _users.items()
+        if user_id > after and user.broadcast_enabled and not user.banned and not user.bot_blocked
+    )
 
 
 def is_user_banned(user_id: int) -> bool:
-    return get_user(user_id).get("banned", False)
+    _ensure_loaded_sync()
+    user = _users.get(int(user_id))
+    return user is not None and user.banned
 
 
 def ban_user(user_id: int, reason: str = "") -> None:
@@ -174,32 +343,45 @@ def ban_user(user_id: int, reason: str = "") -> None:
 
 def unban_user(user_id: int) -> None:
     _ensure_loaded_sync()
-
-    user_key = str(user_id)
-    if user_key in _users_cache:
-        _users_cache[user_key]["banned"] = False
-        _users_cache[user_key].pop("ban_reason", None)
-        _users_cache[user_key].pop("ban_permanent", None)
-
-        try:
-            loop = asyncio.get_running_loop()
-            _spawn(loop)
-        except RuntimeError:
-            _save_to_storage_sync({"users": _users_cache})
+    user = _users.get(int(user_id))
+    if user is not None:
+        user.banned = False
+        user.discard("ban_reason")
+        user.discard("ban_permanent")
+        _mark_changed(int(user_id))
 
 
 def get_banned_users() -> List[Dict[str, Any]]:
     _ensure_loaded_sync()
     return [
-        {"user_id": int(uid), **data}
-        for uid, data in _users_cache.items()
-        if data.get("banned")
+        {"user_id": user_id, **user.to_dict()}
+        for user_id, user in _users.items()
+        if user.banned
     ]
 
 
 def list_users() -> List[Dict[str, Any]]:
     _ensure_loaded_sync()
-    return [{"user_id": int(uid), **data} for uid, data in _users_cache.items()]
+    return [{"user_id": user_id, **user.to_dict()} for user_id, user in _users.items()]
+
+
+def count_users_by_language() -> Dict[Optional[str], int]:
+    _ensure_loaded_sync()
+    counts: Dict[Optional[str], int] = {}
+    for user in _users.values():
+        counts[user.language] = counts.get(user.language, 0) + 1
+    return counts
+
+
+def find_user_by_username(username: str) -> Optional[int]:
+    _ensure_loaded_sync()
+    target = str(username or "").lstrip("@").lower()
+    if not target:
+        return None
+    for user_id, user in _users.items():
+        if user.extra and str(user.extra.get("username") or "").lower() == target:
+            return user_id
+    return None
 
 
 async def init_user_store() -> None:
@@ -207,14 +389,10 @@ async def init_user_store() -> None:
 
 
 async def flush_user_store() -> None:
-    global _dirty
-
     tasks = [task for task in _background_tasks if not task.done()]
     if tasks:
         await asyncio.gather(*tasks, return_exceptions=True)
 
-    if _dirty or _users_cache:
-        data = {"users": deepcopy(_users_cache)}
-        await asyncio.to_thread(_save_to_storage_sync, data)
-        if _users_cache == data["users"]:
-            _dirty = False
+    if _persisted_generation < _generation:
+        async with _save_lock:
+            await _save_to_storage_async()
@@ -13,8 +13,6 @@ from telethon.extensions import html as telethon_html
 
 from channel_parser import parse_channel_post
 from storage import load_plugins, save_plugins, load_icons, save_icons, load_config
-from bot.cache import invalidate
-from catalog import invalidate_catalog_cache
 
 logger = logging.getLogger(__name__)
 
@@ -37,12 +35,6 @@ def _supports_collapsed_blockquote() -> bool:
 BLOCKQUOTE_COLLAPSED_SUPPORTED = _supports_collapsed_blockquote()
 
 
-def _invalidate_all() -> None:
-    invalidate("plugins")
-    invalidate("icons")
-    invalidate_catalog_cache()
-
-
 OPERATION_TIMEOUT = 180.0
 
 
@@ -672,7 +664,6 @@ class UserbotClient:
 
         save_plugins(plugins_db)
         save_icons(icons_db)
-        _invalidate_all()
 
         logger.info(f"Sync complete: {stats}")
         return stats